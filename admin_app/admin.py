@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import User_Profile, AuditLog, SystemSettings
+from .models import User_Profile, AuditLog, SystemSettings, PriceSample, Candle, IndicatorSnapshot, IndicatorValue, IndicatorState, BackfillCheckpoint, CorrelationSnapshot, StatCounter, BacktestResult
 
 
 @admin.register(User_Profile)
@@ -19,8 +19,13 @@ class UserProfileAdmin(admin.ModelAdmin):
 class AuditLogAdmin(admin.ModelAdmin):
     list_display = ('user', 'action', 'model_name', 'timestamp', 'ip_address')
     list_filter = ('action', 'model_name', 'timestamp', 'user')
-    search_fields = ('user__username', 'description', 'model_name', 'ip_address')
+    search_fields = ('description', 'model_name', 'ip_address')
     readonly_fields = ('timestamp', 'user', 'action', 'model_name', 'object_id', 'description', 'ip_address', 'user_agent')
+    # Audit logs live in their own database, so users cannot be joined in
+    list_select_related = ()
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related('user')
     
     def has_add_permission(self, request):
         return False
@@ -37,3 +42,62 @@ class SystemSettingsAdmin(admin.ModelAdmin):
     list_display = ('key', 'value', 'updated_at')
     search_fields = ('key', 'description')
     readonly_fields = ('updated_at',)
+
+
+@admin.register(PriceSample)
+class PriceSampleAdmin(admin.ModelAdmin):
+    list_display = ('coin', 'currency', 'timestamp', 'price')
+    list_filter = ('coin', 'currency')
+
+
+@admin.register(Candle)
+class CandleAdmin(admin.ModelAdmin):
+    list_display = ('coin', 'currency', 'interval', 'timestamp', 'open', 'high', 'low', 'close')
+    list_filter = ('coin', 'currency', 'interval')
+
+
+@admin.register(IndicatorSnapshot)
+class IndicatorSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('coin', 'currency', 'interval', 'atr', 'computed_at')
+    list_filter = ('coin', 'currency', 'interval')
+    readonly_fields = ('computed_at',)
+
+
+@admin.register(IndicatorValue)
+class IndicatorValueAdmin(admin.ModelAdmin):
+    list_display = ('coin', 'currency', 'interval', 'indicator', 'params', 'timestamp', 'value')
+    list_filter = ('coin', 'currency', 'interval', 'indicator', 'params')
+
+
+@admin.register(IndicatorState)
+class IndicatorStateAdmin(admin.ModelAdmin):
+    list_display = ('coin', 'currency', 'interval', 'indicator', 'params', 'timestamp', 'updated_at')
+    list_filter = ('coin', 'currency', 'interval', 'indicator')
+    readonly_fields = ('updated_at',)
+
+
+@admin.register(BackfillCheckpoint)
+class BackfillCheckpointAdmin(admin.ModelAdmin):
+    list_display = ('coin', 'currency', 'start', 'end', 'samples', 'completed_at')
+    list_filter = ('coin', 'currency')
+    readonly_fields = ('completed_at',)
+
+
+@admin.register(CorrelationSnapshot)
+class CorrelationSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('currency', 'interval', 'window', 'timestamp', 'computed_at')
+    list_filter = ('currency', 'interval')
+    readonly_fields = ('computed_at',)
+
+
+@admin.register(StatCounter)
+class StatCounterAdmin(admin.ModelAdmin):
+    list_display = ('key', 'value')
+    search_fields = ('key',)
+
+
+@admin.register(BacktestResult)
+class BacktestResultAdmin(admin.ModelAdmin):
+    list_display = ('coin', 'currency', 'interval', 'strategy', 'params', 'sharpe', 'total_return', 'max_drawdown', 'trades', 'created_at')
+    list_filter = ('coin', 'currency', 'interval', 'strategy')
+    readonly_fields = ('created_at',)
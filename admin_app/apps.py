@@ -5,3 +5,6 @@ class AdminAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'admin_app'
     verbose_name = 'Admin Application'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,46 @@
+import asyncio
+
+from django.core.handlers.asgi import ASGIHandler
+
+
+class DisconnectAwareASGIHandler(ASGIHandler):
+    """
+    ASGIHandler that cancels the response when the client goes away.
+
+    Django 4.2 stops reading `receive` once the request body is in, and ASGI
+    servers drop `send` calls after a disconnect without raising, so a
+    streaming response such as /api/stream/ would otherwise run forever.
+    Here `receive` is watched for http.disconnect after the body has been
+    read and the response task is cancelled when it arrives, which runs the
+    streaming generator's cleanup.
+    """
+
+    async def handle(self, scope, receive, send):
+        body_read = asyncio.Event()
+
+        async def receive_body():
+            message = await receive()
+            if message["type"] == "http.disconnect" or not message.get("more_body", False):
+                body_read.set()
+            return message
+
+        response = asyncio.create_task(super().handle(scope, receive_body, send))
+        watcher = asyncio.create_task(self._wait_for_disconnect(receive, body_read))
+        try:
+            await asyncio.wait({response, watcher}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            # Cancel whichever is still running, or both if we were cancelled
+            watcher.cancel()
+            response.cancel()
+            await asyncio.gather(response, watcher, return_exceptions=True)
+        if not response.cancelled():
+            response.result()  # re-raise what the request raised
+
+    @staticmethod
+    async def _wait_for_disconnect(receive, body_read):
+        # `receive` belongs to the request until its body has been read
+        await body_read.wait()
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
@@ -0,0 +1,101 @@
+import json
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from admin_app.parameter.resample import INTERVALS
+from admin_app.service.archive import (
+    ArchiveError,
+    import_from_db,
+    import_market_chart,
+    open_archive,
+)
+from admin_app.service.watchlist import get_watchlist, parse_watchlist
+
+
+class Command(BaseCommand):
+    help = "Append closed candles to the memory-mapped columnar archive and check its integrity"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--coins",
+            help="Comma-separated CoinGecko coin ids (default: the watchlist setting)",
+        )
+        parser.add_argument("--currency", default=settings.INGEST_CURRENCY)
+        parser.add_argument(
+            "--interval",
+            action="append",
+            choices=list(INTERVALS),
+            help="Candle interval, may be repeated (default: CANDLE_INTERVALS)",
+        )
+        parser.add_argument(
+            "--from-json",
+            metavar="PATH",
+            help="Import a saved CoinGecko market_chart response instead of the stored candles",
+        )
+        parser.add_argument(
+            "--verify", action="store_true", help="Only check the archived series (read-only), do not import"
+        )
+        parser.add_argument(
+            "--repair",
+            action="store_true",
+            help="Roll back to the complete rows and truncate leftovers of interrupted appends, then verify",
+        )
+
+    def handle(self, *args, **options):
+        coins = parse_watchlist(options["coins"]) if options["coins"] else get_watchlist()
+        currency = options["currency"]
+        intervals = options["interval"] or settings.CANDLE_INTERVALS
+
+        if options["verify"] or options["repair"]:
+            self.verify(coins, currency, intervals, repair=options["repair"])
+            return
+
+        market_data = None
+        if options["from_json"]:
+            if len(coins) != 1:
+                raise CommandError("--from-json imports one coin, pass it with --coins")
+            with open(options["from_json"]) as handle:
+                market_data = json.load(handle)
+
+        for coin in coins:
+            for interval in intervals:
+                started = time.monotonic()
+                try:
+                    if market_data is not None:
+                        added = import_market_chart(coin, currency, interval, market_data)
+                    else:
+                        added = import_from_db(coin, currency, interval)
+                    total = open_archive(coin, currency, interval).count
+                except (ArchiveError, ValueError) as exc:
+                    raise CommandError(f"{coin}/{currency} {interval}: {exc}")
+                self.stdout.write(
+                    f"{coin}/{currency} {interval}: appended {added} rows "
+                    f"(total {total}) in {(time.monotonic() - started) * 1000:.1f}ms"
+                )
+
+    def verify(self, coins, currency, intervals, repair=False):
+        failed = False
+        for coin in coins:
+            for interval in intervals:
+                label = f"{coin}/{currency} {interval}"
+                try:
+                    if repair:
+                        # Takes the series' write lock, so a running append finishes first
+                        archive = open_archive(coin, currency, interval, writable=True)
+                        for change in archive.repair():
+                            self.stdout.write(self.style.WARNING(f"{label}: {change}"))
+                    else:
+                        archive = open_archive(coin, currency, interval)
+                    problems = archive.verify()
+                except ArchiveError as exc:
+                    problems = [str(exc)]
+                if problems:
+                    failed = True
+                    for problem in problems:
+                        self.stdout.write(self.style.ERROR(f"{label}: {problem}"))
+                else:
+                    self.stdout.write(self.style.SUCCESS(f"{label}: {archive.count} rows OK"))
+        if failed:
+            raise CommandError("Archive verification failed" + ("" if repair else "; --repair fixes interrupted appends"))
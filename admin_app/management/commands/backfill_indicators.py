@@ -0,0 +1,44 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from admin_app.parameter.resample import INTERVALS
+from admin_app.service.indicator_series import OVERLAYS, backfill_indicators
+from admin_app.service.watchlist import get_watchlist, parse_watchlist
+
+
+class Command(BaseCommand):
+    help = "Recompute the stored indicator series (chart overlays) from the full candle history"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--coins",
+            help="Comma-separated CoinGecko coin ids (default: the watchlist setting)",
+        )
+        parser.add_argument("--currency", default=settings.INGEST_CURRENCY)
+        parser.add_argument(
+            "--interval",
+            action="append",
+            choices=list(INTERVALS),
+            help="Candle interval, may be repeated (default: CANDLE_INTERVALS)",
+        )
+        parser.add_argument(
+            "--overlay",
+            action="append",
+            choices=list(OVERLAYS),
+            help="Overlay to rebuild, may be repeated (default: all)",
+        )
+
+    def handle(self, *args, **options):
+        coins = parse_watchlist(options["coins"]) if options["coins"] else get_watchlist()
+        currency = options["currency"]
+
+        for coin in coins:
+            for interval in options["interval"] or settings.CANDLE_INTERVALS:
+                started = time.monotonic()
+                written = backfill_indicators(coin, currency, interval, options["overlay"])
+                self.stdout.write(
+                    f"{coin}/{currency} {interval}: {written} values "
+                    f"in {(time.monotonic() - started) * 1000:.1f}ms"
+                )
@@ -0,0 +1,98 @@
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from admin_app.parameter.resample import DAY_MS
+from admin_app.service.backfill import backfill
+from admin_app.service.watchlist import get_watchlist, parse_watchlist
+from admin_app.source.koingecko import build_client
+
+
+def parse_date(value):
+    """Epoch milliseconds of a YYYY-MM-DD date at 00:00 UTC."""
+    try:
+        day = datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    except ValueError:
+        raise CommandError(f"Invalid date {value!r}, expected YYYY-MM-DD")
+    return int(day.timestamp() * 1000)
+
+
+class Command(BaseCommand):
+    help = "Backfill price history from the CoinGecko range endpoint in parallel, resumable chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--coins",
+            help="Comma-separated CoinGecko coin ids (default: the watchlist setting)",
+        )
+        parser.add_argument("--currency", default=settings.INGEST_CURRENCY)
+        parser.add_argument("--from", dest="start", help="First day, YYYY-MM-DD (default: --days ago)")
+        parser.add_argument("--to", dest="end", help="Day after the last one, YYYY-MM-DD (default: now)")
+        parser.add_argument("--days", type=int, default=365, help="History to backfill when --from is not given")
+        parser.add_argument(
+            "--chunk-days",
+            type=int,
+            default=settings.BACKFILL_CHUNK_DAYS,
+            help="Days per request; CoinGecko serves hourly samples up to 90 days",
+        )
+        parser.add_argument("--workers", type=int, default=settings.BACKFILL_WORKERS, help="Concurrent requests")
+        parser.add_argument(
+            "--rate",
+            type=float,
+            default=settings.BACKFILL_RATE_LIMIT,
+            help="Requests per second for this run, separate from the live ingestion budget",
+        )
+        parser.add_argument(
+            "--no-rebuild",
+            action="store_false",
+            dest="rebuild",
+            help="Skip rebuilding candles and indicators after fetching",
+        )
+
+    def handle(self, *args, **options):
+        coins = parse_watchlist(options["coins"]) if options["coins"] else get_watchlist()
+        currency = options["currency"]
+        end = parse_date(options["end"]) if options["end"] else None
+        if options["start"]:
+            start = parse_date(options["start"])
+        else:
+            start = (end or int(datetime.now(timezone.utc).timestamp() * 1000)) - options["days"] * DAY_MS
+        end = end or int(datetime.now(timezone.utc).timestamp() * 1000)
+        if start >= end:
+            raise CommandError("--from must be before --to")
+        if options["chunk_days"] <= 0 or options["workers"] <= 0:
+            raise CommandError("--chunk-days and --workers must be positive")
+
+        # A client of its own: its rate limit and breaker do not touch the
+        # ones the web process and ingest_prices share.
+        client = build_client(rate_limit=options["rate"], burst=options["workers"])
+        verbosity = options["verbosity"]
+
+        def progress(report, chunk, samples):
+            if verbosity >= 2:
+                self.stdout.write(
+                    f"  chunk {report.chunks}/{report.pending} "
+                    f"{datetime.fromtimestamp(chunk[0] / 1000, timezone.utc):%Y-%m-%d}: {samples} samples"
+                )
+
+        failed = False
+        for coin in coins:
+            self.stdout.write(f"Backfilling {coin}/{currency}")
+            report = backfill(
+                coin,
+                currency,
+                start,
+                end,
+                client,
+                options["chunk_days"] * DAY_MS,
+                workers=options["workers"],
+                rebuild=options["rebuild"],
+                progress=progress,
+            )
+            style = self.style.WARNING if report.failed else self.style.SUCCESS
+            self.stdout.write(style(f"{coin}/{currency}: {report.summary()}"))
+            failed = failed or bool(report.failed)
+
+        if failed:
+            raise CommandError("Some chunks failed; run the command again to retry them")
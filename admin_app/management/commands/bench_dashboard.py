@@ -0,0 +1,93 @@
+import asyncio
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from admin_app.service.correlation import load_correlation_table
+from admin_app.service.dashboard import (
+    load_indicator_snapshot,
+    load_recent_logs,
+    load_stats,
+    load_watchlist_snapshots,
+    service_dashboard,
+    service_dashboard_async,
+)
+from admin_app.service.timing import measure, timing_stats
+
+
+def _summary(stats):
+    return f"mean={stats['mean_ms']:7.2f}ms p50={stats['median_ms']:7.2f}ms p95={stats['p95_ms']:7.2f}ms"
+
+
+class Command(BaseCommand):
+    help = "Compare the sequential and the concurrent dashboard context on the current database"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--coin", default="bitcoin")
+        parser.add_argument("--currency", default=settings.INGEST_CURRENCY)
+        parser.add_argument(
+            "--latency",
+            type=float,
+            default=0.0,
+            help="Milliseconds added to every query, to model a database across the network",
+        )
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        coin, currency = options["coin"], options["currency"]
+        if options["latency"]:
+            self._add_latency(options["latency"] / 1000)
+
+        parts = {
+            "stats": lambda: load_stats(),
+            "recent_logs": lambda: load_recent_logs(),
+            "snapshot": lambda: load_indicator_snapshot(coin, currency),
+            "watchlist": lambda: load_watchlist_snapshots(currency),
+            "correlation": lambda: load_correlation_table(currency),
+        }
+        means = {}
+        for name, func in parts.items():
+            stats = timing_stats(measure(func, iterations))
+            means[name] = stats["mean_ms"]
+            self.stdout.write(f"{name:12} {_summary(stats)}")
+
+        self.stdout.write(
+            f"{'sum of parts':12} {sum(means.values()):7.2f}ms, "
+            f"slowest part {max(means.values()):7.2f}ms"
+        )
+
+        sequential = timing_stats(measure(lambda: service_dashboard(coin, currency), iterations))
+        self.stdout.write(f"{'sequential':12} {_summary(sequential)}")
+
+        loop = asyncio.new_event_loop()
+        try:
+            concurrent = timing_stats(
+                measure(
+                    lambda: loop.run_until_complete(service_dashboard_async(coin, currency)),
+                    iterations,
+                )
+            )
+        finally:
+            loop.close()
+        self.stdout.write(f"{'concurrent':12} {_summary(concurrent)}")
+
+        speedup = sequential["median_ms"] / concurrent["median_ms"]
+        self.stdout.write(self.style.SUCCESS(f"Speedup (p50): {speedup:.2f}x"))
+
+    def _add_latency(self, seconds):
+        def delay(execute, sql, params, many, context):
+            time.sleep(seconds)
+            return execute(sql, params, many, context)
+
+        def install(sender, connection, **kwargs):
+            connection.execute_wrappers.append(delay)
+
+        # Worker threads open their own connections, so hook every new one.
+        connection_created.connect(install, weak=False)
+        for connection in connections.all():
+            if connection.connection is not None:
+                install(None, connection)
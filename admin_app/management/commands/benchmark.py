@@ -0,0 +1,374 @@
+import itertools
+import json
+import os
+import platform
+import random
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from unittest import mock
+
+import django
+import numpy as np
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import Client
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from django.utils import timezone
+
+from admin_app.models import AuditLog, User_Profile
+from admin_app.parameter import indicators
+from admin_app.parameter.average_true_range import average_true_range
+from admin_app.parameter.correlation import log_returns, rolling_statistics, window_statistics
+from admin_app.parameter.resample import HOUR_MS, MINUTE_MS, resample_ohlc
+from admin_app.parameter.streaming import WilderRSI
+from admin_app.service import counters
+from admin_app.service.audit import get_buffer
+from admin_app.service.dashboard import (
+    analyze_crypto_data,
+    generate_crypto_candlestick_data,
+    refresh_indicator_snapshot,
+)
+from admin_app.service.timing import measure, timing_stats
+
+SECTIONS = ["indicators", "correlation", "candles", "views"]
+DEFAULT_SIZES = "1e3,1e4,1e5,1e6,1e7"
+DEFAULT_COIN_COUNTS = "10,100,300"
+
+# Inputs built from one dict per candle, or fed one sample at a time, get
+# too slow and memory hungry to be worth timing past this size.
+PER_ITEM_LIMIT = 1_000_000
+
+# The per-pair reference loop is only timed up to this many coins.
+PAIRWISE_LOOP_LIMIT = 100
+
+_START_MS = 1_700_000_000_000
+
+
+def synthetic_series(size, step_ms=MINUTE_MS, seed=0):
+    """Reproducible random-walk prices: (timestamps, open, high, low, close)."""
+    rng = np.random.default_rng(seed)
+    timestamps = _START_MS + np.arange(size, dtype=np.int64) * step_ms
+    close = 30000.0 * np.exp(np.cumsum(rng.normal(0.0, 0.001, size)))
+    opens = np.concatenate(([close[0]], close[:-1]))
+    spread = np.abs(rng.normal(0.0, 0.0005, size)) * close
+    high = np.maximum(opens, close) + spread
+    low = np.minimum(opens, close) - spread
+    return timestamps, opens, high, low, close
+
+
+class QueryCounter:
+    """
+    Counts queries on every connection, including the ones worker threads
+    open; CaptureQueriesContext only sees the calling thread and is reset
+    by request_started.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+        connection_created.connect(self._install, weak=False)
+        for alias in connections:
+            if connections[alias].connection is not None:
+                self._install(None, connections[alias])
+
+    def _install(self, sender, connection, **kwargs):
+        connection.execute_wrappers.append(self._count)
+
+    def _count(self, execute, sql, params, many, context):
+        with self._lock:
+            self.count += 1
+        return execute(sql, params, many, context)
+
+
+class FakeMarketChart:
+    """Stand-in for koingecko.market_chart returning hourly synthetic prices."""
+
+    def __init__(self, seed=0):
+        self.seed = seed
+        self.calls = 0
+
+    def __call__(self, coin, currency, days):
+        self.calls += 1
+        now = int(time.time() * 1000)
+        count = max(1, int(float(days) * 24))
+        _, _, _, _, close = synthetic_series(count, seed=self.seed + self.calls)
+        timestamps = now - (count - np.arange(count)) * HOUR_MS
+        return {"prices": np.column_stack((timestamps, close)).tolist()}
+
+
+class Command(BaseCommand):
+    help = "Time indicators, the correlation matrix, the candle builder and the main views; prints JSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--only", action="append", choices=SECTIONS, help="Section to run, may be repeated (default: all)"
+        )
+        parser.add_argument(
+            "--sizes", default=DEFAULT_SIZES, help=f"Synthetic series sizes (default: {DEFAULT_SIZES})"
+        )
+        parser.add_argument(
+            "--coin-counts",
+            default=DEFAULT_COIN_COUNTS,
+            help=f"Watchlist sizes for the correlation matrix (default: {DEFAULT_COIN_COUNTS})",
+        )
+        parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement")
+        parser.add_argument("--days", type=int, default=365, help="History served by the stubbed price source")
+        parser.add_argument("--users", type=int, default=5000, help="Users seeded for the view benchmarks")
+        parser.add_argument("--audit-logs", type=int, default=200_000, help="Audit log rows seeded")
+        parser.add_argument("--requests", type=int, default=20, help="Requests per view")
+        parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+
+    def handle(self, *args, **options):
+        sections = options["only"] or SECTIONS
+        sizes = [int(float(size)) for size in options["sizes"].split(",") if size]
+        repeat = options["repeat"]
+
+        report = {
+            "meta": {
+                "created_at": timezone.now().isoformat(),
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "django": django.get_version(),
+                "machine": platform.machine(),
+                "cpus": os.cpu_count(),
+                "options": {
+                    key: options[key]
+                    for key in ("sizes", "coin_counts", "repeat", "days", "users", "audit_logs", "requests")
+                },
+            }
+        }
+
+        if "indicators" in sections:
+            report["indicators"] = self.bench_indicators(sizes, repeat)
+
+        if "correlation" in sections:
+            counts = [int(count) for count in options["coin_counts"].split(",") if count]
+            report["correlation"] = self.bench_correlation(counts, repeat)
+
+        if "candles" in sections or "views" in sections:
+            with self.test_databases():
+                if "candles" in sections:
+                    report["candles"] = self.bench_candles(options["days"], repeat)
+                if "views" in sections:
+                    report["views"] = self.bench_views(options)
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as handle:
+                handle.write(output + "\n")
+            self.stderr.write(f"Wrote {options['output']}")
+        else:
+            self.stdout.write(output)
+
+    # Indicators and resampling, no database involved
+
+    def bench_indicators(self, sizes, repeat):
+        results = []
+        for size in sizes:
+            timestamps, opens, high, low, close = synthetic_series(size)
+            cases = {
+                "sma_14": lambda: indicators.sma(close, 14),
+                "ema_14": lambda: indicators.ema(close, 14),
+                "rsi_14": lambda: indicators.rsi(close, 14),
+                "atr_14": lambda: indicators.atr(high, low, close, 14),
+                "bollinger_20": lambda: indicators.bollinger(close, 20),
+                "macd": lambda: indicators.macd(close),
+                "resample_1h": lambda: resample_ohlc(timestamps, close, "1h", settings.CANDLE_TIME_ZONE),
+                "resample_1d": lambda: resample_ohlc(timestamps, close, "1d", settings.CANDLE_TIME_ZONE),
+            }
+            if size <= PER_ITEM_LIMIT:
+                candles = [
+                    {"o": o, "h": h, "l": l, "c": c}
+                    for o, h, l, c in zip(opens.tolist(), high.tolist(), low.tolist(), close.tolist())
+                ]
+                cases["average_true_range_14"] = lambda: average_true_range(candles, 14)
+                cases["analyze_crypto_data"] = lambda: analyze_crypto_data(candles)
+                cases["streaming_rsi_14"] = lambda: self._stream(close.tolist())
+
+            for name, func in cases.items():
+                results.append({"name": name, "size": size, **timing_stats(measure(func, repeat))})
+                self.stderr.write(f"indicators {name} n={size}: {results[-1]['median_ms']}ms")
+        return results
+
+    def bench_correlation(self, counts, repeat, days=365, window=30):
+        results = []
+        for count in counts:
+            closes = np.stack([synthetic_series(days + 1, seed=seed)[4] for seed in range(count)])
+            # Coins listed part way through, as on a real watchlist
+            closes[np.random.default_rng(0).random(count) < 0.1, : days // 2] = np.nan
+            returns = log_returns(closes)
+            cases = {
+                f"window_{window}": lambda: window_statistics(returns[:, -window:], 10),
+                f"rolling_{window}_step_7": lambda: rolling_statistics(returns, window, 7, 10),
+            }
+            if count <= PAIRWISE_LOOP_LIMIT:
+                cases[f"pairwise_loop_{window}"] = lambda: self._pairwise(returns[:, -window:])
+
+            for name, func in cases.items():
+                results.append({"name": name, "coins": count, **timing_stats(measure(func, repeat))})
+                self.stderr.write(f"correlation {name} coins={count}: {results[-1]['median_ms']}ms")
+        return results
+
+    @staticmethod
+    def _pairwise(returns):
+        count = returns.shape[0]
+        matrix = np.empty((count, count))
+        for i in range(count):
+            for j in range(count):
+                both = np.isfinite(returns[i]) & np.isfinite(returns[j])
+                matrix[i, j] = np.corrcoef(returns[i][both], returns[j][both])[0, 1]
+        return matrix
+
+    @staticmethod
+    def _stream(values):
+        indicator = WilderRSI(14)
+        for value in values:
+            indicator.update(value)
+
+    # Database-backed sections run against throwaway test databases
+
+    @contextmanager
+    def test_databases(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            # File databases like production, not SQLite's in-memory default
+            for alias in connections:
+                settings_dict = connections[alias].settings_dict
+                if settings_dict["ENGINE"].endswith("sqlite3"):
+                    settings_dict.setdefault("TEST", {})["NAME"] = os.path.join(tmpdir, f"{alias}.sqlite3")
+
+            setup_test_environment()
+            old_config = setup_databases(verbosity=0, interactive=False)
+            try:
+                yield
+            finally:
+                get_buffer().flush()
+                teardown_databases(old_config, verbosity=0)
+                teardown_test_environment()
+
+    def bench_candles(self, days, repeat):
+        results = []
+        fresh_coins = (f"bench-{i}" for i in itertools.count())
+        with mock.patch("admin_app.service.price_history.market_chart", FakeMarketChart()):
+            # Cold start: the full history for a coin with nothing stored
+            initial = measure(
+                lambda: generate_crypto_candlestick_data(next(fresh_coins), "usd", days), repeat
+            )
+            results.append({"name": "generate_crypto_candlestick_data/initial", "samples": days * 24, **timing_stats(initial)})
+
+            # Steady state: one more day on top of the stored history
+            generate_crypto_candlestick_data("bench", "usd", days)
+            incremental = measure(lambda: generate_crypto_candlestick_data("bench", "usd", days), repeat)
+            results.append({"name": "generate_crypto_candlestick_data/incremental", "samples": 24, **timing_stats(incremental)})
+
+            snapshot = measure(lambda: refresh_indicator_snapshot("bench", "usd", days), repeat)
+            results.append({"name": "refresh_indicator_snapshot", "candles": days, **timing_stats(snapshot)})
+
+        for row in results:
+            self.stderr.write(f"candles {row['name']}: {row['median_ms']}ms")
+        return results
+
+    def seed(self, users, audit_logs, days):
+        password = make_password("benchmark")
+        User.objects.bulk_create(
+            [
+                User(
+                    username=f"user{i}",
+                    email=f"user{i}@example.com",
+                    first_name=f"First{i}",
+                    last_name=f"Last{i}",
+                    password=password,
+                )
+                for i in range(users)
+            ],
+            batch_size=1000,
+        )
+        admin = User.objects.create_superuser("bench-admin", "admin@example.com", "benchmark")
+
+        roles = [role for role, _ in User_Profile.ROLE_CHOICES]
+        User_Profile.objects.bulk_create(
+            [
+                User_Profile(user_id=user_id, role=roles[user_id % len(roles)])
+                for user_id in User.objects.values_list("id", flat=True)
+            ],
+            batch_size=1000,
+        )
+
+        rng = random.Random(0)
+        user_ids = list(User.objects.values_list("id", flat=True))
+        actions = [action for action, _ in AuditLog.ACTION_CHOICES]
+        model_names = ["User", "Dashboard", "SystemSettings", "AuditLog"]
+        now = timezone.now()
+        for offset in range(0, audit_logs, 10_000):
+            AuditLog.objects.bulk_create(
+                [
+                    AuditLog(
+                        user_id=rng.choice(user_ids),
+                        action=rng.choice(actions),
+                        model_name=rng.choice(model_names),
+                        object_id=rng.randint(1, users or 1),
+                        description=f"Benchmark entry {i} for {rng.choice(model_names).lower()}",
+                        ip_address="127.0.0.1",
+                        timestamp=now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600)),
+                    )
+                    for i in range(offset, min(audit_logs, offset + 10_000))
+                ],
+                batch_size=1000,
+            )
+        # bulk_create skips the signals that keep the counters current
+        counters.reconcile()
+
+        with mock.patch("admin_app.service.price_history.market_chart", FakeMarketChart()):
+            generate_crypto_candlestick_data("bitcoin", "usd", days)
+        refresh_indicator_snapshot("bitcoin", "usd")
+        return admin
+
+    def bench_views(self, options):
+        started = time.perf_counter()
+        admin = self.seed(options["users"], options["audit_logs"], options["days"])
+        self.stderr.write(f"Seeded in {time.perf_counter() - started:.1f}s")
+
+        client = Client()
+        client.force_login(admin)
+        cases = [
+            ("dashboard", "/"),
+            ("audit_logs", "/audit-logs/"),
+            ("audit_logs/search", "/audit-logs/?q=dashboard"),
+            ("audit_logs/filter", "/audit-logs/?action=login"),
+            ("user_list", "/users/"),
+            ("user_list/search", "/users/?q=user42"),
+            ("api_candles", "/api/candles/bitcoin/?range=1y"),
+        ]
+
+        queries = QueryCounter()
+        results = []
+        for name, path in cases:
+            client.get(path)  # warm caches and connections
+            get_buffer().flush()  # keep queued audit writes out of the count
+            before = queries.count
+            response = client.get(path)
+            query_count = queries.count - before
+            samples = measure(lambda: client.get(path), options["requests"])
+            results.append(
+                {
+                    "name": name,
+                    "path": path,
+                    "status": response.status_code,
+                    "queries": query_count,
+                    "bytes": len(response.content),
+                    **timing_stats(samples),
+                }
+            )
+            self.stderr.write(f"views {name}: {results[-1]['median_ms']}ms, {query_count} queries")
+        return results
@@ -0,0 +1,123 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from admin_app.service.correlation import refresh_correlation_snapshot
+from admin_app.service.dashboard import refresh_indicator_snapshot
+from admin_app.service.price_history import store_prices
+from admin_app.service.watchlist import fetch_watchlist, get_watchlist, parse_watchlist
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Poll the price source, build candles and precompute dashboard indicators and correlations"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--coins",
+            help="Comma-separated CoinGecko coin ids (default: the watchlist setting)",
+        )
+        parser.add_argument("--currency", default=settings.INGEST_CURRENCY)
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=settings.INGEST_POLL_INTERVAL,
+            help="Seconds between ticks (default: INGEST_POLL_INTERVAL)",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=30,
+            help="History window used for the initial fetch and the indicators",
+        )
+        parser.add_argument("--once", action="store_true", help="Run a single tick and exit")
+
+    def handle(self, *args, **options):
+        currency = options["currency"]
+        interval = options["interval"]
+
+        if options["coins"]:
+            self.stdout.write(f"Ingesting {options['coins']} ({currency}) every {interval:g}s")
+        else:
+            self.stdout.write(f"Ingesting the watchlist ({currency}) every {interval:g}s")
+
+        try:
+            while True:
+                started = time.monotonic()
+                # Re-read the watchlist every tick so edits apply without a restart
+                try:
+                    coins = parse_watchlist(options["coins"]) if options["coins"] else get_watchlist()
+                    self.tick(coins, currency, options["days"])
+                except Exception:
+                    if options["once"]:
+                        raise
+                    # Keep polling; the next tick starts from what was stored
+                    logger.exception("Tick failed")
+                if options["once"]:
+                    break
+                time.sleep(max(0.0, interval - (time.monotonic() - started)))
+        except KeyboardInterrupt:
+            self.stdout.write("Stopped")
+
+    def tick(self, coins, currency, days):
+        fetch_started = time.monotonic()
+        results, errors = fetch_watchlist(coins, currency, initial_days=days)
+        fetch_ms = (time.monotonic() - fetch_started) * 1000
+
+        for coin, exc in errors.items():
+            logger.error("Fetching %s/%s failed: %s", coin, currency, exc)
+
+        for coin in coins:
+            if coin not in results:
+                continue
+            prices, last = results[coin]
+
+            # One coin failing (e.g. "database is locked") must not stop the
+            # worker or the other coins; the next tick refetches from the
+            # last stored sample.
+            try:
+                store_started = time.monotonic()
+                ingested = store_prices(coin, currency, prices, since=last)
+                store_ms = (time.monotonic() - store_started) * 1000
+
+                compute_started = time.monotonic()
+                refresh_indicator_snapshot(coin, currency, days)
+                compute_ms = (time.monotonic() - compute_started) * 1000
+            except Exception as exc:
+                logger.exception("Storing %s/%s failed", coin, currency)
+                errors[coin] = exc
+                continue
+
+            logger.info(
+                "%s/%s: ingested=%d store=%.1fms compute=%.1fms",
+                coin,
+                currency,
+                ingested,
+                store_ms,
+                compute_ms,
+            )
+
+        if results:
+            # One matrix over the whole watchlist, coins that failed this tick included
+            correlation_started = time.monotonic()
+            try:
+                refresh_correlation_snapshot(coins, currency)
+            except Exception:
+                logger.exception("Refreshing the %s correlation matrix failed", currency)
+            else:
+                logger.info(
+                    "Correlation: coins=%d compute=%.1fms",
+                    len(coins),
+                    (time.monotonic() - correlation_started) * 1000,
+                )
+
+        logger.info(
+            "Tick: coins=%d failed=%d fetch=%.1fms total=%.1fms",
+            len(coins),
+            len(errors),
+            fetch_ms,
+            (time.monotonic() - fetch_started) * 1000,
+        )
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from admin_app.service.counters import reconcile
+
+
+class Command(BaseCommand):
+    help = "Recount users, roles and audit logs and fix any drift in the dashboard counters"
+
+    def handle(self, *args, **options):
+        drift = reconcile()
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("Counters are in sync"))
+            return
+
+        for key, (stored, actual) in sorted(drift.items()):
+            self.stdout.write(f"{key}: {stored} -> {actual}")
+        self.stdout.write(self.style.WARNING(f"Fixed {len(drift)} counter(s)"))
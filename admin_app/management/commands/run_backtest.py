@@ -0,0 +1,62 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from admin_app.parameter.backtest import STRATEGIES
+from admin_app.parameter.resample import INTERVALS
+from admin_app.service.backtest import run_backtest
+
+
+class Command(BaseCommand):
+    help = "Sweep strategy parameters over stored candles and store PnL, drawdown and Sharpe"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--coin", default="bitcoin")
+        parser.add_argument("--currency", default=settings.INGEST_CURRENCY)
+        parser.add_argument("--interval", default="1d", choices=INTERVALS)
+        parser.add_argument(
+            "--strategy",
+            action="append",
+            choices=list(STRATEGIES),
+            help="Strategy to sweep, may be repeated (default: all)",
+        )
+        parser.add_argument(
+            "--source",
+            default="db",
+            choices=["db", "archive"],
+            help="Read candles from the database or the columnar archive (archive_prices)",
+        )
+        parser.add_argument("--fee", type=float, default=0.001, help="Cost per position change, as a fraction")
+        parser.add_argument("--workers", type=int, help="Worker processes (default: one per CPU)")
+        parser.add_argument("--top", type=int, default=5, help="Best combinations to print per strategy")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        results = run_backtest(
+            options["coin"],
+            options["currency"],
+            options["interval"],
+            strategies=options["strategy"],
+            fee=options["fee"],
+            workers=options["workers"],
+            source=options["source"],
+        )
+        if not results:
+            raise CommandError(
+                f"Not enough {options['interval']} candles for {options['coin']}/{options['currency']}; "
+                "run ingest_prices (or archive_prices for --source archive) first"
+            )
+
+        for name, rows in results.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{name} ({len(rows)} combinations)"))
+            for row in sorted(rows, key=lambda row: row["sharpe"], reverse=True)[: options["top"]]:
+                self.stdout.write(
+                    f"  sharpe={row['sharpe']:6.2f} return={row['total_return']:8.2%} "
+                    f"drawdown={row['max_drawdown']:7.2%} trades={row['trades']:4d} {row['params']}"
+                )
+
+        total = sum(len(rows) for rows in results.values())
+        self.stdout.write(
+            self.style.SUCCESS(f"Stored {total} results in {time.monotonic() - started:.2f}s")
+        )
@@ -0,0 +1,60 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .service import metrics
+
+
+class PerformanceMiddleware:
+    """
+    Record per-view latency, database time and query count, outbound HTTP
+    time and compute spans into admin_app.service.metrics, and expose the
+    breakdown of each response in a Server-Timing header when
+    METRICS_SERVER_TIMING is on.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        metrics.install_db_instrumentation()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        timings, token = metrics.start_request()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        return self.finish(request, response, timings, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        timings, token = metrics.start_request()
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        return self.finish(request, response, timings, time.perf_counter() - started)
+
+    def finish(self, request, response, timings, elapsed):
+        match = request.resolver_match
+        view = match.view_name if match else "unmatched"
+
+        metrics.REQUEST_DURATION.observe(elapsed, view, request.method)
+        metrics.REQUESTS.inc(view, request.method, str(response.status_code))
+        metrics.REQUEST_DB_DURATION.observe(timings.db_time, view)
+        metrics.REQUEST_DB_QUERIES.observe(timings.db_count, view)
+        metrics.REQUEST_HTTP_DURATION.observe(timings.http_time, view)
+
+        if settings.METRICS_SERVER_TIMING:
+            response["Server-Timing"] = timings.server_timing(elapsed)
+        return response
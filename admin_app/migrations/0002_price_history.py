@@ -0,0 +1,55 @@
+# Generated by Django 4.2.8 on 2026-10-16 22:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Candle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('coin', models.CharField(max_length=50)),
+                ('currency', models.CharField(max_length=10)),
+                ('interval', models.CharField(default='1d', max_length=10)),
+                ('timestamp', models.BigIntegerField(help_text='Bucket open time, epoch milliseconds')),
+                ('open', models.FloatField()),
+                ('high', models.FloatField()),
+                ('low', models.FloatField()),
+                ('close', models.FloatField()),
+            ],
+            options={
+                'verbose_name': 'Candle',
+                'verbose_name_plural': 'Candles',
+                'ordering': ['timestamp'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PriceSample',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('coin', models.CharField(max_length=50)),
+                ('currency', models.CharField(max_length=10)),
+                ('timestamp', models.BigIntegerField(help_text='Epoch milliseconds')),
+                ('price', models.FloatField()),
+            ],
+            options={
+                'verbose_name': 'Price Sample',
+                'verbose_name_plural': 'Price Samples',
+                'ordering': ['timestamp'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='pricesample',
+            constraint=models.UniqueConstraint(fields=('coin', 'currency', 'timestamp'), name='unique_price_sample'),
+        ),
+        migrations.AddConstraint(
+            model_name='candle',
+            constraint=models.UniqueConstraint(fields=('coin', 'currency', 'interval', 'timestamp'), name='unique_candle'),
+        ),
+    ]
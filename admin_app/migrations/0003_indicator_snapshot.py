@@ -0,0 +1,34 @@
+# Generated by Django 4.2.8 on 2026-10-16 22:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_app', '0002_price_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndicatorSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('coin', models.CharField(max_length=50)),
+                ('currency', models.CharField(max_length=10)),
+                ('interval', models.CharField(default='1d', max_length=10)),
+                ('analysis', models.JSONField(default=dict)),
+                ('atr', models.FloatField(default=0.0)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Indicator Snapshot',
+                'verbose_name_plural': 'Indicator Snapshots',
+                'ordering': ['-computed_at'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='indicatorsnapshot',
+            constraint=models.UniqueConstraint(fields=('coin', 'currency', 'interval'), name='unique_indicator_snapshot'),
+        ),
+    ]
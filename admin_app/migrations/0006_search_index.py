@@ -0,0 +1,91 @@
+from django.conf import settings
+from django.db import migrations
+from django.db.utils import OperationalError
+
+# SQLite FTS5 tables with the trigram tokenizer, so MATCH keeps the substring,
+# case-insensitive semantics of the icontains lookups they replace. Each is an
+# external-content table kept in sync with its source table by triggers.
+SEARCH_INDEXES = {
+    'auditlog': {
+        'table': 'admin_app_auditlog_fts',
+        'model': 'admin_app.AuditLog',
+        'columns': ['description', 'model_name'],
+    },
+    'user': {
+        'table': 'admin_app_user_fts',
+        'model': settings.AUTH_USER_MODEL,
+        'columns': ['username', 'first_name', 'last_name', 'email'],
+    },
+}
+
+
+def supports_fts5_trigram(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x, tokenize='trigram')")
+            cursor.execute('DROP TABLE temp.fts5_probe')
+    except OperationalError:
+        return False
+    return True
+
+
+def create_statements(table, source, columns):
+    cols = ', '.join(columns)
+    new_values = ', '.join(f'new.{col}' for col in columns)
+    old_values = ', '.join(f'old.{col}' for col in columns)
+    return [
+        f"CREATE VIRTUAL TABLE {table} USING fts5({cols}, content='{source}', content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER {table}_ai AFTER INSERT ON {source} BEGIN "
+        f"INSERT INTO {table}(rowid, {cols}) VALUES (new.id, {new_values}); END",
+        f"CREATE TRIGGER {table}_ad AFTER DELETE ON {source} BEGIN "
+        f"INSERT INTO {table}({table}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); END",
+        f"CREATE TRIGGER {table}_au AFTER UPDATE ON {source} BEGIN "
+        f"INSERT INTO {table}({table}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {table}(rowid, {cols}) VALUES (new.id, {new_values}); END",
+        f"INSERT INTO {table}({table}) VALUES ('rebuild')",
+    ]
+
+
+def drop_statements(table):
+    return [
+        f'DROP TRIGGER IF EXISTS {table}_ai',
+        f'DROP TRIGGER IF EXISTS {table}_ad',
+        f'DROP TRIGGER IF EXISTS {table}_au',
+        f'DROP TABLE IF EXISTS {table}',
+    ]
+
+
+def make_operations(model_name):
+    index = SEARCH_INDEXES[model_name]
+
+    def forwards(apps, schema_editor):
+        if not supports_fts5_trigram(schema_editor.connection):
+            return
+        source = apps.get_model(index['model'])._meta.db_table
+        for statement in create_statements(index['table'], source, index['columns']):
+            schema_editor.execute(statement, params=None)
+
+    def backwards(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in drop_statements(index['table']):
+            schema_editor.execute(statement, params=None)
+
+    return migrations.RunPython(forwards, backwards, hints={'model_name': model_name})
+
+
+class Migration(migrations.Migration):
+
+    # Run after the last auth migration: SQLite rebuilds a table on
+    # AlterField, which drops any triggers defined on it.
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('admin_app', '0005_auditlog_keyset_index'),
+    ]
+
+    operations = [
+        make_operations('auditlog'),
+        make_operations('user'),
+    ]
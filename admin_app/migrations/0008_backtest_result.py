@@ -0,0 +1,38 @@
+# Generated by Django 4.2.8 on 2026-10-16 22:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_app', '0007_stat_counter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BacktestResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('coin', models.CharField(max_length=50)),
+                ('currency', models.CharField(max_length=10)),
+                ('interval', models.CharField(default='1d', max_length=10)),
+                ('strategy', models.CharField(max_length=50)),
+                ('params', models.JSONField(default=dict)),
+                ('start', models.BigIntegerField(help_text='Epoch milliseconds of the first candle')),
+                ('end', models.BigIntegerField(help_text='Epoch milliseconds of the last candle')),
+                ('fee', models.FloatField(default=0.0)),
+                ('total_return', models.FloatField()),
+                ('max_drawdown', models.FloatField()),
+                ('sharpe', models.FloatField()),
+                ('trades', models.IntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Backtest Result',
+                'verbose_name_plural': 'Backtest Results',
+                'ordering': ['-sharpe'],
+                'indexes': [models.Index(fields=['coin', 'currency', 'interval', 'strategy', '-sharpe'], name='admin_app_b_coin_3d3b3e_idx')],
+            },
+        ),
+    ]
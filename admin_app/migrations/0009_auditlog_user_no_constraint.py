@@ -0,0 +1,44 @@
+from importlib import import_module
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+search_index = import_module('admin_app.migrations.0006_search_index')
+INDEX = search_index.SEARCH_INDEXES['auditlog']
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in search_index.drop_statements(INDEX['table']):
+        schema_editor.execute(statement, params=None)
+
+
+def create_index(apps, schema_editor):
+    if not search_index.supports_fts5_trigram(schema_editor.connection):
+        return
+    source = apps.get_model(INDEX['model'])._meta.db_table
+    for statement in search_index.create_statements(INDEX['table'], source, INDEX['columns']):
+        schema_editor.execute(statement, params=None)
+
+
+class Migration(migrations.Migration):
+    # AuditLog moves to the 'audit' database, where auth_user does not exist,
+    # so the foreign key loses its constraint. SQLite rebuilds the table for
+    # that, which drops the search index triggers; recreate them around it.
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('admin_app', '0008_backtest_result'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_index, create_index, hints={'model_name': 'auditlog'}),
+        migrations.AlterField(
+            model_name='auditlog',
+            name='user',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(create_index, drop_index, hints={'model_name': 'auditlog'}),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.8 on 2026-10-16 22:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_app', '0009_auditlog_user_no_constraint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndicatorState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('coin', models.CharField(max_length=50)),
+                ('currency', models.CharField(max_length=10)),
+                ('interval', models.CharField(default='1d', max_length=10)),
+                ('indicator', models.CharField(max_length=20)),
+                ('params', models.CharField(max_length=100)),
+                ('timestamp', models.BigIntegerField(help_text='Open time of the last candle folded into the state')),
+                ('state', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Indicator State',
+                'verbose_name_plural': 'Indicator States',
+                'ordering': ['coin', 'currency', 'interval', 'indicator', 'params'],
+            },
+        ),
+        migrations.CreateModel(
+            name='IndicatorValue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('coin', models.CharField(max_length=50)),
+                ('currency', models.CharField(max_length=10)),
+                ('interval', models.CharField(default='1d', max_length=10)),
+                ('indicator', models.CharField(max_length=20)),
+                ('params', models.CharField(help_text='Canonical parameters, e.g. period=14', max_length=100)),
+                ('timestamp', models.BigIntegerField(help_text='Candle open time, epoch milliseconds')),
+                ('value', models.FloatField()),
+            ],
+            options={
+                'verbose_name': 'Indicator Value',
+                'verbose_name_plural': 'Indicator Values',
+                'ordering': ['timestamp'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='indicatorvalue',
+            constraint=models.UniqueConstraint(fields=('coin', 'currency', 'interval', 'indicator', 'params', 'timestamp'), name='unique_indicator_value'),
+        ),
+        migrations.AddConstraint(
+            model_name='indicatorstate',
+            constraint=models.UniqueConstraint(fields=('coin', 'currency', 'interval', 'indicator', 'params'), name='unique_indicator_state'),
+        ),
+    ]
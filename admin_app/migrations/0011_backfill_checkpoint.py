@@ -0,0 +1,34 @@
+# Generated by Django 4.2.8 on 2026-10-16 22:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_app', '0010_indicator_series'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackfillCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('coin', models.CharField(max_length=50)),
+                ('currency', models.CharField(max_length=10)),
+                ('start', models.BigIntegerField(help_text='Chunk start, epoch milliseconds (inclusive)')),
+                ('end', models.BigIntegerField(help_text='Chunk end, epoch milliseconds (exclusive)')),
+                ('samples', models.IntegerField(default=0)),
+                ('completed_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Backfill Checkpoint',
+                'verbose_name_plural': 'Backfill Checkpoints',
+                'ordering': ['coin', 'currency', 'start'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='backfillcheckpoint',
+            constraint=models.UniqueConstraint(fields=('coin', 'currency', 'start', 'end'), name='unique_backfill_checkpoint'),
+        ),
+    ]
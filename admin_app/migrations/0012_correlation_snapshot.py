@@ -0,0 +1,36 @@
+# Generated by Django 4.2.8 on 2026-10-16 23:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_app', '0011_backfill_checkpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CorrelationSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('currency', models.CharField(max_length=10)),
+                ('interval', models.CharField(default='1d', max_length=10)),
+                ('window', models.IntegerField(help_text='Log returns per window')),
+                ('timestamp', models.BigIntegerField(help_text='Open time of the last candle in the window, epoch milliseconds')),
+                ('coins', models.JSONField(default=list)),
+                ('correlation', models.JSONField(default=list, help_text='Rows in coin order, null where a pair has too few common returns')),
+                ('volatility', models.JSONField(default=list, help_text='Annualized realized volatility per coin')),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Correlation Snapshot',
+                'verbose_name_plural': 'Correlation Snapshots',
+                'ordering': ['-computed_at'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='correlationsnapshot',
+            constraint=models.UniqueConstraint(fields=('currency', 'interval', 'window'), name='unique_correlation_snapshot'),
+        ),
+    ]
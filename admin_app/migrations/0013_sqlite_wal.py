@@ -0,0 +1,31 @@
+from django.db import migrations
+
+# WAL is stored in the database file itself, so it is switched on once here
+# rather than on every connection; see SQLITE_PRAGMAS for the rest. One
+# operation per database, each routed by a model that lives there.
+DATABASE_MODELS = ['systemsettings', 'auditlog', 'candle']
+
+
+def set_journal_mode(mode):
+    def apply(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA journal_mode = {mode}')
+
+    return apply
+
+
+class Migration(migrations.Migration):
+
+    # SQLite refuses to change the journal mode inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('admin_app', '0012_correlation_snapshot'),
+    ]
+
+    operations = [
+        migrations.RunPython(set_journal_mode('WAL'), set_journal_mode('DELETE'), hints={'model_name': name})
+        for name in DATABASE_MODELS
+    ]
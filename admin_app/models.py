@@ -42,14 +42,17 @@ class AuditLog(models.Model):
         ('view', 'View'),
     ]
     
-    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    # Stored in the audit database: no FK constraint, detached on user delete (signals.py)
+    user = models.ForeignKey(
+        User, on_delete=models.DO_NOTHING, null=True, blank=True, db_constraint=False
+    )
     action = models.CharField(max_length=20, choices=ACTION_CHOICES)
     model_name = models.CharField(max_length=100)
     object_id = models.IntegerField(null=True, blank=True)
     description = models.TextField()
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(blank=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(default=timezone.now)
     
     class Meta:
         verbose_name = 'Audit Log'
@@ -58,6 +61,7 @@ class AuditLog(models.Model):
         indexes = [
             models.Index(fields=['user', '-timestamp']),
             models.Index(fields=['action', '-timestamp']),
+            models.Index(fields=['-timestamp', '-id']),
         ]
     
     def __str__(self):
@@ -77,3 +81,202 @@ class SystemSettings(models.Model):
     
     def __str__(self):
         return self.key
+
+
+class PriceSample(models.Model):
+    """Model untuk menyimpan sampel harga mentah dari sumber data"""
+    coin = models.CharField(max_length=50)
+    currency = models.CharField(max_length=10)
+    timestamp = models.BigIntegerField(help_text='Epoch milliseconds')
+    price = models.FloatField()
+
+    class Meta:
+        verbose_name = 'Price Sample'
+        verbose_name_plural = 'Price Samples'
+        ordering = ['timestamp']
+        constraints = [
+            models.UniqueConstraint(fields=['coin', 'currency', 'timestamp'], name='unique_price_sample'),
+        ]
+
+    def __str__(self):
+        return f"{self.coin}/{self.currency} @ {self.timestamp}"
+
+
+class Candle(models.Model):
+    """Model untuk menyimpan data candlestick (OHLC) per interval"""
+    coin = models.CharField(max_length=50)
+    currency = models.CharField(max_length=10)
+    interval = models.CharField(max_length=10, default='1d')
+    timestamp = models.BigIntegerField(help_text='Bucket open time, epoch milliseconds')
+    open = models.FloatField()
+    high = models.FloatField()
+    low = models.FloatField()
+    close = models.FloatField()
+
+    class Meta:
+        verbose_name = 'Candle'
+        verbose_name_plural = 'Candles'
+        ordering = ['timestamp']
+        constraints = [
+            models.UniqueConstraint(fields=['coin', 'currency', 'interval', 'timestamp'], name='unique_candle'),
+        ]
+
+    def __str__(self):
+        return f"{self.coin}/{self.currency} {self.interval} @ {self.timestamp}"
+
+
+class IndicatorSnapshot(models.Model):
+    """Model untuk menyimpan hasil analisis indikator yang sudah dihitung"""
+    coin = models.CharField(max_length=50)
+    currency = models.CharField(max_length=10)
+    interval = models.CharField(max_length=10, default='1d')
+    analysis = models.JSONField(default=dict)
+    atr = models.FloatField(default=0.0)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Indicator Snapshot'
+        verbose_name_plural = 'Indicator Snapshots'
+        ordering = ['-computed_at']
+        constraints = [
+            models.UniqueConstraint(fields=['coin', 'currency', 'interval'], name='unique_indicator_snapshot'),
+        ]
+
+    def __str__(self):
+        return f"{self.coin}/{self.currency} {self.interval} @ {self.computed_at}"
+
+
+class IndicatorValue(models.Model):
+    """Model untuk menyimpan nilai indikator per candle (overlay chart)"""
+    coin = models.CharField(max_length=50)
+    currency = models.CharField(max_length=10)
+    interval = models.CharField(max_length=10, default='1d')
+    indicator = models.CharField(max_length=20)
+    params = models.CharField(max_length=100, help_text='Canonical parameters, e.g. period=14')
+    timestamp = models.BigIntegerField(help_text='Candle open time, epoch milliseconds')
+    value = models.FloatField()
+
+    class Meta:
+        verbose_name = 'Indicator Value'
+        verbose_name_plural = 'Indicator Values'
+        ordering = ['timestamp']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['coin', 'currency', 'interval', 'indicator', 'params', 'timestamp'],
+                name='unique_indicator_value',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.coin}/{self.currency} {self.interval} {self.indicator}({self.params}) @ {self.timestamp}"
+
+
+class IndicatorState(models.Model):
+    """Model untuk menyimpan state indikator streaming setelah candle tertutup terakhir"""
+    coin = models.CharField(max_length=50)
+    currency = models.CharField(max_length=10)
+    interval = models.CharField(max_length=10, default='1d')
+    indicator = models.CharField(max_length=20)
+    params = models.CharField(max_length=100)
+    timestamp = models.BigIntegerField(help_text='Open time of the last candle folded into the state')
+    state = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Indicator State'
+        verbose_name_plural = 'Indicator States'
+        ordering = ['coin', 'currency', 'interval', 'indicator', 'params']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['coin', 'currency', 'interval', 'indicator', 'params'],
+                name='unique_indicator_state',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.coin}/{self.currency} {self.interval} {self.indicator}({self.params}) @ {self.timestamp}"
+
+
+class BackfillCheckpoint(models.Model):
+    """Model untuk mencatat potongan riwayat harga yang sudah di-backfill"""
+    coin = models.CharField(max_length=50)
+    currency = models.CharField(max_length=10)
+    start = models.BigIntegerField(help_text='Chunk start, epoch milliseconds (inclusive)')
+    end = models.BigIntegerField(help_text='Chunk end, epoch milliseconds (exclusive)')
+    samples = models.IntegerField(default=0)
+    completed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Backfill Checkpoint'
+        verbose_name_plural = 'Backfill Checkpoints'
+        ordering = ['coin', 'currency', 'start']
+        constraints = [
+            models.UniqueConstraint(fields=['coin', 'currency', 'start', 'end'], name='unique_backfill_checkpoint'),
+        ]
+
+    def __str__(self):
+        return f"{self.coin}/{self.currency} {self.start}-{self.end}"
+
+
+class CorrelationSnapshot(models.Model):
+    """Model untuk menyimpan matriks korelasi dan volatilitas watchlist terbaru"""
+    currency = models.CharField(max_length=10)
+    interval = models.CharField(max_length=10, default='1d')
+    window = models.IntegerField(help_text='Log returns per window')
+    timestamp = models.BigIntegerField(help_text='Open time of the last candle in the window, epoch milliseconds')
+    coins = models.JSONField(default=list)
+    correlation = models.JSONField(default=list, help_text='Rows in coin order, null where a pair has too few common returns')
+    volatility = models.JSONField(default=list, help_text='Annualized realized volatility per coin')
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Correlation Snapshot'
+        verbose_name_plural = 'Correlation Snapshots'
+        ordering = ['-computed_at']
+        constraints = [
+            models.UniqueConstraint(fields=['currency', 'interval', 'window'], name='unique_correlation_snapshot'),
+        ]
+
+    def __str__(self):
+        return f"{len(self.coins)} coins/{self.currency} {self.interval} window={self.window} @ {self.computed_at}"
+
+
+class StatCounter(models.Model):
+    """Model untuk menyimpan counter statistik yang diperbarui secara incremental"""
+    key = models.CharField(max_length=100, primary_key=True)
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Stat Counter'
+        verbose_name_plural = 'Stat Counters'
+
+    def __str__(self):
+        return f"{self.key} = {self.value}"
+
+
+class BacktestResult(models.Model):
+    """Model untuk menyimpan hasil backtest per kombinasi parameter"""
+    coin = models.CharField(max_length=50)
+    currency = models.CharField(max_length=10)
+    interval = models.CharField(max_length=10, default='1d')
+    strategy = models.CharField(max_length=50)
+    params = models.JSONField(default=dict)
+    start = models.BigIntegerField(help_text='Epoch milliseconds of the first candle')
+    end = models.BigIntegerField(help_text='Epoch milliseconds of the last candle')
+    fee = models.FloatField(default=0.0)
+    total_return = models.FloatField()
+    max_drawdown = models.FloatField()
+    sharpe = models.FloatField()
+    trades = models.IntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Backtest Result'
+        verbose_name_plural = 'Backtest Results'
+        ordering = ['-sharpe']
+        indexes = [
+            models.Index(fields=['coin', 'currency', 'interval', 'strategy', '-sharpe']),
+        ]
+
+    def __str__(self):
+        return f"{self.coin}/{self.currency} {self.interval} {self.strategy} {self.params}"
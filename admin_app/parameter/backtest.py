@@ -0,0 +1,257 @@
+"""
+Vectorized backtests of simple long-only strategies and parameter sweeps.
+
+A strategy turns candle arrays into a position series (1 = long, 0 = flat)
+decided on each close; the position is held over the next bar, so no
+signal sees the price it trades on. Positions are evaluated as whole
+arrays, and a sweep evaluates chunks of parameter combinations as one 2-D
+block on a process pool, with every indicator computed once per worker.
+"""
+
+import itertools
+import math
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from admin_app.parameter.indicators import as_array, atr, rsi, sma
+
+
+class Series:
+    """Candle arrays plus memoized indicators shared by every combination."""
+
+    def __init__(self, high, low, close):
+        self.high = as_array(high)
+        self.low = as_array(low)
+        self.close = as_array(close)
+        self._memo = {}
+
+    def _cached(self, key, compute):
+        if key not in self._memo:
+            self._memo[key] = compute()
+        return self._memo[key]
+
+    def sma(self, period):
+        return self._cached(("sma", period), lambda: sma(self.close, period))
+
+    def rsi(self, period):
+        return self._cached(("rsi", period), lambda: rsi(self.close, period))
+
+    def atr(self, period):
+        return self._cached(("atr", period), lambda: atr(self.high, self.low, self.close, period))
+
+
+def forward_fill(values):
+    """Carry the last non-NaN value forward; leading NaNs stay NaN."""
+    index = np.where(np.isnan(values), -1, np.arange(values.shape[0]))
+    np.maximum.accumulate(index, out=index)
+    filled = values[np.maximum(index, 0)]
+    filled[index < 0] = np.nan
+    return filled
+
+
+def sma_crossover(series, fast, slow):
+    """Long while SMA(fast) is above SMA(slow)."""
+    return (series.sma(fast) > series.sma(slow)).astype(np.float64)
+
+
+def rsi_threshold(series, period, lower, upper):
+    """Go long when RSI drops below `lower`, go flat when it rises above `upper`."""
+    values = series.rsi(period)
+    signal = np.where(values < lower, 1.0, np.where(values > upper, 0.0, np.nan))
+    return np.nan_to_num(forward_fill(signal))
+
+
+def apply_atr_stop(positions, close, atr_values, multiple):
+    """
+    Exit a long position on the first close below its trailing stop, the
+    highest close - multiple * ATR since entry (excluding the current bar).
+    The position then stays flat until the next entry signal.
+    """
+    entries = np.diff(positions, prepend=0.0) > 0
+    trade = np.cumsum(entries)
+
+    level = close - multiple * atr_values
+    finite = np.isfinite(level)
+    if not finite.any():
+        return positions
+    # Bars without an ATR yet (warm-up) never raise the stop
+    level = np.where(finite, level, -np.inf)
+
+    # Running maximum per trade: offset each trade above all earlier ones so
+    # one cumulative maximum over the whole array never crosses trades.
+    offset = level[finite].max() - level[finite].min() + 1.0
+    running = np.maximum.accumulate(level + trade * offset) - trade * offset
+    # A trade with no finite level yet would inherit the shifted maximum of
+    # the trade before it; it has no stop.
+    seen = np.cumsum(finite)
+    seen_in_trade = seen - np.maximum.accumulate(np.where(entries, seen - finite, 0))
+    running = np.where(seen_in_trade > 0, running, -np.inf)
+
+    stop = np.empty_like(running)
+    stop[0] = -np.inf
+    stop[1:] = np.where(trade[1:] == trade[:-1], running[:-1], -np.inf)
+
+    hit = (positions > 0) & (close < stop)
+    hits = np.cumsum(hit)
+    before_trade = np.maximum.accumulate(np.where(entries, hits - hit, 0))
+    stopped = hits > before_trade
+    return np.where(stopped, 0.0, positions)
+
+
+def sma_crossover_atr_stop(series, fast, slow, atr_period, multiple):
+    """SMA crossover with an ATR trailing stop."""
+    positions = sma_crossover(series, fast, slow)
+    return apply_atr_stop(positions, series.close, series.atr(atr_period), multiple)
+
+
+def evaluate(close, positions, fee=0.0, periods_per_year=365.0):
+    """
+    Performance of one position series, or of each row of a 2-D block.
+
+    `fee` is charged as a fraction of equity on every change of position.
+    Returns a dict of arrays (or scalars for 1-D input): total_return and
+    max_drawdown as fractions, annualized sharpe and the number of trades.
+    """
+    close = as_array(close)
+    single = np.ndim(positions) == 1
+    positions = np.atleast_2d(positions)
+
+    returns = close[1:] / close[:-1] - 1.0
+    changes = np.diff(positions, axis=1, prepend=0.0)
+    strategy = positions[:, :-1] * returns - fee * np.abs(changes[:, :-1])
+
+    equity = np.cumprod(1.0 + strategy, axis=1)
+    peak = np.maximum(np.maximum.accumulate(equity, axis=1), 1.0)
+    max_drawdown = (1.0 - equity / peak).max(axis=1, initial=0.0)
+
+    mean = strategy.mean(axis=1)
+    std = strategy.std(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(std > 0, mean / std * math.sqrt(periods_per_year), 0.0)
+
+    result = {
+        "total_return": np.prod(1.0 + strategy, axis=1) - 1.0,
+        "max_drawdown": max_drawdown,
+        "sharpe": sharpe,
+        "trades": (changes > 0).sum(axis=1),
+    }
+    if single:
+        result = {key: value[0].item() for key, value in result.items()}
+    return result
+
+
+class Strategy:
+    """A position function with its default parameter grid."""
+
+    def __init__(self, name, positions, grid, valid=None):
+        self.name = name
+        self.positions = positions
+        self.grid = grid
+        self.valid = valid
+
+    def combinations(self, grid=None):
+        grid = grid or self.grid
+        names = list(grid)
+        combos = (dict(zip(names, values)) for values in itertools.product(*grid.values()))
+        if self.valid is None:
+            return list(combos)
+        return [params for params in combos if self.valid(params)]
+
+
+STRATEGIES = {
+    strategy.name: strategy
+    for strategy in (
+        Strategy(
+            "sma_crossover",
+            sma_crossover,
+            {"fast": list(range(2, 51)), "slow": list(range(5, 201, 5))},
+            valid=lambda p: p["fast"] < p["slow"],
+        ),
+        Strategy(
+            "rsi_threshold",
+            rsi_threshold,
+            {
+                "period": [7, 14, 21, 28],
+                "lower": list(range(10, 46, 5)),
+                "upper": list(range(55, 91, 5)),
+            },
+        ),
+        Strategy(
+            "sma_crossover_atr_stop",
+            sma_crossover_atr_stop,
+            {
+                "fast": [5, 7, 10, 14, 20],
+                "slow": [20, 30, 50, 100, 200],
+                "atr_period": [7, 14, 21],
+                "multiple": [1.5, 2.0, 2.5, 3.0, 4.0],
+            },
+            valid=lambda p: p["fast"] < p["slow"],
+        ),
+    )
+}
+
+# Per-process state for sweep workers, set once by _init_worker.
+_worker = {}
+
+
+def _init_worker(high, low, close, fee, periods_per_year):
+    _worker["series"] = Series(high, low, close)
+    _worker["fee"] = fee
+    _worker["periods_per_year"] = periods_per_year
+
+
+def _run_chunk(task):
+    name, combos = task
+    series = _worker["series"]
+    strategy = STRATEGIES[name]
+    block = np.vstack([strategy.positions(series, **params) for params in combos])
+    metrics = evaluate(
+        series.close,
+        block,
+        fee=_worker["fee"],
+        periods_per_year=_worker["periods_per_year"],
+    )
+    return [
+        {
+            "strategy": name,
+            "params": params,
+            "total_return": float(metrics["total_return"][i]),
+            "max_drawdown": float(metrics["max_drawdown"][i]),
+            "sharpe": float(metrics["sharpe"][i]),
+            "trades": int(metrics["trades"][i]),
+        }
+        for i, params in enumerate(combos)
+    ]
+
+
+def sweep(
+    name,
+    high,
+    low,
+    close,
+    grid=None,
+    fee=0.001,
+    periods_per_year=365.0,
+    workers=None,
+    chunk_size=64,
+):
+    """
+    Backtest every parameter combination of strategy `name`.
+
+    Combinations are evaluated in chunks on a process pool (`workers`
+    processes, default one per CPU; 1 runs in-process). Returns one dict per
+    combination with strategy, params, total_return, max_drawdown, sharpe
+    and trades, in grid order.
+    """
+    combos = STRATEGIES[name].combinations(grid)
+    tasks = [(name, combos[i:i + chunk_size]) for i in range(0, len(combos), chunk_size)]
+    args = (as_array(high), as_array(low), as_array(close), fee, periods_per_year)
+
+    if workers == 1 or len(tasks) <= 1:
+        _init_worker(*args)
+        chunks = map(_run_chunk, tasks)
+        return [row for chunk in chunks for row in chunk]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=args) as pool:
+        return [row for chunk in pool.map(_run_chunk, tasks) for row in chunk]
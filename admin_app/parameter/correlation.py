@@ -0,0 +1,99 @@
+"""
+Cross-asset correlation and realized volatility.
+
+Close prices of N coins are aligned on a shared time grid as an (N, T)
+array, NaN where a coin has no candle. Statistics over a window of log
+returns are computed for every pair at once as matrix products of the
+(N, W) returns and their validity mask, so each pair uses the periods where
+both coins have a return (pairwise complete) and the cost is a handful of
+BLAS calls rather than N^2 Python iterations.
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from admin_app.parameter.resample import DAY_MS
+
+YEAR_MS = 365 * DAY_MS  # crypto trades every day of the year
+
+
+def align_closes(index, timestamps, closes, count):
+    """
+    Scatter (coin index, timestamp, close) triples onto the union of their
+    timestamps. Returns (grid, matrix) with `matrix` shaped (count, len(grid))
+    and NaN where a coin has no close.
+    """
+    grid, columns = np.unique(np.asarray(timestamps, dtype=np.int64), return_inverse=True)
+    matrix = np.full((count, grid.shape[0]), np.nan)
+    matrix[np.asarray(index, dtype=np.int64), columns] = closes
+    return grid, matrix
+
+
+def log_returns(closes):
+    """Log returns along the last axis; NaN wherever either close is missing."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.diff(np.log(closes), axis=-1)
+
+
+def window_statistics(returns, min_periods=2):
+    """
+    Pairwise-complete sample covariance and correlation of the returns in a
+    window. `returns` is shaped (..., N, W), with any leading batch axes.
+    Returns (count, covariance, correlation), each shaped (..., N, N); pairs
+    with fewer than `min_periods` common returns are NaN.
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    mask = np.isfinite(returns)
+    valid = mask.astype(np.float64)
+    # Centering on each coin's own mean keeps the one-pass sums accurate;
+    # covariance does not depend on the shift.
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(mask, returns, 0.0).sum(axis=-1, keepdims=True) / valid.sum(axis=-1, keepdims=True)
+    x = np.where(mask, returns - np.nan_to_num(mean), 0.0)
+
+    def pairs(a, b):
+        return a @ np.swapaxes(b, -1, -2)
+
+    count = pairs(valid, valid)
+    sum_x = pairs(x, valid)  # [i, j]: sum of x_i where x_j is also present
+    sum_xx = pairs(x * x, valid)
+    sum_xy = pairs(x, x)
+    sum_y = np.swapaxes(sum_x, -1, -2)
+    sum_yy = np.swapaxes(sum_xx, -1, -2)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        covariance = (sum_xy - sum_x * sum_y / count) / (count - 1)
+        var_x = (sum_xx - sum_x * sum_x / count) / (count - 1)
+        var_y = (sum_yy - sum_y * sum_y / count) / (count - 1)
+        correlation = np.clip(covariance / np.sqrt(var_x * var_y), -1.0, 1.0)
+
+    short = count < max(min_periods, 2)
+    covariance[short] = np.nan
+    correlation[short] = np.nan
+    return count, covariance, correlation
+
+
+def rolling_statistics(returns, window, step=1, min_periods=2):
+    """
+    window_statistics() over the trailing `window` returns ending at every
+    `step`-th period, counted back from the last one. `returns` is shaped
+    (N, T). Returns (ends, count, covariance, correlation) where `ends` holds
+    the index of each window's last return and the matrices are shaped
+    (len(ends), N, N); memory grows with len(ends) * N^2, so pick `step`
+    accordingly for large N.
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    periods = returns.shape[-1]
+    if periods < window:
+        empty = np.empty((0,) + returns.shape[:1] * 2)
+        return np.empty(0, dtype=np.int64), empty, empty.copy(), empty.copy()
+
+    starts = np.arange(periods - window, -1, -step)[::-1]
+    windows = np.swapaxes(sliding_window_view(returns, window, axis=-1)[:, starts], 0, 1)
+    return (starts + window - 1, *window_statistics(windows, min_periods))
+
+
+def realized_volatility(covariance, interval_ms):
+    """Annualized volatility of each coin from the diagonal of a covariance matrix."""
+    variance = np.diagonal(covariance, axis1=-2, axis2=-1)
+    return np.sqrt(variance * (YEAR_MS / interval_ms))
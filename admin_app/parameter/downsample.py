@@ -0,0 +1,96 @@
+"""
+Downsampling of long series for charts.
+
+Candles are merged into coarser candles (first open, highest high, lowest
+low, last close), so the envelope of the price action is kept exactly.
+Merge buckets are aligned on absolute time, which makes every level
+reproducible from the one below it and independent of the window shown.
+
+Line series use Largest-Triangle-Three-Buckets, which keeps the points that
+contribute most to the visual shape instead of averaging peaks away.
+"""
+
+import numpy as np
+
+OHLC = ("open", "high", "low", "close")
+
+
+def merge_ohlc(candles, span_ms):
+    """
+    Merge consecutive candles whose open times fall into the same `span_ms`
+    bucket (epoch aligned). `candles` is a dict of equal-length arrays
+    'timestamp', 'open', 'high', 'low', 'close'; each merged candle keeps the
+    open time of its first candle.
+    """
+    timestamps = np.asarray(candles["timestamp"], dtype=np.int64)
+    if timestamps.shape[0] == 0:
+        return {name: np.asarray(values)[:0] for name, values in candles.items()}
+
+    keys = timestamps // span_ms
+    starts = np.concatenate(([0], np.flatnonzero(keys[1:] != keys[:-1]) + 1))
+    ends = np.concatenate((starts[1:], [timestamps.shape[0]]))
+    return {
+        "timestamp": timestamps[starts],
+        "open": np.asarray(candles["open"])[starts],
+        "high": np.maximum.reduceat(np.asarray(candles["high"]), starts),
+        "low": np.minimum.reduceat(np.asarray(candles["low"]), starts),
+        "close": np.asarray(candles["close"])[ends - 1],
+    }
+
+
+def ohlc_levels(candles, interval_ms, min_points=100):
+    """
+    Candles at merge factors 1, 2, 4, ... as {factor: candles}, stopping at
+    the first level with at most `min_points` candles. Each level is merged
+    from the previous one, which gives the same result as merging the raw
+    candles because the buckets nest.
+    """
+    levels = {1: candles}
+    factor, level = 1, candles
+    while level["timestamp"].shape[0] > min_points:
+        factor *= 2
+        level = merge_ohlc(level, interval_ms * factor)
+        levels[factor] = level
+    return levels
+
+
+def lttb(x, y, threshold):
+    """
+    Indices of the `threshold` points of (x, y) kept by
+    Largest-Triangle-Three-Buckets; the first and last points are kept
+    (only the last one when `threshold` is 1). Returns every index when the
+    series is already small enough.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    count = x.shape[0]
+    if threshold >= count:
+        return np.arange(count)
+    if threshold <= 0:
+        return np.arange(0)
+    if threshold == 1:
+        return np.array([count - 1])
+    if threshold == 2:
+        return np.array([0, count - 1])
+
+    # threshold - 2 buckets over the interior points, each non-empty
+    edges = np.linspace(1, count - 1, threshold - 1).astype(np.int64)
+    sizes = np.diff(edges)
+    mean_x = np.add.reduceat(x[1:-1], edges[:-1] - 1) / sizes
+    mean_y = np.add.reduceat(y[1:-1], edges[:-1] - 1) / sizes
+    # Third vertex of each triangle: the next bucket's mean, then the last point
+    next_x = np.append(mean_x[1:], x[-1])
+    next_y = np.append(mean_y[1:], y[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, count - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        low, high = edges[bucket], edges[bucket + 1]
+        ax, ay = x[previous], y[previous]
+        area = np.abs(
+            (ax - next_x[bucket]) * (y[low:high] - ay) - (ax - x[low:high]) * (next_y[bucket] - ay)
+        )
+        previous = low + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return selected
@@ -0,0 +1,165 @@
+"""
+Vectorized technical indicators over contiguous float64 arrays.
+
+Every function returns a full series with the same length as its input.
+Positions that do not have enough history yet are NaN, so series can be
+aligned index-by-index with the candles they were computed from.
+"""
+
+import math
+
+import numpy as np
+
+# Largest exponent used when unrolling a smoothing recursion into one block.
+# a ** -_MAX_BLOCK_EXP stays far away from float64 overflow.
+_MAX_BLOCK_EXP = 500.0
+
+
+def as_array(values):
+    """Return `values` as a contiguous float64 array (no copy when already one)."""
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+def ohlc_arrays(candlestick_data):
+    """
+    Convert a list of {'o', 'h', 'l', 'c'} candle dicts into four
+    contiguous float64 arrays (open, high, low, close).
+    """
+    count = len(candlestick_data)
+    return tuple(
+        np.fromiter((candle[key] for candle in candlestick_data), dtype=np.float64, count=count)
+        for key in ("o", "h", "l", "c")
+    )
+
+
+def _smooth(values, alpha, start, seed):
+    """
+    Evaluate y[i] = (1 - alpha) * y[i - 1] + alpha * values[i] for i > start,
+    with y[start] = seed, in vectorized blocks.
+
+    Inside a block the recursion is unrolled to a cumulative sum scaled by
+    powers of (1 - alpha); the block length is capped so those powers never
+    overflow.
+    """
+    out = np.full(values.shape[0], np.nan)
+    if start >= values.shape[0]:
+        return out
+
+    out[start] = seed
+    decay = 1.0 - alpha
+    if decay == 0.0:
+        out[start + 1:] = values[start + 1:]
+        return out
+
+    block = max(1, int(_MAX_BLOCK_EXP / -math.log(decay)))
+    growth = decay ** -np.arange(1, block + 1, dtype=np.float64)
+
+    prev = seed
+    i = start + 1
+    while i < values.shape[0]:
+        chunk = values[i:i + block]
+        scale = growth[:chunk.shape[0]]
+        smoothed = (prev + alpha * np.cumsum(chunk * scale)) / scale
+        out[i:i + chunk.shape[0]] = smoothed
+        prev = smoothed[-1]
+        i += chunk.shape[0]
+    return out
+
+
+def sma(values, period):
+    """Simple moving average over a sliding window of `period` values."""
+    values = as_array(values)
+    out = np.full(values.shape[0], np.nan)
+    if period <= 0 or values.shape[0] < period:
+        return out
+
+    windows = np.lib.stride_tricks.sliding_window_view(values, period)
+    out[period - 1:] = windows.mean(axis=1)
+    return out
+
+
+def ema(values, period):
+    """Exponential moving average with alpha = 2 / (period + 1), seeded by the first SMA."""
+    values = as_array(values)
+    if period <= 0 or values.shape[0] < period:
+        return np.full(values.shape[0], np.nan)
+
+    seed = values[:period].mean()
+    return _smooth(values, 2.0 / (period + 1), period - 1, seed)
+
+
+def wilder(values, period):
+    """Wilder smoothing (alpha = 1 / period), seeded by the mean of the first `period` values."""
+    values = as_array(values)
+    if period <= 0 or values.shape[0] < period:
+        return np.full(values.shape[0], np.nan)
+
+    seed = values[:period].mean()
+    return _smooth(values, 1.0 / period, period - 1, seed)
+
+
+def true_range(high, low, close):
+    """
+    True range per candle. The first candle has no previous close, so its
+    true range is high - low.
+    """
+    high, low, close = as_array(high), as_array(low), as_array(close)
+    tr = high - low
+    if tr.shape[0] > 1:
+        prev_close = close[:-1]
+        tr[1:] = np.maximum.reduce(
+            [tr[1:], np.abs(high[1:] - prev_close), np.abs(low[1:] - prev_close)]
+        )
+    return tr
+
+
+def atr(high, low, close, period=14):
+    """Average true range with Wilder smoothing."""
+    return wilder(true_range(high, low, close), period)
+
+
+def rsi(close, period=14):
+    """
+    Wilder relative strength index. The first value is at index `period`,
+    since it needs `period` price changes.
+    """
+    close = as_array(close)
+    out = np.full(close.shape[0], np.nan)
+    if close.shape[0] <= period:
+        return out
+
+    change = np.diff(close)
+    avg_gain = wilder(np.clip(change, 0.0, None), period)
+    avg_loss = wilder(np.clip(-change, 0.0, None), period)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        value = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    value = np.where(avg_loss == 0.0, np.where(avg_gain == 0.0, 50.0, 100.0), value)
+    value[np.isnan(avg_gain)] = np.nan
+
+    out[1:] = value
+    return out
+
+
+def bollinger(close, period=20, num_std=2.0):
+    """Bollinger bands as (middle, upper, lower), using the population standard deviation."""
+    close = as_array(close)
+    middle = sma(close, period)
+    deviation = np.full(close.shape[0], np.nan)
+    if period > 0 and close.shape[0] >= period:
+        windows = np.lib.stride_tricks.sliding_window_view(close, period)
+        deviation[period - 1:] = windows.std(axis=1)
+    return middle, middle + num_std * deviation, middle - num_std * deviation
+
+
+def macd(close, fast=12, slow=26, signal=9):
+    """MACD as (macd line, signal line, histogram)."""
+    close = as_array(close)
+    line = ema(close, fast) - ema(close, slow)
+
+    signal_line = np.full(close.shape[0], np.nan)
+    valid = np.flatnonzero(~np.isnan(line))
+    if valid.shape[0]:
+        first = valid[0]
+        signal_line[first:] = ema(line[first:], signal)
+    return line, signal_line, line - signal_line
@@ -0,0 +1,150 @@
+"""
+OHLC resampling of (timestamp, price) samples into fixed-interval candles.
+
+Timestamps are epoch milliseconds. Buckets are computed with integer
+arithmetic on local time (UTC plus the zone offset at each sample), so daily
+and weekly candles start at local midnight / Monday even across DST changes.
+"""
+
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+MINUTE_MS = 60 * 1000
+HOUR_MS = 60 * MINUTE_MS
+DAY_MS = 24 * HOUR_MS
+WEEK_MS = 7 * DAY_MS
+
+INTERVALS = {
+    "1m": MINUTE_MS,
+    "5m": 5 * MINUTE_MS,
+    "15m": 15 * MINUTE_MS,
+    "1h": HOUR_MS,
+    "4h": 4 * HOUR_MS,
+    "1d": DAY_MS,
+    "1w": WEEK_MS,
+}
+
+# 1970-01-01 was a Thursday; weekly buckets are shifted to start on Monday.
+_WEEK_ORIGIN = -3 * DAY_MS
+
+
+def interval_ms(interval):
+    """Length of `interval` ('1m', '5m', '15m', '1h', '4h', '1d', '1w') in milliseconds."""
+    try:
+        return INTERVALS[interval]
+    except KeyError:
+        raise ValueError(f"Unsupported interval {interval!r}, expected one of {', '.join(INTERVALS)}")
+
+
+def _zone(tz):
+    if tz is None:
+        return timezone.utc
+    if isinstance(tz, str):
+        return ZoneInfo(tz)
+    return tz
+
+
+def _offsets_at(timestamps, tz):
+    return np.array(
+        [datetime.fromtimestamp(ts / 1000, tz).utcoffset().total_seconds() * 1000 for ts in timestamps.tolist()],
+        dtype=np.int64,
+    )
+
+
+def utc_offsets(timestamps, tz=None):
+    """
+    UTC offset in milliseconds at each timestamp.
+
+    The zone is only consulted once per distinct UTC day; days that contain
+    a transition are resolved per minute.
+    """
+    tz = _zone(tz)
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    if tz is timezone.utc or timestamps.shape[0] == 0:
+        return np.zeros(timestamps.shape[0], dtype=np.int64)
+
+    days = timestamps // DAY_MS
+    unique_days, inverse = np.unique(days, return_inverse=True)
+    at_start = _offsets_at(unique_days * DAY_MS, tz)
+    at_end = _offsets_at((unique_days + 1) * DAY_MS, tz)
+    offsets = at_start[inverse]
+
+    changing = unique_days[at_start != at_end]
+    if changing.shape[0]:
+        mask = np.isin(days, changing)
+        minutes, minute_inverse = np.unique(timestamps[mask] // MINUTE_MS, return_inverse=True)
+        offsets[mask] = _offsets_at(minutes * MINUTE_MS, tz)[minute_inverse]
+    return offsets
+
+
+def bucket_start(timestamp, interval, tz=None):
+    """Open time (epoch ms) of the `interval` bucket containing `timestamp`."""
+    return int(resample_ohlc([timestamp], [0.0], interval, tz)["timestamp"][0])
+
+
+def _origin(interval):
+    return _WEEK_ORIGIN if interval == "1w" else 0
+
+
+def _bucket_keys(local, interval):
+    return (local - _origin(interval)) // interval_ms(interval)
+
+
+def resample_ohlc(timestamps, prices, interval, tz=None, volumes=None):
+    """
+    Aggregate price samples into OHLC candles.
+
+    Args:
+        timestamps: epoch milliseconds, any order.
+        prices: price per sample.
+        interval: one of INTERVALS.
+        tz: zone name or tzinfo used to align buckets (default UTC).
+        volumes: optional per-sample volume, summed per bucket.
+
+    Returns:
+        dict of equal-length arrays 'timestamp' (bucket open time, epoch ms),
+        'open', 'high', 'low', 'close' and, when volumes are given, 'volume'.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    prices = np.asarray(prices, dtype=np.float64)
+    if volumes is not None:
+        volumes = np.asarray(volumes, dtype=np.float64)
+
+    if timestamps.shape[0] == 0:
+        empty = {key: np.empty(0) for key in ("open", "high", "low", "close")}
+        empty["timestamp"] = np.empty(0, dtype=np.int64)
+        if volumes is not None:
+            empty["volume"] = np.empty(0)
+        return empty
+
+    if timestamps.shape[0] > 1 and np.any(timestamps[1:] < timestamps[:-1]):
+        order = np.argsort(timestamps, kind="stable")
+        timestamps, prices = timestamps[order], prices[order]
+        if volumes is not None:
+            volumes = volumes[order]
+
+    offsets = utc_offsets(timestamps, tz)
+    keys = _bucket_keys(timestamps + offsets, interval)
+
+    starts = np.concatenate(([0], np.flatnonzero(keys[1:] != keys[:-1]) + 1))
+    ends = np.concatenate((starts[1:], [timestamps.shape[0]]))
+
+    # Local open time of each bucket, mapped back to UTC. The first guess uses
+    # the offset of the bucket's first sample; re-reading the offset at that
+    # guess fixes buckets whose open time lies on the other side of a DST change.
+    local_open = keys[starts] * interval_ms(interval) + _origin(interval)
+    opens = local_open - offsets[starts]
+    opens = local_open - utc_offsets(opens, tz)
+
+    candles = {
+        "timestamp": opens,
+        "open": prices[starts],
+        "high": np.maximum.reduceat(prices, starts),
+        "low": np.minimum.reduceat(prices, starts),
+        "close": prices[ends - 1],
+    }
+    if volumes is not None:
+        candles["volume"] = np.add.reduceat(volumes, starts)
+    return candles
@@ -0,0 +1,206 @@
+"""
+Stateful indicators that consume one value or candle at a time.
+
+Each update costs O(1) regardless of how much history has been seen, and
+the produced values follow the same definitions (seeding and smoothing) as
+the full series in admin_app.parameter.indicators, so a stream can pick up
+where a vectorized backfill stopped. They agree to float tolerance, not
+bit for bit: the vectorized versions sum in a different order. State
+round-trips through to_state()/load_state() as a small JSON-serializable
+dict.
+"""
+
+import math
+from collections import deque
+
+
+class StreamingIndicator:
+    """Base class handling state serialization for the streaming indicators."""
+
+    _fields = ()
+    _registry = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        StreamingIndicator._registry[cls.__name__] = cls
+
+    def to_state(self):
+        state = {"type": type(self).__name__}
+        for name in self._fields:
+            state[name] = getattr(self, name)
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        indicator = cls.__new__(cls)
+        for name in cls._fields:
+            setattr(indicator, name, state[name])
+        return indicator
+
+
+def load_state(state):
+    """Rebuild any streaming indicator from the dict returned by its to_state()."""
+    return StreamingIndicator._registry[state["type"]].from_state(state)
+
+
+class RollingSMA(StreamingIndicator):
+    """Simple moving average over the last `period` values."""
+
+    _fields = ("period", "window", "total", "since_resync")
+
+    def __init__(self, period):
+        self.period = period
+        self.window = deque(maxlen=period)
+        self.total = 0.0
+        self.since_resync = 0
+
+    @classmethod
+    def from_state(cls, state):
+        indicator = super().from_state(state)
+        indicator.window = deque(indicator.window, maxlen=indicator.period)
+        return indicator
+
+    def to_state(self):
+        state = super().to_state()
+        state["window"] = list(self.window)
+        return state
+
+    @property
+    def value(self):
+        if len(self.window) < self.period:
+            return None
+        return self.total / self.period
+
+    def update(self, value):
+        if len(self.window) == self.period:
+            self.total -= self.window[0]
+        self.window.append(value)
+        self.total += value
+
+        # Re-sum exactly once per full window so the running total cannot
+        # drift; amortized this is still O(1) per update.
+        self.since_resync += 1
+        if self.since_resync >= self.period:
+            self.total = math.fsum(self.window)
+            self.since_resync = 0
+
+        return self.value
+
+
+class _Smoothed(StreamingIndicator):
+    """
+    y = (1 - alpha) * y_prev + alpha * x, seeded with the mean of the first
+    `period` inputs; subclasses pick alpha from the period.
+    """
+
+    _fields = ("period", "alpha", "count", "seed_total", "current")
+
+    def __init__(self, period, alpha):
+        self.period = period
+        self.alpha = alpha
+        self.count = 0
+        self.seed_total = 0.0
+        self.current = None
+
+    @property
+    def value(self):
+        return self.current
+
+    def update(self, value):
+        self.count += 1
+        if self.current is None:
+            self.seed_total += value
+            if self.count == self.period:
+                self.current = self.seed_total / self.period
+        else:
+            self.current = (1.0 - self.alpha) * self.current + self.alpha * value
+        return self.current
+
+
+class EMA(_Smoothed):
+    """Exponential moving average with alpha = 2 / (period + 1)."""
+
+    def __init__(self, period):
+        super().__init__(period, 2.0 / (period + 1))
+
+
+class WilderAverage(_Smoothed):
+    """Wilder smoothing with alpha = 1 / period."""
+
+    def __init__(self, period):
+        super().__init__(period, 1.0 / period)
+
+
+class WilderRSI(StreamingIndicator):
+    """Wilder relative strength index fed with closing prices."""
+
+    _fields = ("period", "prev_close", "gain", "loss")
+
+    def __init__(self, period=14):
+        self.period = period
+        self.prev_close = None
+        self.gain = WilderAverage(period)
+        self.loss = WilderAverage(period)
+
+    def to_state(self):
+        state = super().to_state()
+        state["gain"] = self.gain.to_state()
+        state["loss"] = self.loss.to_state()
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        indicator = super().from_state(state)
+        indicator.gain = load_state(state["gain"])
+        indicator.loss = load_state(state["loss"])
+        return indicator
+
+    @property
+    def value(self):
+        avg_gain, avg_loss = self.gain.value, self.loss.value
+        if avg_gain is None:
+            return None
+        if avg_loss == 0.0:
+            return 50.0 if avg_gain == 0.0 else 100.0
+        return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+    def update(self, close):
+        if self.prev_close is not None:
+            change = close - self.prev_close
+            self.gain.update(max(change, 0.0))
+            self.loss.update(max(-change, 0.0))
+        self.prev_close = close
+        return self.value
+
+
+class WilderATR(StreamingIndicator):
+    """Average true range fed with (high, low, close) candles."""
+
+    _fields = ("period", "prev_close", "average")
+
+    def __init__(self, period=14):
+        self.period = period
+        self.prev_close = None
+        self.average = WilderAverage(period)
+
+    def to_state(self):
+        state = super().to_state()
+        state["average"] = self.average.to_state()
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        indicator = super().from_state(state)
+        indicator.average = load_state(state["average"])
+        return indicator
+
+    @property
+    def value(self):
+        return self.average.value
+
+    def update(self, high, low, close):
+        tr = high - low
+        if self.prev_close is not None:
+            tr = max(tr, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+        return self.average.update(tr)
@@ -0,0 +1,36 @@
+from django.conf import settings
+
+
+class AppDatabaseRouter:
+    """
+    Route admin_app models to the database named in DATABASE_APPS_MAPPING
+    (audit logs and market data get their own SQLite files) and everything
+    else to 'default'.
+
+    AuditLog.user points across databases; it is declared without a
+    database constraint and always loaded with a separate query.
+    """
+
+    def db_for_model(self, model):
+        if model._meta.app_label != "admin_app":
+            return "default"
+        alias = settings.DATABASE_APPS_MAPPING.get(model._meta.model_name, "default")
+        return alias if alias in settings.DATABASES else "default"
+
+    def db_for_read(self, model, **hints):
+        return self.db_for_model(model)
+
+    def db_for_write(self, model, **hints):
+        return self.db_for_model(model)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Cross-database references are plain ids (db_constraint=False)
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if app_label != "admin_app" or model_name is None:
+            return db == "default"
+        alias = settings.DATABASE_APPS_MAPPING.get(model_name, "default")
+        if alias not in settings.DATABASES:
+            alias = "default"
+        return db == alias
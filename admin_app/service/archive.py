@@ -0,0 +1,362 @@
+"""
+Append-only columnar candle archive, read through memory maps.
+
+Each (coin, currency, interval) series is a directory with one raw
+little-endian file per column (int64 timestamps, float64 open/high/low/close)
+and a meta.json holding the committed row count. An append writes the new
+rows past the committed end of every column file, fsyncs them and then
+atomically replaces meta.json, so a crash mid-append leaves at most some
+uncommitted bytes behind; readers never look past the committed count, the
+next append overwrites them and repair() truncates them.
+
+Appends and repairs hold an exclusive flock on the series' lock file, so
+writers in different processes take turns and always start from the
+committed count on disk. Reads take no lock.
+
+Reads binary-search the timestamp column and return views into the maps,
+so the vectorized code in admin_app.parameter works on the archive without
+copying it into memory.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking
+    fcntl = None
+
+import numpy as np
+from django.conf import settings
+
+from admin_app.models import Candle
+from admin_app.parameter.resample import bucket_start, resample_ohlc
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+COLUMNS = {
+    "timestamp": np.dtype("<i8"),
+    "open": np.dtype("<f8"),
+    "high": np.dtype("<f8"),
+    "low": np.dtype("<f8"),
+    "close": np.dtype("<f8"),
+}
+META_FILE = "meta.json"
+LOCK_FILE = "lock"
+IMPORT_BATCH = 100_000
+
+_NAME = re.compile(r"^[a-z0-9][a-z0-9_-]*$")
+
+
+class ArchiveError(Exception):
+    pass
+
+
+class ArchiveCorrupted(ArchiveError):
+    """Committed rows are missing from a column file."""
+
+
+def _fsync_dir(path):
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:  # directories cannot be opened on Windows
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class ColumnArchive:
+    """One series on disk. Read-only unless opened with writable=True."""
+
+    def __init__(self, path, writable=False):
+        self.path = Path(path)
+        self.writable = writable
+        self.count = 0
+        self._maps = None
+        self._meta_mtime = None
+        self._lock = threading.Lock()
+        if writable:
+            self.path.mkdir(parents=True, exist_ok=True)
+            for name in COLUMNS:
+                self._column_path(name).touch(exist_ok=True)
+        self._load(strict=not writable)
+
+    def _column_path(self, name):
+        return self.path / f"{name}.bin"
+
+    def _read_meta(self):
+        meta_path = self.path / META_FILE
+        try:
+            stat = meta_path.stat()
+            meta = json.loads(meta_path.read_text())
+        except FileNotFoundError:
+            return {"version": FORMAT_VERSION, "count": 0}, None
+        if meta.get("version") != FORMAT_VERSION:
+            raise ArchiveError(f"{self.path}: unsupported archive version {meta.get('version')!r}")
+        if meta.get("columns", list(COLUMNS)) != list(COLUMNS):
+            raise ArchiveError(f"{self.path}: unexpected columns {meta.get('columns')!r}")
+        return meta, stat.st_mtime_ns
+
+    def _write_meta(self, count):
+        meta_path = self.path / META_FILE
+        tmp_path = self.path / f"{META_FILE}.tmp"
+        with open(tmp_path, "w") as handle:
+            json.dump({"version": FORMAT_VERSION, "columns": list(COLUMNS), "count": count}, handle)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_path, meta_path)
+        _fsync_dir(self.path)
+        self._meta_mtime = meta_path.stat().st_mtime_ns
+
+    @contextmanager
+    def _write_lock(self):
+        """Exclusive lock on the series, held across processes."""
+        with open(self.path / LOCK_FILE, "a+b") as handle:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+    def _stored_rows(self, name):
+        try:
+            return self._column_path(name).stat().st_size // COLUMNS[name].itemsize
+        except FileNotFoundError:
+            return 0
+
+    def _load(self, strict=True):
+        meta, mtime = self._read_meta()
+        count = int(meta["count"])
+        complete = min(self._stored_rows(name) for name in COLUMNS)
+        if complete < count:
+            message = f"{self.path}: {count} rows committed but only {complete} stored"
+            if strict:
+                raise ArchiveCorrupted(message)
+            # Let a writer open the series to repair() it; appends still refuse
+            logger.warning("%s, run archive_prices --repair", message)
+            count = complete
+        self.count = count
+        self._meta_mtime = mtime
+        self._maps = None
+
+    def _last_stored_timestamp(self):
+        if not self.count:
+            return None
+        with open(self._column_path("timestamp"), "rb") as handle:
+            handle.seek((self.count - 1) * COLUMNS["timestamp"].itemsize)
+            return int(np.frombuffer(handle.read(COLUMNS["timestamp"].itemsize), dtype=COLUMNS["timestamp"])[0])
+
+    def refresh(self):
+        """Pick up rows appended by another process since the last read."""
+        with self._lock:
+            try:
+                mtime = (self.path / META_FILE).stat().st_mtime_ns
+            except FileNotFoundError:
+                mtime = None
+            if mtime != self._meta_mtime:
+                self._load()
+
+    def columns(self):
+        """Every committed row as {column: memory-mapped array}."""
+        with self._lock:
+            if self._maps is None:
+                self._maps = {
+                    name: (
+                        np.memmap(self._column_path(name), dtype=dtype, mode="r", shape=(self.count,))
+                        if self.count
+                        else np.empty(0, dtype=dtype)
+                    )
+                    for name, dtype in COLUMNS.items()
+                }
+            return self._maps
+
+    def last_timestamp(self):
+        timestamps = self.columns()["timestamp"]
+        return int(timestamps[-1]) if timestamps.shape[0] else None
+
+    def read(self, start=None, end=None):
+        """
+        Rows with start <= timestamp < end (epoch ms) as {column: array view}.
+        The views stay valid after later appends.
+        """
+        columns = self.columns()
+        timestamps = columns["timestamp"]
+        first = 0 if start is None else int(np.searchsorted(timestamps, start, side="left"))
+        last = timestamps.shape[0] if end is None else int(np.searchsorted(timestamps, end, side="left"))
+        return {name: values[first:last] for name, values in columns.items()}
+
+    def append(self, rows):
+        """
+        Append {column: values} rows newer than the last stored timestamp;
+        older rows are skipped, so re-importing a range is harmless.
+        Returns the number of rows added.
+        """
+        if not self.writable:
+            raise ArchiveError(f"{self.path} is opened read-only")
+        timestamps = np.asarray(rows["timestamp"], dtype=COLUMNS["timestamp"])
+        if timestamps.shape[0] > 1 and np.any(timestamps[1:] <= timestamps[:-1]):
+            raise ArchiveError("timestamps must be strictly increasing")
+
+        with self._lock, self._write_lock():
+            # Another process may have appended since this one last looked
+            self._load()
+            last = self._last_stored_timestamp()
+            first = 0 if last is None else int(np.searchsorted(timestamps, last, side="right"))
+            rows = {name: np.asarray(rows[name], dtype=dtype)[first:] for name, dtype in COLUMNS.items()}
+            added = rows["timestamp"].shape[0]
+            if not added:
+                return 0
+
+            for name, dtype in COLUMNS.items():
+                with open(self._column_path(name), "r+b") as handle:
+                    handle.seek(self.count * dtype.itemsize)
+                    handle.write(rows[name].tobytes())
+                    handle.truncate()
+                    handle.flush()
+                    os.fsync(handle.fileno())
+            self._write_meta(self.count + added)
+            self.count += added
+            self._maps = None
+        return added
+
+    def repair(self):
+        """
+        Roll the committed count back to the rows every column holds and
+        truncate the uncommitted bytes of interrupted appends. Returns what
+        was changed, as a list of messages.
+        """
+        if not self.writable:
+            raise ArchiveError(f"{self.path} is opened read-only")
+        changes = []
+        with self._lock, self._write_lock():
+            meta, _ = self._read_meta()
+            count = int(meta["count"])
+            complete = min(self._stored_rows(name) for name in COLUMNS)
+            if complete < count:
+                # Data that did not reach the disk before the metadata did
+                changes.append(f"rolled back from {count} to {complete} complete rows")
+                count = complete
+                self._write_meta(count)
+            for name, dtype in COLUMNS.items():
+                column_path = self._column_path(name)
+                size = column_path.stat().st_size if column_path.exists() else 0
+                if size != count * dtype.itemsize:
+                    if size > count * dtype.itemsize:
+                        changes.append(f"truncated {size - count * dtype.itemsize} uncommitted bytes of {name}")
+                    with open(column_path, "ab") as handle:
+                        handle.truncate(count * dtype.itemsize)
+            self._load()
+        for change in changes:
+            logger.warning("%s: %s", self.path, change)
+        return changes
+
+    def verify(self):
+        """Problems found in the committed rows, as a list of messages."""
+        columns = self.columns()
+        problems = []
+        timestamps = columns["timestamp"]
+        if timestamps.shape[0] > 1:
+            unordered = np.flatnonzero(timestamps[1:] <= timestamps[:-1])
+            if unordered.shape[0]:
+                problems.append(f"{unordered.shape[0]} timestamps not increasing, first at row {unordered[0] + 1}")
+        for name in ("open", "high", "low", "close"):
+            bad = np.count_nonzero(~np.isfinite(columns[name]))
+            if bad:
+                problems.append(f"{bad} non-finite {name} values")
+        inverted = np.count_nonzero(columns["high"] < columns["low"])
+        if inverted:
+            problems.append(f"{inverted} rows with high < low")
+        return problems
+
+
+def series_path(coin, currency, interval):
+    for part in (coin, currency, interval):
+        if not _NAME.match(part):
+            raise ValueError(f"Invalid archive series name {part!r}")
+    return Path(settings.ARCHIVE_ROOT) / coin / currency / interval
+
+
+_readers = {}
+_readers_lock = threading.Lock()
+
+
+def open_archive(coin, currency, interval, writable=False):
+    """
+    The archive of one series. Read-only archives are shared per process
+    and refreshed on every call; writable ones are opened fresh.
+    """
+    path = series_path(coin, currency, interval)
+    if writable:
+        return ColumnArchive(path, writable=True)
+    with _readers_lock:
+        archive = _readers.get(path)
+        if archive is None:
+            archive = _readers[path] = ColumnArchive(path)
+    archive.refresh()
+    return archive
+
+
+def read_ohlc(coin, currency, interval, start=None, end=None):
+    """Archived candles of one series as {column: array view}, oldest first."""
+    return open_archive(coin, currency, interval).read(start, end)
+
+
+def import_from_db(coin, currency, interval):
+    """
+    Append the stored candles that are newer than the archive and already
+    closed. Returns the rows added.
+    """
+    archive = open_archive(coin, currency, interval, writable=True)
+    # The newest candle is rewritten by every ingest tick until it closes.
+    open_bucket = bucket_start(int(time.time() * 1000), interval, settings.CANDLE_TIME_ZONE)
+    added = 0
+    while True:
+        candles = Candle.objects.filter(
+            coin=coin, currency=currency, interval=interval, timestamp__lt=open_bucket
+        )
+        last = archive.last_timestamp()
+        if last is not None:
+            candles = candles.filter(timestamp__gt=last)
+        rows = list(
+            candles.order_by("timestamp").values_list("timestamp", "open", "high", "low", "close")[
+                :IMPORT_BATCH
+            ]
+        )
+        if not rows:
+            return added
+        data = np.array(rows, dtype=np.float64)
+        added += archive.append({name: data[:, index] for index, name in enumerate(COLUMNS)})
+
+
+def import_market_chart(coin, currency, interval, market_data):
+    """
+    Resample the 'prices' of a CoinGecko market_chart response into candles
+    and append them. The first and last buckets may be incomplete: the last
+    is always left out, the first unless the samples start within one
+    sample spacing of its open. Returns the rows added.
+    """
+    prices = np.asarray(market_data.get("prices", []), dtype=np.float64).reshape(-1, 2)
+    timestamps = prices[:, 0].astype(np.int64)
+    ohlc = resample_ohlc(timestamps, prices[:, 1], interval, settings.CANDLE_TIME_ZONE)
+    buckets = ohlc["timestamp"].shape[0]
+
+    first = 0
+    if buckets:
+        spacing = np.median(np.diff(timestamps)) if timestamps.shape[0] > 1 else None
+        if spacing is None or timestamps.min() - ohlc["timestamp"][0] >= spacing:
+            # Archived rows are never rewritten, so a partial candle would stay wrong
+            first = 1
+    complete = slice(first, max(first, buckets - 1))
+    archive = open_archive(coin, currency, interval, writable=True)
+    return archive.append({name: ohlc[name][complete] for name in COLUMNS})
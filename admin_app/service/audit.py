@@ -0,0 +1,111 @@
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+
+from admin_app.models import AuditLog
+from admin_app.service.counters import record_audit_logs
+
+logger = logging.getLogger(__name__)
+
+
+class AuditBuffer:
+    """
+    In-memory queue of unsaved AuditLog rows written with bulk_create.
+
+    A background thread flushes when `max_size` entries are waiting or every
+    `flush_interval` seconds, whichever comes first; adding an entry never
+    touches the database. Pending entries are flushed at interpreter exit.
+    """
+
+    def __init__(self, max_size=100, flush_interval=2.0, max_pending=10000):
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        self._pending = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def add(self, entry):
+        with self._lock:
+            self._pending.append(entry)
+            size = len(self._pending)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="audit-buffer", daemon=True)
+                self._thread.start()
+        if size >= self.max_size:
+            self._wake.set()
+
+    def flush(self):
+        """Write every pending entry; returns the number written."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+
+            try:
+                AuditLog.objects.bulk_create(batch, batch_size=500)
+            except Exception:
+                logger.exception("Writing %d audit log entries failed, will retry", len(batch))
+                with self._lock:
+                    self._pending = batch + self._pending
+                    overflow = len(self._pending) - self.max_pending
+                    if overflow > 0:
+                        logger.error("Dropping %d oldest audit log entries", overflow)
+                        del self._pending[:overflow]
+                return 0
+
+            record_audit_logs(batch)
+            return len(batch)
+
+    def close(self):
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Audit log flush failed")
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    """Process-wide audit buffer built from settings."""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = AuditBuffer(
+                    max_size=settings.AUDIT_BUFFER_SIZE,
+                    flush_interval=settings.AUDIT_FLUSH_INTERVAL,
+                )
+                atexit.register(_buffer.close)
+    return _buffer
+
+
+def write_audit(entry, sync=False):
+    """
+    Queue an unsaved AuditLog for a batched write, or save it right away
+    when `sync` is true or AUDIT_BUFFERED is off.
+    """
+    if sync or not settings.AUDIT_BUFFERED:
+        entry.save()
+        record_audit_logs([entry])
+    else:
+        get_buffer().add(entry)
@@ -0,0 +1,159 @@
+"""
+Resumable historical backfill from the CoinGecko range endpoint.
+
+A date range is split into chunks aligned on multiples of the chunk length,
+so runs over different ranges share one chunk grid. Chunks are fetched on a
+bounded thread pool. Each chunk's samples and its BackfillCheckpoint row are
+written in one transaction and samples are inserted with ignore_conflicts,
+so a chunk is either recorded with all of its samples or fetched again by
+the next run. Candles and indicator series are rebuilt once at the end.
+"""
+
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.db import connections, router, transaction
+
+from admin_app.models import BackfillCheckpoint, PriceSample
+from admin_app.service.indicator_series import backfill_indicators
+from admin_app.service.price_history import rebuild_candles
+
+logger = logging.getLogger(__name__)
+
+
+def plan_chunks(start, end, chunk_ms):
+    """[start, end) chunks (epoch ms) of length `chunk_ms` covering start..end."""
+    first = start - start % chunk_ms
+    return [(chunk, chunk + chunk_ms) for chunk in range(first, end, chunk_ms)]
+
+
+def pending_chunks(coin, currency, chunks):
+    """The chunks without a checkpoint."""
+    if not chunks:
+        return []
+    done = set(
+        BackfillCheckpoint.objects.filter(
+            coin=coin, currency=currency, start__gte=chunks[0][0], start__lte=chunks[-1][0]
+        ).values_list("start", "end")
+    )
+    return [chunk for chunk in chunks if chunk not in done]
+
+
+def store_chunk(coin, currency, start, end, prices, complete):
+    """
+    Insert the samples of one chunk, skipping ones already stored, and
+    checkpoint it when `complete` (its end is in the past). Returns the
+    number of samples in the chunk.
+    """
+    samples = [
+        PriceSample(coin=coin, currency=currency, timestamp=int(timestamp), price=price)
+        for timestamp, price in prices
+        if start <= timestamp < end
+    ]
+    with transaction.atomic(using=router.db_for_write(PriceSample)):
+        PriceSample.objects.bulk_create(samples, batch_size=1000, ignore_conflicts=True)
+        if complete:
+            BackfillCheckpoint.objects.get_or_create(
+                coin=coin, currency=currency, start=start, end=end, defaults={"samples": len(samples)}
+            )
+    return len(samples)
+
+
+class BackfillReport:
+    """Counts and timings of one backfill run."""
+
+    def __init__(self, planned, pending):
+        self.planned = planned
+        self.pending = pending
+        self.chunks = 0
+        self.failed = 0
+        self.samples = 0
+        self.fetch_time = 0.0
+        self.store_time = 0.0
+        self.rebuild_time = 0.0
+        self.started = time.monotonic()
+        self.finished = None
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.monotonic()) - self.started
+
+    def summary(self):
+        elapsed = max(self.elapsed, 1e-9)
+        chunks = max(self.chunks, 1)
+        return (
+            f"chunks={self.chunks}/{self.pending} pending ({self.planned - self.pending} already done) "
+            f"failed={self.failed} samples={self.samples} elapsed={elapsed:.1f}s "
+            f"throughput={self.samples / elapsed:.0f} samples/s {self.chunks / elapsed * 60:.1f} chunks/min "
+            f"fetch={self.fetch_time / chunks * 1000:.0f}ms/chunk store={self.store_time / chunks * 1000:.0f}ms/chunk "
+            f"rebuild={self.rebuild_time:.1f}s"
+        )
+
+
+def backfill(coin, currency, start, end, client, chunk_ms, workers=4, rebuild=True, progress=None):
+    """
+    Fetch and store the history of coin/currency between `start` and `end`
+    (epoch ms) in chunks, `workers` at a time, skipping checkpointed chunks.
+    `progress(report, chunk, samples)` is called after every stored chunk.
+    Returns a BackfillReport.
+    """
+    now = int(time.time() * 1000)
+    end = min(end, now)
+    planned = plan_chunks(start, end, chunk_ms)
+    chunks = pending_chunks(coin, currency, planned)
+    report = BackfillReport(len(planned), len(chunks))
+
+    def run(chunk):
+        chunk_start, chunk_end = chunk
+        try:
+            fetch_started = time.monotonic()
+            data = client.market_chart_range(coin, currency, chunk_start, min(chunk_end, now))
+            store_started = time.monotonic()
+            samples = store_chunk(
+                coin, currency, chunk_start, chunk_end, data.get("prices", []), complete=chunk_end <= now
+            )
+            return samples, store_started - fetch_started, time.monotonic() - store_started
+        finally:
+            connections.close_all()
+
+    # Only a few chunks are queued ahead of the workers, so an interrupted
+    # run stops promptly and leaves the rest for the next one.
+    remaining = iter(chunks)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="backfill") as pool:
+        in_flight = {}
+        for chunk in remaining:
+            in_flight[pool.submit(run, chunk)] = chunk
+            if len(in_flight) >= workers * 2:
+                break
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk = in_flight.pop(future)
+                try:
+                    samples, fetch_time, store_time = future.result()
+                except Exception as exc:
+                    report.failed += 1
+                    logger.error("Backfill of %s/%s chunk %s failed: %s", coin, currency, chunk, exc)
+                else:
+                    report.chunks += 1
+                    report.samples += samples
+                    report.fetch_time += fetch_time
+                    report.store_time += store_time
+                    if progress is not None:
+                        progress(report, chunk, samples)
+                next_chunk = next(remaining, None)
+                if next_chunk is not None:
+                    in_flight[pool.submit(run, next_chunk)] = next_chunk
+
+    if rebuild and planned:
+        # Idempotent, so a run killed before this point is completed by the next one
+        rebuild_started = time.monotonic()
+        rebuild_candles(coin, currency, planned[0][0])
+        for interval in settings.CANDLE_INTERVALS:
+            backfill_indicators(coin, currency, interval)
+        report.rebuild_time = time.monotonic() - rebuild_started
+
+    report.finished = time.monotonic()
+    return report
@@ -0,0 +1,64 @@
+import numpy as np
+from django.db import router, transaction
+
+from admin_app.models import BacktestResult
+from admin_app.parameter.backtest import STRATEGIES, sweep
+from admin_app.parameter.resample import DAY_MS, interval_ms
+from admin_app.service.archive import read_ohlc
+from admin_app.service.price_history import read_candles
+
+
+def load_series(coin, currency, interval, start=None, end=None, source="db"):
+    """Candle columns (timestamp, high, low, close) from the database or the archive."""
+    if source == "archive":
+        columns = read_ohlc(coin, currency, interval, start, end)
+        return columns["timestamp"], columns["high"], columns["low"], columns["close"]
+
+    rows = list(read_candles(coin, currency, interval, start=start, end=end))
+    data = np.array(rows, dtype=np.float64).reshape(-1, 5)
+    return data[:, 0], data[:, 2], data[:, 3], data[:, 4]
+
+
+def run_backtest(
+    coin, currency, interval, strategies=None, start=None, end=None, fee=0.001, workers=None, source="db"
+):
+    """
+    Sweep the default grid of each strategy over the stored candles (or the
+    archived ones, with source="archive") and replace the stored results of
+    those strategies for this series.
+
+    Returns {strategy: results} with the rows as produced by sweep().
+    """
+    timestamps, high, low, close = load_series(coin, currency, interval, start, end, source)
+    if timestamps.shape[0] < 2:
+        return {}
+
+    periods_per_year = 365 * DAY_MS / interval_ms(interval)
+
+    results = {}
+    for name in strategies or STRATEGIES:
+        results[name] = sweep(
+            name, high, low, close, fee=fee, periods_per_year=periods_per_year, workers=workers
+        )
+
+    with transaction.atomic(using=router.db_for_write(BacktestResult)):
+        BacktestResult.objects.filter(
+            coin=coin, currency=currency, interval=interval, strategy__in=list(results)
+        ).delete()
+        BacktestResult.objects.bulk_create(
+            [
+                BacktestResult(
+                    coin=coin,
+                    currency=currency,
+                    interval=interval,
+                    start=int(timestamps[0]),
+                    end=int(timestamps[-1]),
+                    fee=fee,
+                    **row,
+                )
+                for rows in results.values()
+                for row in rows
+            ],
+            batch_size=500,
+        )
+    return results
@@ -0,0 +1,306 @@
+import asyncio
+import itertools
+import json
+import logging
+import queue
+import threading
+
+from django.conf import settings
+from django.db import connections
+
+from admin_app.models import Candle
+from admin_app.parameter.streaming import RollingSMA, WilderATR, WilderRSI, load_state
+
+logger = logging.getLogger(__name__)
+
+# Closed candles fed to the streaming indicators before the first event.
+WARMUP_CANDLES = 250
+
+# Queue marker telling a subscriber it missed events and must reload.
+RESYNC = object()
+
+
+def _indicators():
+    return {
+        "sma_7": RollingSMA(7),
+        "sma_14": RollingSMA(14),
+        "rsi_14": WilderRSI(14),
+        "atr_14": WilderATR(14),
+    }
+
+
+def _feed(indicators, candle):
+    _, _, high, low, close = candle
+    for indicator in indicators.values():
+        if isinstance(indicator, WilderATR):
+            indicator.update(high, low, close)
+        else:
+            indicator.update(close)
+
+
+def _round(value):
+    return None if value is None else round(value, 2)
+
+
+class Subscription:
+    """One client's view of a topic: a bounded queue of encoded events."""
+
+    def __init__(self, topic, max_size):
+        self.topic = topic
+        self.queue = queue.Queue(maxsize=max_size)
+        self._loop = None
+        self._ready = None
+
+    def push(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            # A slow client: drop its backlog and have it reload instead of
+            # applying a series with holes.
+            while True:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            self.queue.put_nowait(RESYNC)
+        if self._loop is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._ready.set)
+            except RuntimeError:
+                pass  # the client's event loop is gone; close() follows
+
+    def get(self, timeout=None):
+        return self.queue.get(timeout=timeout)
+
+    def bind(self, loop):
+        """Wake `loop` on every push so aget() can wait without a thread."""
+        self._ready = asyncio.Event()
+        self._loop = loop
+
+    async def aget(self, timeout=None):
+        """get() for async consumers; raises queue.Empty after `timeout` seconds."""
+        deadline = None if timeout is None else self._loop.time() + timeout
+        while True:
+            # Clear before checking, so a push in between still wakes us
+            self._ready.clear()
+            try:
+                return self.queue.get_nowait()
+            except queue.Empty:
+                pass
+            remaining = None if deadline is None else deadline - self._loop.time()
+            if remaining is not None and remaining <= 0:
+                raise queue.Empty
+            try:
+                await asyncio.wait_for(self._ready.wait(), remaining)
+            except asyncio.TimeoutError:
+                raise queue.Empty
+
+    def close(self):
+        self.topic.unsubscribe(self)
+
+
+class Topic:
+    """
+    A single poll loop for one (coin, currency, interval) candle series.
+
+    The loop reads the candles written by `manage.py ingest_prices`, keeps
+    the streaming indicators up to date and pushes every changed candle to
+    all subscribers as one pre-encoded event, so the cost per poll does not
+    depend on the number of open dashboards. The thread exits when the last
+    subscriber leaves.
+    """
+
+    def __init__(self, broadcaster, key, poll_interval, queue_size):
+        self.broadcaster = broadcaster
+        self.key = key
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+
+        self.subscribers = set()
+        self._ids = itertools.count(1)
+        self._stopped = threading.Event()
+        self._thread = None
+
+        self._indicators = None  # state up to and including the last closed candle
+        self._open = None  # newest candle, still being updated by the ingester
+
+    def subscribe(self):
+        subscription = Subscription(self, self.queue_size)
+        self.subscribers.add(subscription)
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name=f"stream-{'-'.join(self.key)}", daemon=True
+            )
+            self._thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.broadcaster.lock:
+            self.subscribers.discard(subscription)
+            if not self.subscribers:
+                self._stopped.set()
+                self.broadcaster.topics.pop(self.key, None)
+
+    def _run(self):
+        try:
+            while not self._stopped.is_set():
+                try:
+                    event = self.poll()
+                except Exception:
+                    logger.exception("Polling %s failed", "/".join(self.key))
+                    event = None
+                if event is not None:
+                    with self.broadcaster.lock:
+                        subscribers = list(self.subscribers)
+                    for subscription in subscribers:
+                        subscription.push(event)
+                self._stopped.wait(self.poll_interval)
+        finally:
+            connections.close_all()
+
+    def _candles(self):
+        coin, currency, interval = self.key
+        return Candle.objects.filter(coin=coin, currency=currency, interval=interval)
+
+    def _warm_up(self):
+        rows = list(
+            self._candles()
+            .order_by("-timestamp")
+            .values_list("timestamp", "open", "high", "low", "close")[:WARMUP_CANDLES]
+        )
+        rows.reverse()
+        self._indicators = _indicators()
+        for candle in rows[:-1]:
+            _feed(self._indicators, candle)
+        self._open = rows[-1] if rows else None
+
+    def poll(self):
+        """
+        Read candles changed since the last poll and return them as an
+        encoded SSE event, or None when nothing changed.
+        """
+        if self._indicators is None:
+            self._warm_up()
+            return None
+
+        rows = self._candles().order_by("timestamp").values_list(
+            "timestamp", "open", "high", "low", "close"
+        )
+        if self._open is not None:
+            rows = rows.filter(timestamp__gte=self._open[0])
+        rows = list(rows)
+        if not rows or rows == [self._open]:
+            return None
+
+        changed = {"t": [], "o": [], "h": [], "l": [], "c": []}
+        overlays = {name: [] for name in self._indicators}
+        for position, candle in enumerate(rows):
+            if position < len(rows) - 1:
+                # Every candle but the newest is closed: commit it to the state.
+                _feed(self._indicators, candle)
+                values = {name: ind.value for name, ind in self._indicators.items()}
+            else:
+                # The newest candle may still change; evaluate it on a copy.
+                scratch = {
+                    name: load_state(ind.to_state())
+                    for name, ind in self._indicators.items()
+                }
+                _feed(scratch, candle)
+                values = {name: ind.value for name, ind in scratch.items()}
+
+            for column, value in zip("tohlc", candle):
+                changed[column].append(value)
+            for name, value in values.items():
+                overlays[name].append(_round(value))
+
+        self._open = rows[-1]
+        changed["overlays"] = overlays
+        return f"id: {next(self._ids)}\nevent: candles\ndata: {json.dumps(changed)}\n\n"
+
+
+class Broadcaster:
+    """Registry of live topics, created on first subscribe."""
+
+    def __init__(self, poll_interval=2.0, queue_size=100):
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self.topics = {}
+        self.lock = threading.Lock()
+
+    def subscribe(self, coin, currency, interval):
+        key = (coin, currency, interval)
+        with self.lock:
+            topic = self.topics.get(key)
+            if topic is None:
+                topic = self.topics[key] = Topic(
+                    self, key, self.poll_interval, self.queue_size
+                )
+            return topic.subscribe()
+
+
+_broadcaster = None
+_broadcaster_lock = threading.Lock()
+
+
+def get_broadcaster():
+    """Process-wide broadcaster built from settings."""
+    global _broadcaster
+    if _broadcaster is None:
+        with _broadcaster_lock:
+            if _broadcaster is None:
+                _broadcaster = Broadcaster(
+                    poll_interval=settings.STREAM_POLL_INTERVAL,
+                    queue_size=settings.STREAM_QUEUE_SIZE,
+                )
+    return _broadcaster
+
+
+def event_stream(subscription, heartbeat=None):
+    """
+    SSE body for one subscriber: shared events as they arrive, a comment
+    line every `heartbeat` seconds to keep proxies from closing the
+    connection, and a `resync` event when the client fell behind.
+
+    Blocks a thread for the whole connection; under ASGI use
+    async_event_stream().
+    """
+    heartbeat = heartbeat or settings.STREAM_HEARTBEAT
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                event = subscription.get(timeout=heartbeat)
+            except queue.Empty:
+                yield ": keepalive\n\n"
+                continue
+            if event is RESYNC:
+                yield "event: resync\ndata: {}\n\n"
+            else:
+                yield event
+    finally:
+        subscription.close()
+
+
+async def async_event_stream(subscription, heartbeat=None):
+    """
+    event_stream() for ASGI: waits on the event loop instead of holding a
+    thread per client. Django 4.2 does not notice disconnects by itself;
+    admin_app.handlers.DisconnectAwareASGIHandler cancels the response,
+    which closes the subscription here.
+    """
+    heartbeat = heartbeat or settings.STREAM_HEARTBEAT
+    subscription.bind(asyncio.get_running_loop())
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                event = await subscription.aget(timeout=heartbeat)
+            except queue.Empty:
+                yield ": keepalive\n\n"
+                continue
+            if event is RESYNC:
+                yield "event: resync\ndata: {}\n\n"
+            else:
+                yield event
+    finally:
+        subscription.close()
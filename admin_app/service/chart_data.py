@@ -0,0 +1,259 @@
+import hashlib
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from admin_app.models import Candle
+from admin_app.parameter.downsample import lttb, merge_ohlc, ohlc_levels
+from admin_app.parameter.resample import DAY_MS, INTERVALS, interval_ms
+from admin_app.service.counters import history_key, read_counters
+from admin_app.service.indicator_series import COLUMNS, INDICATORS, OVERLAYS, read_overlays
+from admin_app.service.metrics import span
+from admin_app.service.price_history import day_start, read_candles
+
+RANGES = {"7d": 7, "30d": 30, "90d": 90, "1y": 365, "all": None}
+
+
+def parse_range(value, default="30d"):
+    """
+    Number of days for a `range` query value ('7d', '30d', '90d', '1y',
+    'all' or a bare number of days); None means the whole history.
+    """
+    value = (value or default).lower()
+    if value in RANGES:
+        return RANGES[value]
+    try:
+        days = int(value.rstrip("d"))
+    except ValueError:
+        raise ValueError("range must be 7d, 30d, 90d, 1y, all or a number of days") from None
+    if days <= 0:
+        raise ValueError("range must be positive")
+    if days > settings.CHART_MAX_RANGE_DAYS:
+        # Also keeps the window start inside what datetime can represent
+        raise ValueError(f"range must be at most {settings.CHART_MAX_RANGE_DAYS} days; use range=all")
+    return days
+
+
+def parse_interval(value, default="1d"):
+    value = value or default
+    if value not in INTERVALS:
+        raise ValueError(f"interval must be one of {', '.join(INTERVALS)}")
+    return value
+
+
+def parse_width(value):
+    """
+    Chart width in pixels from a `width` query value, capped at
+    CHART_MAX_POINTS; None when absent.
+    """
+    if not value:
+        return None
+    try:
+        width = int(value)
+    except ValueError:
+        raise ValueError("width must be a number of pixels") from None
+    if width <= 0:
+        raise ValueError("width must be positive")
+    return min(width, settings.CHART_MAX_POINTS)
+
+
+def range_start(days):
+    if days is None:
+        return None
+    return day_start(int(time.time() * 1000) - days * DAY_MS)
+
+
+def series_state(coin, currency, interval):
+    """
+    (newest, closed, history) for a series: its newest candle row, which the
+    ingester may still be updating, the closed candle before it (None when
+    there is only one) and the number of rewrites of older history (see
+    counters.bump_history). None when the series is empty.
+    """
+    rows = list(
+        Candle.objects.filter(coin=coin, currency=currency, interval=interval)
+        .order_by("-timestamp")
+        .values_list("timestamp", "open", "high", "low", "close")[:2]
+    )
+    if not rows:
+        return None
+    key = history_key(coin, currency, interval)
+    return rows[0], rows[1] if len(rows) > 1 else None, read_counters([key])[key]
+
+
+def _digest(*parts):
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def series_etag(coin, currency, interval, days, width):
+    """
+    Validator for a chart response: changes when a candle is added or the
+    latest one is updated, when older candles or indicator values are
+    rewritten (the history counter), or with the window start and width.
+    """
+    state = series_state(coin, currency, interval)
+    if state is None:
+        return None
+    newest, _, history = state
+    return _digest(coin, currency, interval, newest, history, range_start(days), width)
+
+
+def _column(values, decimals=2):
+    """Rounded list with NaN replaced by None, for JSON."""
+    rounded = np.round(values, decimals)
+    return [None if v != v else v for v in rounded.tolist()]
+
+
+def _read_columns(coin, currency, interval, end=None):
+    rows = list(read_candles(coin, currency, interval, end=end))
+    data = np.array(rows, dtype=np.float64).reshape(-1, 5)
+    columns = dict(zip(COLUMNS, data.T))
+    columns["timestamp"] = columns["timestamp"].astype(np.int64)
+    return columns
+
+
+def chart_levels(coin, currency, interval, newest, closed, history):
+    """
+    The closed candles (everything before `newest`, the open time of the
+    newest candle) at every merge level, plus the overlays aligned to them,
+    built in one pass and cached until another candle closes or older
+    history is rewritten. The open candle is added per request.
+    """
+    key = f"chart-levels:{coin}:{currency}:{interval}:{_digest(closed)}:{history}"
+    levels = cache.get(key)
+    if levels is None:
+        with span("levels"):
+            candles = _read_columns(coin, currency, interval, end=newest)
+            overlays = read_overlays(coin, currency, interval, candles["timestamp"])
+            for overlay, (name, params) in OVERLAYS.items():
+                if overlay not in overlays:
+                    overlays[overlay] = _overlay_series(name, params, candles)
+            levels = {
+                "candles": ohlc_levels(candles, interval_ms(interval), settings.CHART_MIN_POINTS),
+                "overlays": overlays,
+            }
+        cache.set(key, levels, settings.CHART_CACHE_TIMEOUT)
+    return levels
+
+
+def _overlay_series(name, params, candles):
+    # Series that were never materialized (see indicator_series) are computed here.
+    if not candles["timestamp"].shape[0]:
+        return np.empty(0)
+    return INDICATORS[name].series(candles, params)
+
+
+def _open_overlays(coin, currency, interval, candles, candle):
+    """Overlay values at the open `candle`, which follows the closed `candles`."""
+    values = read_overlays(coin, currency, interval, [candle[0]])
+    missing = [overlay for overlay in OVERLAYS if overlay not in values]
+    if missing:
+        columns = {
+            name: np.append(candles[name], value) for name, value in zip(COLUMNS, candle)
+        }
+        for overlay in missing:
+            name, params = OVERLAYS[overlay]
+            values[overlay] = _overlay_series(name, params, columns)[-1:]
+    return {overlay: float(value[0]) for overlay, value in values.items()}
+
+
+def _same_bucket(level, timestamp, span_ms):
+    timestamps = level["timestamp"]
+    return timestamps.shape[0] > 0 and timestamps[-1] // span_ms == timestamp // span_ms
+
+
+def _window_size(level, first, candle, span_ms, start):
+    """Candles from `first` on once the open `candle` is merged in."""
+    size = level["timestamp"].shape[0] - first
+    if _same_bucket(level, candle[0], span_ms) or (start is not None and candle[0] < start):
+        return size
+    return size + 1
+
+
+def _with_open_candle(level, candle, span_ms):
+    """`level` with the open `candle` merged into its last bucket or appended."""
+    timestamp, open_, high, low, close = candle
+    if _same_bucket(level, timestamp, span_ms):
+        level = {name: values.copy() for name, values in level.items()}
+        level["high"][-1] = max(level["high"][-1], high)
+        level["low"][-1] = min(level["low"][-1], low)
+        level["close"][-1] = close
+        return level
+    return {name: np.append(level[name], value) for name, value in zip(COLUMNS, candle)}
+
+
+def downsampled_series(coin, currency, interval, days, width):
+    """
+    Candles in columnar form (parallel arrays t/o/h/l/c), at most `width` of
+    them: the finest merge level that fits is served, and each overlay is
+    reduced with LTTB to the same number of points as {t, v} pairs.
+    Responses are cached per series version, window start and level.
+    """
+    start = range_start(days)
+    payload = {
+        "coin": coin,
+        "currency": currency,
+        "interval": interval,
+        "width": width,
+        "factor": 1,
+        "t": [],
+        "o": [],
+        "h": [],
+        "l": [],
+        "c": [],
+        "overlays": {overlay: {"t": [], "v": []} for overlay in OVERLAYS},
+    }
+    state = series_state(coin, currency, interval)
+    if state is None:
+        return payload
+    newest, closed, history = state
+
+    levels = chart_levels(coin, currency, interval, newest[0], closed, history)
+    length = interval_ms(interval)
+    for factor, level in sorted(levels["candles"].items()):
+        first = 0 if start is None else int(np.searchsorted(level["timestamp"], start))
+        if _window_size(level, first, newest, length * factor, start) <= width:
+            break
+    else:
+        # Narrower than the coarsest cached level (CHART_MIN_POINTS candles):
+        # keep merging it, which is cheap at that size. Once the bucket spans
+        # the whole history a single candle is left, so this ends.
+        while _window_size(level, first, newest, length * factor, start) > width:
+            factor *= 2
+            level = merge_ohlc(level, length * factor)
+            first = 0 if start is None else int(np.searchsorted(level["timestamp"], start))
+
+    key = f"chart-series:{coin}:{currency}:{interval}:{_digest(newest, closed, history)}:{start}:{factor}"
+    cached = cache.get(key)
+    if cached is not None:
+        return dict(cached, width=width)
+
+    with span("downsample"):
+        if start is None or newest[0] >= start:
+            level = _with_open_candle(level, newest, length * factor)
+        payload["factor"] = factor
+        payload["t"] = level["timestamp"][first:].tolist()
+        for column in ("open", "high", "low", "close"):
+            payload[column[0]] = _column(level[column][first:])
+
+        raw = levels["candles"][1]
+        raw_first = 0 if start is None else int(np.searchsorted(raw["timestamp"], start))
+        points = level["timestamp"].shape[0] - first
+        latest = _open_overlays(coin, currency, interval, raw, newest)
+        for overlay, values in levels["overlays"].items():
+            timestamps, values = raw["timestamp"][raw_first:], values[raw_first:]
+            if start is None or newest[0] >= start:
+                timestamps = np.append(timestamps, newest[0])
+                values = np.append(values, latest[overlay])
+            finite = np.isfinite(values)
+            timestamps, values = timestamps[finite], values[finite]
+            keep = lttb(timestamps, values, points)
+            payload["overlays"][overlay] = {
+                "t": timestamps[keep].tolist(),
+                "v": _column(values[keep]),
+            }
+
+    cache.set(key, payload, settings.CHART_CACHE_TIMEOUT)
+    return payload
@@ -0,0 +1,177 @@
+"""
+Correlation and realized-volatility matrix of the watchlist.
+
+The closes of every coin are read in one query, aligned on a shared grid and
+reduced to the trailing window's correlation matrix and annualized
+volatilities by admin_app.parameter.correlation. ingest_prices refreshes the
+snapshot once per tick; the dashboard reads it through the cache, keyed by
+the snapshot time so a refresh shows up on the next request.
+"""
+
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from admin_app.models import Candle, CorrelationSnapshot
+from admin_app.parameter.correlation import (
+    align_closes,
+    log_returns,
+    realized_volatility,
+    window_statistics,
+)
+from admin_app.parameter.resample import interval_ms
+
+# Bootstrap's success and danger colours, for positive and negative cells
+_POSITIVE = "25, 135, 84"
+_NEGATIVE = "220, 53, 69"
+
+
+def read_closes(coins, currency, interval, start, end):
+    """
+    Closes of `coins` with open times in [start, end] (epoch ms), aligned as
+    (grid, closes) with closes shaped (len(coins), len(grid)).
+    """
+    rows = list(
+        Candle.objects.filter(
+            coin__in=coins,
+            currency=currency,
+            interval=interval,
+            timestamp__gte=start,
+            timestamp__lte=end,
+        ).values_list("coin", "timestamp", "close")
+    )
+    position = {coin: index for index, coin in enumerate(coins)}
+    names, timestamps, closes = zip(*rows) if rows else ((), (), ())
+    return align_closes([position[name] for name in names], timestamps, closes, len(coins))
+
+
+def compute_correlation(coins, currency, interval, window, min_periods, now=None):
+    """
+    Correlation matrix and annualized volatility of the last `window` log
+    returns of closed candles. Returns (timestamp, correlation, volatility),
+    timestamp being the open time of the last candle used, or None when
+    there are no candles.
+    """
+    length = interval_ms(interval)
+    now = now or int(time.time() * 1000)
+    # The candle still open would weigh a partial period like a full one
+    end = now - length
+    grid, closes = read_closes(coins, currency, interval, end - (window + 1) * length, end)
+    if grid.shape[0] == 0:
+        return None
+
+    returns = log_returns(closes)[:, -window:]
+    _, covariance, correlation = window_statistics(returns, min_periods)
+    return int(grid[-1]), correlation, realized_volatility(covariance, length)
+
+
+def _rounded(values, decimals=4):
+    """Nested lists with NaN replaced by None, for JSON."""
+    return np.where(np.isnan(values), None, np.round(values, decimals)).tolist()
+
+
+def refresh_correlation_snapshot(coins, currency, interval=None, window=None):
+    """Recompute the watchlist matrix from stored candles, persist it and warm the cache"""
+    interval = interval or settings.CORRELATION_INTERVAL
+    window = window or settings.CORRELATION_WINDOW
+    if len(coins) < 2:
+        return None
+
+    result = compute_correlation(coins, currency, interval, window, settings.CORRELATION_MIN_PERIODS)
+    if result is None:
+        return None
+    timestamp, correlation, volatility = result
+
+    snapshot, _ = CorrelationSnapshot.objects.update_or_create(
+        currency=currency,
+        interval=interval,
+        window=window,
+        defaults={
+            "timestamp": timestamp,
+            "coins": list(coins),
+            "correlation": _rounded(correlation),
+            "volatility": _rounded(volatility),
+        },
+    )
+    cache.set(
+        _cache_key(currency, interval, window, snapshot.computed_at),
+        correlation_table(snapshot),
+        settings.CORRELATION_CACHE_TIMEOUT,
+    )
+    return snapshot
+
+
+def _cache_key(currency, interval, window, computed_at):
+    return f"correlation:{currency}:{interval}:{window}:{computed_at.timestamp()}"
+
+
+def load_correlation_table(currency):
+    """Dashboard view of the latest snapshot, or None before the first one"""
+    interval, window = settings.CORRELATION_INTERVAL, settings.CORRELATION_WINDOW
+    latest = (
+        CorrelationSnapshot.objects.filter(currency=currency, interval=interval, window=window)
+        .values_list("pk", "computed_at")
+        .first()
+    )
+    if latest is None:
+        return None
+
+    key = _cache_key(currency, interval, window, latest[1])
+    table = cache.get(key)
+    if table is None:
+        table = correlation_table(CorrelationSnapshot.objects.get(pk=latest[0]))
+        cache.set(key, table, settings.CORRELATION_CACHE_TIMEOUT)
+    return table
+
+
+def _pair(coins, pairs, values, index):
+    row, column = pairs[0][index], pairs[1][index]
+    return {"coins": (coins[row], coins[column]), "value": round(float(values[index]), 2)}
+
+
+def correlation_table(snapshot):
+    """
+    Heatmap rows for the first CORRELATION_DISPLAY_COINS coins, plus the
+    average pairwise correlation and the most and least correlated pairs of
+    the whole watchlist.
+    """
+    coins = snapshot.coins
+    matrix = np.array(snapshot.correlation, dtype=np.float64).reshape(len(coins), len(coins))
+    volatility = np.array(snapshot.volatility, dtype=np.float64)
+
+    pairs = np.triu_indices(len(coins), k=1)
+    upper = matrix[pairs]
+    known = np.flatnonzero(~np.isnan(upper))
+
+    shown = min(len(coins), settings.CORRELATION_DISPLAY_COINS)
+    rows = []
+    for row in range(shown):
+        cells = []
+        for value in matrix[row, :shown].tolist():
+            if value != value:
+                cells.append({"value": None, "color": ""})
+            else:
+                tint = _POSITIVE if value >= 0 else _NEGATIVE
+                cells.append({"value": round(value, 2), "color": f"rgba({tint}, {abs(value) * 0.8:.2f})"})
+        vol = volatility[row]
+        rows.append(
+            {
+                "coin": coins[row],
+                "volatility": None if vol != vol else round(float(vol) * 100, 1),
+                "cells": cells,
+            }
+        )
+
+    return {
+        "coins": coins[:shown],
+        "rows": rows,
+        "total": len(coins),
+        "average": round(float(upper[known].mean()), 2) if known.shape[0] else None,
+        "highest": _pair(coins, pairs, upper, known[np.argmax(upper[known])]) if known.shape[0] else None,
+        "lowest": _pair(coins, pairs, upper, known[np.argmin(upper[known])]) if known.shape[0] else None,
+        "interval": snapshot.interval,
+        "window": snapshot.window,
+        "computed_at": snapshot.computed_at,
+    }
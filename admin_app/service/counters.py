@@ -0,0 +1,89 @@
+from collections import Counter
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, F
+
+from admin_app.models import AuditLog, StatCounter, User_Profile
+
+USERS = "users"
+AUDIT_LOGS = "audit_logs"
+
+
+def role_key(role):
+    return f"role:{role}"
+
+
+def action_key(action):
+    return f"audit:{action}"
+
+
+def history_key(coin, currency, interval):
+    return f"history:{coin}:{currency}:{interval}"
+
+
+def increment(key, amount=1):
+    """Atomically add `amount` to counter `key`, creating it when missing."""
+    if not StatCounter.objects.filter(key=key).update(value=F("value") + amount):
+        StatCounter.objects.get_or_create(key=key)
+        StatCounter.objects.filter(key=key).update(value=F("value") + amount)
+
+
+def bump_history(coin, currency, interval, using):
+    """
+    Count a rewrite of already stored candles or indicator values of a
+    series once the current transaction on `using` commits; chart caches
+    and ETags otherwise only follow the newest candle.
+    """
+    transaction.on_commit(lambda: increment(history_key(coin, currency, interval)), using=using)
+
+
+def read_counters(keys):
+    """Current value of every key in `keys` (0 when missing), in one primary-key lookup."""
+    values = dict(StatCounter.objects.filter(key__in=keys).values_list("key", "value"))
+    return {key: values.get(key, 0) for key in keys}
+
+
+def record_audit_logs(entries):
+    """Count freshly written AuditLog rows, in total and per action."""
+    if not entries:
+        return
+    increment(AUDIT_LOGS, len(entries))
+    for action, amount in Counter(entry.action for entry in entries).items():
+        increment(action_key(action), amount)
+
+
+def compute_counters():
+    """Exact counter values computed from the tables (full scans)."""
+    values = {USERS: User.objects.count(), AUDIT_LOGS: AuditLog.objects.count()}
+    for role, _ in User_Profile.ROLE_CHOICES:
+        values[role_key(role)] = 0
+    for action, _ in AuditLog.ACTION_CHOICES:
+        values[action_key(action)] = 0
+
+    for row in User_Profile.objects.values("role").annotate(total=Count("id")):
+        values[role_key(row["role"])] = row["total"]
+    for row in AuditLog.objects.order_by().values("action").annotate(total=Count("id")):
+        values[action_key(row["action"])] = row["total"]
+    return values
+
+
+def reconcile():
+    """
+    Overwrite the counters with exact values. Returns {key: (stored, actual)}
+    for every counter that had drifted.
+    """
+    actual = compute_counters()
+    with transaction.atomic():
+        stored = read_counters(list(actual))
+        StatCounter.objects.bulk_create(
+            [StatCounter(key=key, value=value) for key, value in actual.items()],
+            update_conflicts=True,
+            unique_fields=["key"],
+            update_fields=["value"],
+        )
+    return {
+        key: (stored[key], value)
+        for key, value in actual.items()
+        if stored[key] != value
+    }
@@ -1,109 +1,207 @@
-import json
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from zoneinfo import ZoneInfo
 
-from django.contrib.auth.models import User
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
 
-from admin_app.models import AuditLog, User_Profile
+from admin_app.models import AuditLog, IndicatorSnapshot
 from admin_app.parameter.average_true_range import average_true_range
-from admin_app.source.koingecko import market_chart
+from admin_app.parameter.indicators import ohlc_arrays, rsi, sma
+from admin_app.service import counters
+from admin_app.service.correlation import load_correlation_table
+from admin_app.service.metrics import span
+from admin_app.service.price_history import (
+    DAY_MS,
+    day_start,
+    read_candles,
+    sync_prices,
+)
+from admin_app.service.watchlist import get_watchlist
+
+
+def service_dashboard(coin="bitcoin", currency="usd", days=30):
+
+    stats = load_stats()
+    recent_logs = load_recent_logs()
+    snapshot = load_indicator_snapshot(coin, currency)
+    watchlist = load_watchlist_snapshots(currency)
+    correlation = load_correlation_table(currency)
+
+    return build_dashboard_context(
+        stats, recent_logs, snapshot, watchlist, correlation, coin, currency, days
+    )
+
+
+async def service_dashboard_async(coin="bitcoin", currency="usd", days=30):
+    """
+    Same context as service_dashboard(), with the independent reads running
+    concurrently so the latency is that of the slowest one, not the sum
+    """
+    stats, recent_logs, snapshot, watchlist, correlation = await asyncio.gather(
+        _in_thread(load_stats),
+        _in_thread(load_recent_logs),
+        _in_thread(load_indicator_snapshot, coin, currency),
+        _in_thread(load_watchlist_snapshots, currency),
+        _in_thread(load_correlation_table, currency),
+    )
+
+    return build_dashboard_context(
+        stats, recent_logs, snapshot, watchlist, correlation, coin, currency, days
+    )
+
+
+_read_pool = None
+_read_pool_lock = threading.Lock()
+
+
+def get_read_pool():
+    """
+    Worker threads for the concurrent dashboard reads. Each thread keeps its
+    database connection between requests, so the pool size bounds them.
+    """
+    global _read_pool
+    if _read_pool is None:
+        with _read_pool_lock:
+            if _read_pool is None:
+                _read_pool = ThreadPoolExecutor(
+                    max_workers=settings.DASHBOARD_READ_WORKERS,
+                    thread_name_prefix="dashboard-read",
+                )
+    return _read_pool
+
+
+async def _in_thread(func, *args):
+    """Run blocking ORM work on the read pool so the calls can overlap"""
+
+    def run():
+        try:
+            return func(*args)
+        except Exception:
+            # Drop connections that may be broken; the next call reconnects
+            connections.close_all()
+            raise
+
+    return await sync_to_async(run, thread_sensitive=False, executor=get_read_pool())()
+
+
+def build_dashboard_context(stats, recent_logs, snapshot, watchlist, correlation, coin, currency, days):
+    return {
+        "total_users": stats[counters.USERS],
+        "total_admins": stats[counters.role_key("admin")],
+        "total_logs": stats[counters.AUDIT_LOGS],
+        "recent_logs": recent_logs,
+        "crypto_analysis": snapshot.analysis if snapshot else {},
+        "atr": snapshot.atr if snapshot else None,
+        "analysis_updated_at": snapshot.computed_at if snapshot else None,
+        "watchlist": watchlist,
+        "correlation": correlation,
+        # The chart fetches its candles from the api_candles endpoint
+        "chart_coin": coin,
+        "chart_currency": currency,
+        "chart_range": f"{days}d",
+    }
 
 
-def service_dashboard():
+def load_stats():
+    """Statistics, maintained by admin_app.signals and the audit writer"""
+    return counters.read_counters(
+        [counters.USERS, counters.role_key("admin"), counters.AUDIT_LOGS]
+    )
 
-    # Statistics
-    total_users = User.objects.count()
-    total_admins = User_Profile.objects.filter(role="admin").count()
-    total_logs = AuditLog.objects.count()
-    recent_logs = AuditLog.objects.select_related("user")[:10]
 
-    # Generate crypto candlestick data
-    candlestick_data = generate_crypto_candlestick_data()
+def load_recent_logs(limit=10):
+    return list(AuditLog.objects.prefetch_related("user")[:limit])
 
-    # Analyze crypto data
-    crypto_analysis = analyze_crypto_data(candlestick_data)
 
-    atr = average_true_range(candlestick_data, 14)
+def load_indicator_snapshot(coin, currency):
+    """Indicators precomputed by `manage.py ingest_prices`"""
+    return IndicatorSnapshot.objects.filter(
+        coin=coin, currency=currency, interval="1d"
+    ).first()
 
-    context = {
-        "total_users": total_users,
-        "total_admins": total_admins,
-        "total_logs": total_logs,
-        "recent_logs": recent_logs,
-        "candlestick_data": json.dumps(candlestick_data),
-        "crypto_analysis": crypto_analysis,
+
+def load_watchlist_snapshots(currency):
+    """Latest precomputed analysis for every watchlist coin, in watchlist order"""
+    coins = get_watchlist()
+    snapshots = {
+        snapshot.coin: snapshot
+        for snapshot in IndicatorSnapshot.objects.filter(
+            coin__in=coins, currency=currency, interval="1d"
+        )
     }
+    return [
+        {"coin": coin, "snapshot": snapshots.get(coin)}
+        for coin in coins
+    ]
 
-    return context
 
+def refresh_indicator_snapshot(coin, currency, days=30):
+    """Recompute the dashboard indicators from stored candles and persist them"""
+    with span("candles"):
+        candlestick_data = load_candlestick_data(coin, currency, days)
+    if not candlestick_data:
+        return None
 
-def generate_crypto_candlestick_data():
-    """Generate crypto candlestick data from CoinGecko API for last 24 hours"""
-    market_data = market_chart("bitcoin", "usd", "30")
-    prices = market_data.get("prices", [])
+    with span("analysis"):
+        crypto_analysis = analyze_crypto_data(candlestick_data)
+    with span("atr"):
+        atr = average_true_range(candlestick_data, 14)
 
-    if not prices:
-        return []
+    snapshot, _ = IndicatorSnapshot.objects.update_or_create(
+        coin=coin,
+        currency=currency,
+        interval="1d",
+        defaults={"analysis": crypto_analysis, "atr": atr},
+    )
+    return snapshot
 
-    # Group prices by day
-    daily_data = {}
-    for timestamp, price in prices:
-        dt = datetime.fromtimestamp(timestamp / 1000)  # timestamp is in milliseconds
-        day_key = dt.replace(hour=0, minute=0, second=0, microsecond=0)
 
-        if day_key not in daily_data:
-            daily_data[day_key] = {
-                "open": price,
-                "high": price,
-                "low": price,
-                "close": price,
-            }
-        else:
-            # Update high and low
-            daily_data[day_key]["high"] = max(daily_data[day_key]["high"], price)
-            daily_data[day_key]["low"] = min(daily_data[day_key]["low"], price)
-            daily_data[day_key]["close"] = price  # Last price becomes close
+def generate_crypto_candlestick_data(coin="bitcoin", currency="usd", days=30, interval="1d"):
+    """Sync new CoinGecko samples into the local store and read the last `days` of candles"""
+    sync_prices(coin, currency, initial_days=days)
+    return load_candlestick_data(coin, currency, days, interval)
+
+
+def load_candlestick_data(coin, currency, days=30, interval="1d"):
+    """Read the last `days` of `interval` candles from the local store"""
+    since = day_start(int(time.time() * 1000) - days * DAY_MS)
 
-    # Convert to candlestick format
     candlestick_data = []
-    for day_key, ohlc in sorted(daily_data.items()):
+    for timestamp, o, h, l, c in read_candles(coin, currency, interval, start=since):
         candlestick_data.append(
             {
-                "x": day_key.isoformat(),
-                "o": round(ohlc["open"], 2),
-                "h": round(ohlc["high"], 2),
-                "l": round(ohlc["low"], 2),
-                "c": round(ohlc["close"], 2),
+                "x": local_isoformat(timestamp),
+                "o": round(o, 2),
+                "h": round(h, 2),
+                "l": round(l, 2),
+                "c": round(c, 2),
             }
         )
 
     return candlestick_data
 
 
+def local_isoformat(timestamp):
+    """Naive ISO string of an epoch-ms timestamp in CANDLE_TIME_ZONE, as the chart expects"""
+    tz = ZoneInfo(settings.CANDLE_TIME_ZONE)
+    return datetime.fromtimestamp(timestamp / 1000, tz).replace(tzinfo=None).isoformat()
+
+
 def analyze_crypto_data(candlestick_data):
     """Analyze crypto data and calculate indicators"""
-    prices = [candle["c"] for candle in candlestick_data]
-
-    # Calculate Simple Moving Average (SMA)
-    sma_7 = sum(prices[-7:]) / 7
-    sma_14 = sum(prices[-14:]) / 14
-
-    # Calculate RSI (Relative Strength Index)
-    gains = []
-    losses = []
-    for i in range(1, len(prices)):
-        change = prices[i] - prices[i - 1]
-        if change > 0:
-            gains.append(change)
-            losses.append(0)
-        else:
-            gains.append(0)
-            losses.append(abs(change))
-
-    avg_gain = sum(gains[-14:]) / 14 if len(gains) >= 14 else 0
-    avg_loss = sum(losses[-14:]) / 14 if len(losses) >= 14 else 0
-
-    rs = avg_gain / avg_loss if avg_loss != 0 else 0
-    rsi = 100 - (100 / (1 + rs)) if rs > 0 else 0
+    _, _, _, prices = ohlc_arrays(candlestick_data)
+
+    # Calculate Simple Moving Average (SMA), over fewer candles if history is short
+    sma_7 = sma(prices, min(7, len(prices)))[-1]
+    sma_14 = sma(prices, min(14, len(prices)))[-1]
+
+    # Calculate RSI (Relative Strength Index) with Wilder smoothing
+    rsi_14 = rsi(prices, 14)[-1] if len(prices) > 14 else 0
 
     # Get latest price and calculate change
     latest_price = prices[-1]
@@ -115,13 +213,13 @@ def analyze_crypto_data(candlestick_data):
     trend = "BULLISH" if sma_7 > sma_14 else "BEARISH"
 
     return {
-        "latest_price": round(latest_price, 2),
-        "price_change": round(price_change, 2),
-        "price_change_percent": round(price_change_percent, 2),
-        "sma_7": round(sma_7, 2),
-        "sma_14": round(sma_14, 2),
-        "rsi": round(rsi, 2),
+        "latest_price": round(float(latest_price), 2),
+        "price_change": round(float(price_change), 2),
+        "price_change_percent": round(float(price_change_percent), 2),
+        "sma_7": round(float(sma_7), 2),
+        "sma_14": round(float(sma_14), 2),
+        "rsi": round(float(rsi_14), 2),
         "trend": trend,
-        "highest_price": round(max(prices), 2),
-        "lowest_price": round(min(prices), 2),
+        "highest_price": round(float(prices.max()), 2),
+        "lowest_price": round(float(prices.min()), 2),
     }
@@ -0,0 +1,262 @@
+"""
+Materialized indicator series behind the chart overlays.
+
+Every (coin, currency, interval) series keeps one IndicatorValue row per
+candle and overlay, plus an IndicatorState row with the streaming indicator
+state after the last closed candle. New candles are folded in with the O(1)
+streaming updates; the newest candle may still be open, so its value comes
+from a copy of the state and is rewritten on every update. A series without
+state is backfilled in bulk with the vectorized indicators.
+"""
+
+from functools import reduce
+from operator import or_
+
+import numpy as np
+from django.db import connections, router, transaction
+from django.db.models import Q
+
+from admin_app.models import Candle, IndicatorState, IndicatorValue
+from admin_app.parameter.indicators import atr, rsi, sma
+from admin_app.parameter.streaming import RollingSMA, WilderATR, WilderRSI, load_state
+from admin_app.service.counters import bump_history
+
+COLUMNS = ("timestamp", "open", "high", "low", "close")
+
+
+class Indicator:
+    """A vectorized indicator and its streaming twin, fed the same candle columns."""
+
+    def __init__(self, compute, streaming, inputs):
+        self.compute = compute
+        self.streaming = streaming
+        self.inputs = inputs
+
+    def series(self, columns, params):
+        return self.compute(*(columns[name] for name in self.inputs), **params)
+
+    def stream(self, params):
+        return self.streaming(**params)
+
+    def feed(self, stream, row):
+        return stream.update(*(row[name] for name in self.inputs))
+
+
+INDICATORS = {
+    "sma": Indicator(sma, RollingSMA, ("close",)),
+    "rsi": Indicator(rsi, WilderRSI, ("close",)),
+    "atr": Indicator(atr, WilderATR, ("high", "low", "close")),
+}
+
+# Overlay name -> (indicator, params), as sent to the chart
+OVERLAYS = {
+    "sma_7": ("sma", {"period": 7}),
+    "sma_14": ("sma", {"period": 14}),
+    "rsi_14": ("rsi", {"period": 14}),
+    "atr_14": ("atr", {"period": 14}),
+}
+
+
+def params_key(params):
+    """Canonical string form of indicator parameters, e.g. 'period=14'."""
+    return ",".join(f"{name}={params[name]}" for name in sorted(params))
+
+
+def _candles(coin, currency, interval, after=None):
+    candles = Candle.objects.filter(coin=coin, currency=currency, interval=interval)
+    if after is not None:
+        candles = candles.filter(timestamp__gt=after)
+    rows = list(candles.order_by("timestamp").values_list(*COLUMNS))
+    data = np.array(rows, dtype=np.float64).reshape(-1, len(COLUMNS))
+    columns = dict(zip(COLUMNS, data.T))
+    columns["timestamp"] = columns["timestamp"].astype(np.int64)
+    return columns
+
+
+def _rows(columns):
+    return [dict(zip(COLUMNS, values)) for values in zip(*(columns[name].tolist() for name in COLUMNS))]
+
+
+def _value(coin, currency, interval, indicator, params, timestamp, value):
+    return IndicatorValue(
+        coin=coin,
+        currency=currency,
+        interval=interval,
+        indicator=indicator,
+        params=params,
+        timestamp=timestamp,
+        value=value,
+    )
+
+
+def _save(values, states):
+    IndicatorValue.objects.bulk_create(
+        values,
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=["coin", "currency", "interval", "indicator", "params", "timestamp"],
+        update_fields=["value"],
+    )
+    IndicatorState.objects.bulk_create(
+        states,
+        update_conflicts=True,
+        unique_fields=["coin", "currency", "interval", "indicator", "params"],
+        update_fields=["timestamp", "state", "updated_at"],
+    )
+
+
+def backfill_indicators(coin, currency, interval, overlays=None):
+    """
+    Recompute the whole history of `overlays` (default: all) with the
+    vectorized indicators, replacing stored values and state. Returns the
+    number of values written.
+    """
+    overlays = overlays or list(OVERLAYS)
+    columns = _candles(coin, currency, interval)
+    count = columns["timestamp"].shape[0]
+    timestamps = columns["timestamp"].tolist()
+    closed = _rows({name: values[:-1] for name, values in columns.items()})
+
+    values, states = [], []
+    for overlay in overlays:
+        name, params = OVERLAYS[overlay]
+        indicator, key = INDICATORS[name], params_key(params)
+        if count:
+            series = indicator.series(columns, params)
+            values.extend(
+                (coin, currency, interval, name, key, timestamps[i], value)
+                for i, value in enumerate(series.tolist())
+                if value == value
+            )
+        if len(closed):
+            # The state has to see every closed candle for Wilder smoothing
+            # to match the vectorized series exactly.
+            stream = indicator.stream(params)
+            for row in closed:
+                indicator.feed(stream, row)
+            states.append(
+                IndicatorState(
+                    coin=coin,
+                    currency=currency,
+                    interval=interval,
+                    indicator=name,
+                    params=key,
+                    timestamp=closed[-1]["timestamp"],
+                    state=stream.to_state(),
+                )
+            )
+
+    alias = router.db_for_write(IndicatorValue)
+    with transaction.atomic(using=alias):
+        for overlay in overlays:
+            name, params = OVERLAYS[overlay]
+            IndicatorValue.objects.filter(
+                coin=coin, currency=currency, interval=interval, indicator=name, params=params_key(params)
+            ).delete()
+        _insert_values(alias, values)
+        _save([], states)
+        bump_history(coin, currency, interval, alias)
+    return len(values)
+
+
+def _insert_values(alias, rows):
+    """
+    Plain INSERT of (coin, currency, interval, indicator, params, timestamp,
+    value) tuples; a backfill writes whole histories, where building model
+    instances would dominate the run time.
+    """
+    connection = connections[alias]
+    quote = connection.ops.quote_name
+    fields = ["coin", "currency", "interval", "indicator", "params", "timestamp", "value"]
+    sql = "INSERT INTO {} ({}) VALUES ({})".format(
+        quote(IndicatorValue._meta.db_table),
+        ", ".join(quote(IndicatorValue._meta.get_field(name).column) for name in fields),
+        ", ".join(["%s"] * len(fields)),
+    )
+    with connection.cursor() as cursor:
+        for first in range(0, len(rows), 10_000):
+            cursor.executemany(sql, rows[first : first + 10_000])
+
+
+def update_indicators(coin, currency, interval):
+    """
+    Fold the candles stored since the last update into every overlay,
+    backfilling overlays that have no state yet. Returns the number of
+    values written.
+    """
+    wanted = {(name, params_key(params)): overlay for overlay, (name, params) in OVERLAYS.items()}
+    states = {
+        (state.indicator, state.params): state
+        for state in IndicatorState.objects.filter(coin=coin, currency=currency, interval=interval)
+        if (state.indicator, state.params) in wanted
+    }
+    missing = [overlay for key, overlay in wanted.items() if key not in states]
+    written = backfill_indicators(coin, currency, interval, missing) if missing else 0
+    if not states:
+        return written
+
+    rows = _rows(_candles(coin, currency, interval, after=min(state.timestamp for state in states.values())))
+    if not rows:
+        return written
+    newest = rows[-1]
+
+    values = []
+    for overlay, (name, params) in OVERLAYS.items():
+        key = params_key(params)
+        state = states.get((name, key))
+        if state is None:
+            continue
+        indicator = INDICATORS[name]
+        stream = load_state(state.state)
+        for row in rows[:-1]:
+            if row["timestamp"] <= state.timestamp:
+                continue
+            value = indicator.feed(stream, row)
+            if value is not None:
+                values.append(_value(coin, currency, interval, name, key, row["timestamp"], value))
+            state.timestamp = row["timestamp"]
+        state.state = stream.to_state()
+
+        provisional = indicator.feed(load_state(state.state), newest)
+        if provisional is not None:
+            values.append(_value(coin, currency, interval, name, key, newest["timestamp"], provisional))
+
+    with transaction.atomic(using=router.db_for_write(IndicatorValue)):
+        _save(values, list(states.values()))
+    return written + len(values)
+
+
+def read_overlays(coin, currency, interval, timestamps):
+    """
+    Stored overlay values aligned to the candle `timestamps` (NaN where
+    there is none), read with one query. Overlays without any stored value
+    in the window are left out.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    if not timestamps.shape[0]:
+        return {}
+    names = {(name, params_key(params)): overlay for overlay, (name, params) in OVERLAYS.items()}
+    rows = IndicatorValue.objects.filter(
+        reduce(or_, (Q(indicator=name, params=key) for name, key in names)),
+        coin=coin,
+        currency=currency,
+        interval=interval,
+        timestamp__gte=int(timestamps[0]),
+        timestamp__lte=int(timestamps[-1]),
+    ).values_list("indicator", "params", "timestamp", "value")
+
+    found = {}
+    for name, key, timestamp, value in rows:
+        stamps, values = found.setdefault(names[(name, key)], ([], []))
+        stamps.append(timestamp)
+        values.append(value)
+
+    overlays = {}
+    for overlay, (stamps, values) in found.items():
+        stamps = np.array(stamps, dtype=np.int64)
+        index = np.searchsorted(timestamps, stamps)
+        matched = (index < timestamps.shape[0]) & (timestamps[np.minimum(index, timestamps.shape[0] - 1)] == stamps)
+        aligned = np.full(timestamps.shape[0], np.nan)
+        aligned[index[matched]] = np.array(values, dtype=np.float64)[matched]
+        overlays[overlay] = aligned
+    return overlays
@@ -0,0 +1,241 @@
+"""
+In-process performance metrics.
+
+Histograms and counters live in a process-wide registry and are rendered in
+the Prometheus text exposition format by render(). While a request is being
+handled (see admin_app.middleware.PerformanceMiddleware) a RequestTimings
+object is bound to the current context, and database queries, outbound HTTP
+calls and span() blocks also add to it; the context follows the request
+into sync_to_async worker threads.
+"""
+
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * len(self.buckets) + [0.0, 0]
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                counts, count = series[:-2], series[-1]
+                cumulative = 0
+                for bound, observed in zip(self.buckets, counts):
+                    cumulative += observed
+                    lines.append(
+                        f"{self.name}_bucket{_labels(self.labelnames, labels, [('le', _number(bound))])} {cumulative}"
+                    )
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, [('le', '+Inf')])} {count}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(series[-2])}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {series[-1]}")
+        return lines
+
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Time spent producing a response.", ["view", "method"]
+)
+REQUESTS = Counter("http_requests_total", "Responses by view, method and status.", ["view", "method", "status"])
+REQUEST_DB_DURATION = Histogram(
+    "http_request_db_duration_seconds", "Database time per request.", ["view"]
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries", "Database queries per request.", ["view"], buckets=COUNT_BUCKETS
+)
+REQUEST_HTTP_DURATION = Histogram(
+    "http_request_outbound_duration_seconds", "Outbound HTTP time per request.", ["view"]
+)
+OUTBOUND_DURATION = Histogram(
+    "outbound_http_duration_seconds", "Duration of outbound HTTP calls.", ["service"]
+)
+SPAN_DURATION = Histogram("span_duration_seconds", "Duration of named compute spans.", ["span"])
+
+REGISTRY = [
+    REQUEST_DURATION,
+    REQUESTS,
+    REQUEST_DB_DURATION,
+    REQUEST_DB_QUERIES,
+    REQUEST_HTTP_DURATION,
+    OUTBOUND_DURATION,
+    SPAN_DURATION,
+]
+
+
+def render():
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class RequestTimings:
+    """Time breakdown of one request; safe to update from worker threads."""
+
+    def __init__(self):
+        self.db_time = 0.0
+        self.db_count = 0
+        self.http_time = 0.0
+        self.http_count = 0
+        self.spans = {}
+        self._lock = threading.Lock()
+
+    def add_query(self, seconds):
+        with self._lock:
+            self.db_time += seconds
+            self.db_count += 1
+
+    def add_http(self, seconds):
+        with self._lock:
+            self.http_time += seconds
+            self.http_count += 1
+
+    def add_span(self, name, seconds):
+        with self._lock:
+            self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def server_timing(self, total):
+        """Value for a Server-Timing header, durations in milliseconds."""
+        entries = [
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.db_count} queries"',
+            f'http;dur={self.http_time * 1000:.1f};desc="{self.http_count} calls"',
+        ]
+        entries.extend(f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.spans.items())
+        entries.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(entries)
+
+
+_current = contextvars.ContextVar("request_timings", default=None)
+
+
+def start_request():
+    """Bind a fresh RequestTimings to the current context; returns (timings, token)."""
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+@contextmanager
+def span(name):
+    """Time a block of work as the named span."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        SPAN_DURATION.observe(elapsed, name)
+        timings = _current.get()
+        if timings is not None:
+            timings.add_span(name, elapsed)
+
+
+@contextmanager
+def outbound(service):
+    """Time an outbound HTTP call to `service`."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        OUTBOUND_DURATION.observe(elapsed, service)
+        timings = _current.get()
+        if timings is not None:
+            timings.add_http(elapsed)
+
+
+def _time_query(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.add_query(time.perf_counter() - started)
+
+
+def _instrument(sender, connection, **kwargs):
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+_installed = False
+_install_lock = threading.Lock()
+
+
+def install_db_instrumentation():
+    """Time the queries of every database connection, current and future."""
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        connection_created.connect(_instrument, weak=False)
+        for alias in connections:
+            if connections[alias].connection is not None:
+                _instrument(None, connections[alias])
+        _installed = True
@@ -0,0 +1,136 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class KeysetPage:
+    """One page of a keyset-paginated queryset, with opaque cursors to its neighbours."""
+
+    def __init__(self, object_list, next_cursor, previous_cursor, approximate_total=None, total_is_exact=True):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.approximate_total = approximate_total
+        self.total_is_exact = total_is_exact
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+def encode_cursor(obj, keys):
+    """
+    Opaque cursor holding the key values of `obj`. value_to_string() keeps
+    full precision (microseconds included), unlike DjangoJSONEncoder.
+    """
+    values = [obj._meta.get_field(field).value_to_string(obj) for field, _ in keys]
+    raw = json.dumps(values, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, model, keys):
+    """Turn a cursor back into typed key values; returns None when it is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if len(values) != len(keys):
+            return None
+        return [
+            model._meta.get_field(field).to_python(value)
+            for (field, _), value in zip(keys, values)
+        ]
+    except (ValueError, TypeError, ValidationError):
+        return None
+
+
+def _seek(keys, values, forward):
+    """
+    Q selecting rows strictly after `values` in the `keys` ordering
+    (or strictly before when `forward` is false), expanded as
+    k1 > v1 OR (k1 = v1 AND k2 > v2) OR ...
+    """
+    condition = Q()
+    for i, (field, descending) in enumerate(keys):
+        after = descending != forward
+        term = Q(**{f"{field}__{'gt' if after else 'lt'}": values[i]})
+        for j, (prev_field, _) in enumerate(keys[:i]):
+            term &= Q(**{prev_field: values[j]})
+        condition |= term
+    return condition
+
+
+def _ordering(keys, reverse=False):
+    return [
+        f"{'-' if descending != reverse else ''}{field}" for field, descending in keys
+    ]
+
+
+def approximate_count(queryset, cap=10000):
+    """
+    Count at most `cap` + 1 rows; returns (count, exact). Bounded cost even
+    on very large tables.
+    """
+    count = queryset.order_by().values("pk")[: cap + 1].count()
+    if count > cap:
+        return cap, False
+    return count, True
+
+
+def keyset_paginate(queryset, keys, per_page, after=None, before=None, count_cap=10000):
+    """
+    Paginate `queryset` by seeking on `keys`, a list of (field, descending)
+    pairs whose last field must be unique (usually the primary key).
+
+    `after` / `before` are cursors taken from a previous page's
+    next_cursor / previous_cursor. Every page costs one indexed range scan of
+    per_page + 1 rows, however deep it is.
+    """
+    model = queryset.model
+
+    total, exact = approximate_count(queryset, count_cap)
+
+    before_values = decode_cursor(before, model, keys) if before else None
+    after_values = decode_cursor(after, model, keys) if after and before_values is None else None
+
+    if before_values is not None:
+        rows = list(
+            queryset.filter(_seek(keys, before_values, forward=False))
+            .order_by(*_ordering(keys, reverse=True))[: per_page + 1]
+        )
+        has_previous = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        has_next = True
+    else:
+        page = queryset
+        if after_values is not None:
+            page = page.filter(_seek(keys, after_values, forward=True))
+        rows = list(page.order_by(*_ordering(keys))[: per_page + 1])
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+        has_previous = after_values is not None
+
+    return KeysetPage(
+        rows,
+        next_cursor=encode_cursor(rows[-1], keys) if rows and has_next else None,
+        previous_cursor=encode_cursor(rows[0], keys) if rows and has_previous else None,
+        approximate_total=total,
+        total_is_exact=exact,
+    )
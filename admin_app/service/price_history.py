@@ -0,0 +1,154 @@
+import math
+import time
+
+import numpy as np
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models import Max
+
+from admin_app.models import Candle, PriceSample
+from admin_app.parameter.resample import bucket_start, resample_ohlc
+from admin_app.service.counters import bump_history
+from admin_app.service.indicator_series import update_indicators
+from admin_app.source.koingecko import market_chart
+
+DAY_MS = 24 * 60 * 60 * 1000
+INITIAL_DAYS = 30
+
+
+def latest_timestamp(coin, currency):
+    """Return the newest stored sample timestamp (epoch ms), or None."""
+    return PriceSample.objects.filter(coin=coin, currency=currency).aggregate(
+        latest=Max("timestamp")
+    )["latest"]
+
+
+def sync_prices(coin, currency, initial_days=INITIAL_DAYS):
+    """
+    Fetch only the samples newer than what is already stored and fold them
+    into the candles.
+
+    Returns the number of new samples written.
+    """
+    prices, last = fetch_delta(coin, currency, initial_days)
+    return store_prices(coin, currency, prices, since=last)
+
+
+def fetch_delta(coin, currency, initial_days=INITIAL_DAYS):
+    """
+    Ask the price source for the days elapsed since the newest stored sample.
+
+    Returns (prices, last) where `last` is the newest stored timestamp, to be
+    passed to store_prices() as `since`.
+    """
+    last = latest_timestamp(coin, currency)
+    market_data = market_chart(coin, currency, days_since(last, initial_days))
+    return market_data.get("prices", []), last
+
+
+def days_since(last, initial_days=INITIAL_DAYS):
+    """The `days` argument that covers everything after `last` (epoch ms)."""
+    if last is None:
+        return str(initial_days)
+    elapsed = int(time.time() * 1000) - last
+    return str(max(1, math.ceil(elapsed / DAY_MS)))
+
+
+def store_prices(coin, currency, prices, since=None):
+    """Persist [timestamp, price] pairs newer than `since` and rebuild the affected candles."""
+    new_samples = [
+        PriceSample(coin=coin, currency=currency, timestamp=int(timestamp), price=price)
+        for timestamp, price in prices
+        if since is None or timestamp > since
+    ]
+    if not new_samples:
+        return 0
+
+    first_new = min(sample.timestamp for sample in new_samples)
+    # Candles and their indicator values change together, so readers never
+    # see a candle without its overlays.
+    with transaction.atomic(using=router.db_for_write(Candle)):
+        PriceSample.objects.bulk_create(new_samples, ignore_conflicts=True)
+        rebuild_candles(coin, currency, first_new)
+        for interval in settings.CANDLE_INTERVALS:
+            update_indicators(coin, currency, interval)
+    return len(new_samples)
+
+
+def day_start(timestamp):
+    """Local midnight (epoch ms, CANDLE_TIME_ZONE) of the day containing `timestamp`."""
+    return bucket_start(timestamp, "1d", settings.CANDLE_TIME_ZONE)
+
+
+def rebuild_candles(coin, currency, since, intervals=None):
+    """
+    Recompute the candles of every interval in `intervals` (default
+    CANDLE_INTERVALS) whose bucket contains or follows `since` (epoch ms).
+    """
+    intervals = intervals or settings.CANDLE_INTERVALS
+    tz = settings.CANDLE_TIME_ZONE
+    starts = {interval: bucket_start(since, interval, tz) for interval in intervals}
+    latest = dict(
+        Candle.objects.filter(coin=coin, currency=currency, interval__in=intervals)
+        .values("interval")
+        .annotate(latest=Max("timestamp"))
+        .values_list("interval", "latest")
+    )
+
+    samples = (
+        PriceSample.objects.filter(
+            coin=coin, currency=currency, timestamp__gte=min(starts.values())
+        )
+        .order_by("timestamp")
+        .values_list("timestamp", "price")
+    )
+    data = np.array(list(samples), dtype=np.float64).reshape(-1, 2)
+    timestamps = data[:, 0].astype(np.int64)
+    prices = data[:, 1]
+
+    written = 0
+    for interval, start in starts.items():
+        first = np.searchsorted(timestamps, start)
+        ohlc = resample_ohlc(timestamps[first:], prices[first:], interval, tz)
+        candles = [
+            Candle(
+                coin=coin,
+                currency=currency,
+                interval=interval,
+                timestamp=timestamp,
+                open=o,
+                high=h,
+                low=l,
+                close=c,
+            )
+            for timestamp, o, h, l, c in zip(
+                ohlc["timestamp"].tolist(),
+                ohlc["open"].tolist(),
+                ohlc["high"].tolist(),
+                ohlc["low"].tolist(),
+                ohlc["close"].tolist(),
+            )
+        ]
+        Candle.objects.bulk_create(
+            candles,
+            update_conflicts=True,
+            unique_fields=["coin", "currency", "interval", "timestamp"],
+            update_fields=["open", "high", "low", "close"],
+        )
+        if start < latest.get(interval, start):
+            # Candles before the newest one changed (a backfill, late samples)
+            bump_history(coin, currency, interval, router.db_for_write(Candle))
+        written += len(candles)
+    return written
+
+
+def read_candles(coin, currency, interval="1d", start=None, end=None):
+    """Range read over the (coin, currency, interval, timestamp) index, oldest first."""
+    candles = Candle.objects.filter(coin=coin, currency=currency, interval=interval)
+    if start is not None:
+        candles = candles.filter(timestamp__gte=start)
+    if end is not None:
+        candles = candles.filter(timestamp__lt=end)
+    return candles.order_by("timestamp").values_list(
+        "timestamp", "open", "high", "low", "close"
+    )
@@ -0,0 +1,65 @@
+from functools import reduce
+from operator import or_
+
+from django.db import OperationalError, connections, router
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+# FTS5 tables created by migration 0006_search_index (SQLite only).
+AUDIT_LOG_INDEX = "admin_app_auditlog_fts"
+USER_INDEX = "admin_app_user_fts"
+
+AUDIT_LOG_FIELDS = ["description", "model_name"]
+USER_FIELDS = ["username", "first_name", "last_name", "email"]
+
+# The trigram tokenizer cannot match anything shorter than three characters.
+MIN_FTS_QUERY = 3
+
+_available = {}
+
+
+def fts_available(model, table):
+    """Whether the FTS table for `model` exists on the database it is read from."""
+    alias = router.db_for_read(model)
+    key = (alias, table)
+    if key not in _available:
+        connection = connections[alias]
+        if connection.vendor != "sqlite":
+            _available[key] = False
+        else:
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                        [table],
+                    )
+                    _available[key] = cursor.fetchone() is not None
+            except OperationalError:
+                _available[key] = False
+    return _available[key]
+
+
+def search(queryset, query, table, fields):
+    """
+    Filter `queryset` to rows whose `fields` contain `query` (case-insensitive).
+
+    Uses the FTS5 trigram index `table` when it exists, otherwise falls back
+    to OR-ed icontains lookups.
+    """
+    if len(query) >= MIN_FTS_QUERY and fts_available(queryset.model, table):
+        phrase = '"' + query.replace('"', '""') + '"'
+        return queryset.filter(
+            pk__in=RawSQL(f"SELECT rowid FROM {table} WHERE {table} MATCH %s", [phrase])
+        )
+
+    return queryset.filter(
+        reduce(or_, (Q(**{f"{field}__icontains": query}) for field in fields))
+    )
+
+
+def search_audit_logs(queryset, query):
+    return search(queryset, query, AUDIT_LOG_INDEX, AUDIT_LOG_FIELDS)
+
+
+def search_users(queryset, query):
+    return search(queryset, query, USER_INDEX, USER_FIELDS)
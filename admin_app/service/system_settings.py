@@ -0,0 +1,94 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from admin_app.models import StatCounter, SystemSettings
+from admin_app.service import counters
+
+VERSION_KEY = "settings:version"
+
+
+class SettingsCache:
+    """
+    In-process copy of every SystemSettings row.
+
+    Writers bump a version counter; readers compare it with the version they
+    loaded at most once per `check_interval` seconds and reload everything
+    when it moved. Between checks a read is a dict lookup.
+    """
+
+    def __init__(self, check_interval=1.0):
+        self.check_interval = check_interval
+        self._values = {}
+        self._version = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        return self.all().get(key, default)
+
+    def all(self):
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at >= self.check_interval:
+            with self._lock:
+                if self._checked_at is None or now - self._checked_at >= self.check_interval:
+                    self._refresh()
+                    self._checked_at = now
+        return self._values
+
+    def invalidate(self):
+        with self._lock:
+            self._checked_at = None
+
+    def _refresh(self):
+        version = current_version()
+        if version != self._version:
+            self._values = dict(SystemSettings.objects.values_list("key", "value"))
+            self._version = version
+
+
+def current_version():
+    return (
+        StatCounter.objects.filter(key=VERSION_KEY).values_list("value", flat=True).first()
+        or 0
+    )
+
+
+def bump_version():
+    """Make every process reload its settings on its next version check."""
+    counters.increment(VERSION_KEY)
+    get_cache().invalidate()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SettingsCache(check_interval=settings.SYSTEM_SETTINGS_CHECK_INTERVAL)
+    return _cache
+
+
+def get_setting(key, default=None):
+    """Cached value of the SystemSettings row `key`, or `default`."""
+    return get_cache().get(key, default)
+
+
+def save_settings(values):
+    """Insert or update every key/value pair in one bulk upsert and bump the version."""
+    if not values:
+        return
+    with transaction.atomic():
+        SystemSettings.objects.bulk_create(
+            [SystemSettings(key=key, value=value) for key, value in values.items()],
+            update_conflicts=True,
+            unique_fields=["key"],
+            update_fields=["value", "updated_at"],
+        )
+        bump_version()
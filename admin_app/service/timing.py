@@ -0,0 +1,31 @@
+"""
+Wall-clock timing for the benchmark and bench_dashboard commands.
+
+measure() runs a callable repeatedly and returns the samples in
+milliseconds; timing_stats() reduces them to the summary both commands
+report, so their numbers are comparable.
+"""
+
+import statistics
+import time
+
+
+def measure(func, repeat):
+    """Milliseconds taken by each of `repeat` calls of func()."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def timing_stats(samples):
+    ordered = sorted(samples)
+    return {
+        "runs": len(samples),
+        "min_ms": round(ordered[0], 3),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "median_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+    }
@@ -0,0 +1,102 @@
+import logging
+import math
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+
+from admin_app.service.price_history import INITIAL_DAYS, days_since, latest_timestamp
+from admin_app.service.system_settings import get_setting
+from admin_app.source.koingecko import market_chart
+
+logger = logging.getLogger(__name__)
+
+WATCHLIST_KEY = "watchlist"
+
+
+def get_watchlist():
+    """Coins to track, from the `watchlist` system setting or INGEST_COINS."""
+    coins = parse_watchlist(get_setting(WATCHLIST_KEY, ""))
+    return coins or list(settings.INGEST_COINS)
+
+
+def parse_watchlist(value):
+    """Split a comma/whitespace separated list of coin ids, keeping order and dropping duplicates."""
+    coins = []
+    for coin in value.replace(",", " ").split():
+        coin = coin.strip().lower()
+        if coin not in coins:
+            coins.append(coin)
+    return coins
+
+
+def fetch_watchlist(coins, currency, initial_days=INITIAL_DAYS, max_workers=None, timeout=None):
+    """
+    Fetch the new price samples of every coin concurrently.
+
+    Each coin asks only for the days since its newest stored sample. Requests
+    run on a bounded thread pool. Every coin gets `timeout` seconds from the
+    moment its request starts, so a slow coin does not eat into the others'
+    budget; coins that fail or run out of time are reported in `errors`
+    without affecting the rest. Coins still queued when every worker could
+    have used its full budget for its share of the watchlist are reported
+    as timed out too, which bounds the whole call.
+
+    Returns (results, errors): results maps coin -> (prices, last) ready for
+    store_prices(), errors maps coin -> exception.
+    """
+    max_workers = max_workers or settings.WATCHLIST_MAX_WORKERS
+    timeout = timeout or settings.WATCHLIST_FETCH_TIMEOUT
+
+    # DB lookups stay on the calling thread; workers only do network I/O.
+    last_seen = {coin: latest_timestamp(coin, currency) for coin in coins}
+
+    results, errors = {}, {}
+    if not coins:
+        return results, errors
+
+    started_at = {}
+
+    def fetch(coin):
+        started_at[coin] = time.monotonic()
+        return market_chart(coin, currency, days_since(last_seen[coin], initial_days))
+
+    workers = min(max_workers, len(coins))
+    started = time.monotonic()
+    overall = started + timeout * math.ceil(len(coins) / workers)
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = {executor.submit(fetch, coin): coin for coin in coins}
+        pending = set(futures)
+        while pending:
+            deadlines = [started_at[futures[f]] + timeout for f in pending if futures[f] in started_at]
+            wake = min(deadlines + [overall]) - time.monotonic()
+            done, pending = wait(pending, timeout=max(0.0, wake), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                coin = futures[future]
+                try:
+                    market_data = future.result()
+                except Exception as exc:
+                    errors[coin] = exc
+                else:
+                    results[coin] = (market_data.get("prices", []), last_seen[coin])
+
+            now = time.monotonic()
+            for future in list(pending):
+                coin = futures[future]
+                if now >= overall or (coin in started_at and now >= started_at[coin] + timeout):
+                    future.cancel()
+                    pending.discard(future)
+                    errors[coin] = TimeoutError(f"no response within {timeout}s")
+    finally:
+        # Do not block on stragglers; their sockets time out on their own.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    logger.info(
+        "Fetched %d/%d coins in %.1fms",
+        len(results),
+        len(coins),
+        (time.monotonic() - started) * 1000,
+    )
+    return results, errors
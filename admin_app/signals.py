@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .models import AuditLog, SystemSettings, User_Profile
+from .service import counters
+from .service.system_settings import bump_version
+
+
+@receiver(post_save, sender=User)
+def count_user_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.increment(counters.USERS)
+
+
+@receiver(pre_delete, sender=User)
+def detach_audit_logs(sender, instance, **kwargs):
+    # AuditLog lives in another database, so the ORM cannot cascade into it;
+    # keep the SET_NULL behaviour by hand.
+    AuditLog.objects.filter(user_id=instance.pk).update(user=None)
+
+
+@receiver(post_delete, sender=User)
+def count_user_deleted(sender, instance, **kwargs):
+    counters.increment(counters.USERS, -1)
+
+
+@receiver(pre_save, sender=User_Profile)
+def remember_previous_role(sender, instance, raw=False, **kwargs):
+    instance._previous_role = None
+    if instance.pk and not raw:
+        instance._previous_role = (
+            User_Profile.objects.filter(pk=instance.pk).values_list("role", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=User_Profile)
+def count_profile_role(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, "_previous_role", None)
+    if created or previous is None:
+        counters.increment(counters.role_key(instance.role))
+    elif previous != instance.role:
+        counters.increment(counters.role_key(previous), -1)
+        counters.increment(counters.role_key(instance.role))
+
+
+@receiver(post_delete, sender=User_Profile)
+def count_profile_deleted(sender, instance, **kwargs):
+    counters.increment(counters.role_key(instance.role), -1)
+
+
+@receiver(post_delete, sender=AuditLog)
+def count_audit_log_deleted(sender, instance, **kwargs):
+    counters.increment(counters.AUDIT_LOGS, -1)
+    counters.increment(counters.action_key(instance.action), -1)
+
+
+@receiver(post_save, sender=SystemSettings)
+@receiver(post_delete, sender=SystemSettings)
+def settings_changed(sender, raw=False, **kwargs):
+    if not raw:
+        bump_version()
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
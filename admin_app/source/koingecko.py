@@ -1,8 +1,222 @@
+import logging
+import threading
+import time
+
 import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from admin_app.service.metrics import outbound
+from admin_app.source.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RateLimitTimeout,
+    SingleFlight,
+    TokenBucket,
+    UpstreamUnavailable,
+    backoff_delay,
+    retry_after,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class CoinGeckoClient:
+    """
+    CoinGecko client with one persistent session and a response cache keyed
+    by (coin, currency, days).
+
+    Once an entry is older than the TTL it is still served while a single
+    background thread refreshes it (stale-while-revalidate).
+
+    Concurrent misses for the same key share one upstream request. Requests
+    are spaced by a token bucket, 429/5xx answers and connection errors are
+    retried with jittered exponential backoff (honoring Retry-After), and
+    after repeated failures a circuit breaker stops calling upstream for a
+    while: cached entries keep being served, however old, and only misses
+    fail.
+    """
+
+    def __init__(
+        self,
+        base_url,
+        ttl=60,
+        connect_timeout=3.05,
+        read_timeout=10,
+        pool_size=10,
+        rate_limit=0.5,
+        burst=5,
+        max_retries=3,
+        backoff_base=1.0,
+        backoff_max=30.0,
+        breaker_threshold=5,
+        breaker_reset=60.0,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.ttl = ttl
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.bucket = TokenBucket(rate_limit, burst)
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_reset)
+        self._flight = SingleFlight()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._cache = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def market_chart(self, coin, currency, days):
+        key = (coin, currency, str(days))
+
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                fetched_at, data = entry
+                if time.monotonic() - fetched_at >= self.ttl and key not in self._refreshing:
+                    self._refreshing.add(key)
+                    threading.Thread(target=self._refresh, args=(key,), daemon=True).start()
+                return data
+
+        return self._flight.do(key, lambda: self._fetch_and_store(key))
+
+    def market_chart_range(self, coin, currency, start, end):
+        """
+        Samples between `start` and `end` (epoch ms) from the range endpoint.
+        Not cached: historical chunks are fetched once and stored.
+        """
+        return self._get(
+            "/coins/" + coin + "/market_chart/range",
+            {"vs_currency": currency, "from": start // 1000, "to": end // 1000},
+        )
+
+    def _refresh(self, key):
+        try:
+            self._flight.do(key, lambda: self._fetch_and_store(key))
+        except UpstreamUnavailable as exc:
+            logger.info("Skipped refresh of %s (%s), serving stale data", key, exc)
+        except requests.RequestException:
+            logger.warning("Background refresh failed for %s, serving stale data", key, exc_info=True)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _fetch_and_store(self, key):
+        coin, currency, days = key
+        data = self._get(
+            "/coins/" + coin + "/market_chart",
+            {"vs_currency": currency, "days": days},
+        )
+
+        with self._lock:
+            self._cache[key] = (time.monotonic(), data)
+        return data
+
+    def _get(self, path, params):
+        # The token comes first: a RateLimitTimeout after allow() would
+        # leave a half-open breaker waiting forever for its trial call.
+        self._acquire(path)
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{self.base_url} keeps failing, not calling it for now")
+
+        # One verdict per logical request, however many attempts it took
+        try:
+            response = self._request(path, params)
+        except (requests.RequestException, RateLimitTimeout):
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            self.breaker.release()
+            raise
+        # Other 4xx are our mistake, not an outage
+        self.breaker.record_success()
+        response.raise_for_status()
+        return response.json()
+
+    def _acquire(self, path):
+        if not self.bucket.acquire(timeout=self.timeout[1]):
+            raise RateLimitTimeout(f"no request budget for {path} within {self.timeout[1]}s")
+
+    def _request(self, path, params):
+        """
+        GET `path`, retrying 429, 5xx and connection errors with backoff.
+        The token for the first attempt is already taken. Returns the first
+        response that is not an outage, or raises the last error.
+        """
+        attempt = 0
+        while True:
+            delay = None
+            try:
+                with outbound("coingecko"):
+                    response = self.session.get(self.base_url + path, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                error = exc
+            else:
+                if response.status_code != 429 and response.status_code < 500:
+                    return response
+
+                error = requests.HTTPError(
+                    f"{response.status_code} from {response.url}", response=response
+                )
+                delay = retry_after(response.headers.get("Retry-After"))
+                if response.status_code == 429 and delay:
+                    # Every thread shares the budget, so hold them all back
+                    self.bucket.drain(delay)
+
+            if attempt >= self.max_retries or (delay is not None and delay > self.backoff_max):
+                raise error
+            if delay is None:
+                delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+
+            logger.warning("GET %s failed (%s), retrying in %.1fs", path, error, delay)
+            time.sleep(delay)
+            attempt += 1
+            self._acquire(path)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def build_client(**overrides):
+    """A new client configured from settings, with `overrides` applied."""
+    options = {
+        "ttl": settings.COINGECKO_CACHE_TTL,
+        "connect_timeout": settings.COINGECKO_CONNECT_TIMEOUT,
+        "read_timeout": settings.COINGECKO_READ_TIMEOUT,
+        "rate_limit": settings.COINGECKO_RATE_LIMIT,
+        "burst": settings.COINGECKO_BURST,
+        "max_retries": settings.COINGECKO_MAX_RETRIES,
+        "backoff_base": settings.COINGECKO_BACKOFF_BASE,
+        "backoff_max": settings.COINGECKO_BACKOFF_MAX,
+        "breaker_threshold": settings.COINGECKO_BREAKER_THRESHOLD,
+        "breaker_reset": settings.COINGECKO_BREAKER_RESET,
+    }
+    options.update(overrides)
+    return CoinGeckoClient(settings.COINGECKO_BASE_URL, **options)
+
+
+def get_client():
+    """Process-wide client built from settings."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = build_client()
+    return _client
+
 
 def market_chart(coin, currency, days):
 
-    url = "https://api.coingecko.com/api/v3/coins/" + coin + "/market_chart?vs_currency=" + currency + "&days=" + days
-    response = requests.get(url)
+    return get_client().market_chart(coin, currency, days)
+
+
+def market_chart_range(coin, currency, start, end):
 
-    return response.json()
+    return get_client().market_chart_range(coin, currency, start, end)
@@ -0,0 +1,498 @@
+import asyncio
+import json
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import numpy as np
+import requests
+from django.contrib.auth.models import AnonymousUser
+from django.http import StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from admin_app import views
+from admin_app.handlers import DisconnectAwareASGIHandler
+from admin_app.parameter import indicators
+from admin_app.parameter.backtest import apply_atr_stop
+from admin_app.parameter.streaming import EMA, RollingSMA, WilderATR, WilderAverage, WilderRSI, load_state
+from admin_app.service.broadcast import Broadcaster, Topic, async_event_stream
+from admin_app.service import chart_data
+from admin_app.service.chart_data import parse_range, parse_width
+from admin_app.source.koingecko import CoinGeckoClient
+from admin_app.source.resilience import CircuitOpenError, RateLimitTimeout, TokenBucket
+
+
+class FakeCoinGecko:
+    """
+    Local stand-in for the CoinGecko API on an ephemeral port.
+
+    Every request is recorded with the client port it arrived on, so tests
+    can tell whether connections were reused. Responses are popped from
+    `script` as (status, headers) pairs; once it is empty every request
+    gets a 200 with one price sample. Each response waits `delay` seconds.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.script = []
+        self.delay = 0.0
+        self.lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+
+            def do_GET(self):
+                with fake.lock:
+                    fake.requests.append((self.path, self.client_address[1], time.monotonic()))
+                    status, headers = fake.script.pop(0) if fake.script else (200, {})
+                time.sleep(fake.delay)
+                body = json.dumps({"prices": [[1_700_000_000_000, 100.0]]}).encode() if status == 200 else b""
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    @property
+    def ports(self):
+        return [port for _, port, _ in self.requests]
+
+
+class FakeServerTestCase(SimpleTestCase):
+    def setUp(self):
+        self.fake = FakeCoinGecko()
+        self.addCleanup(self.fake.close)
+
+    def coingecko(self, **options):
+        options.setdefault("rate_limit", 1000)
+        options.setdefault("burst", 1000)
+        options.setdefault("backoff_base", 0.01)
+        client = CoinGeckoClient(self.fake.url, **options)
+        self.addCleanup(client.session.close)
+        return client
+
+
+class CoinGeckoClientTests(FakeServerTestCase):
+    def test_requests_reuse_one_pooled_connection(self):
+        client = self.coingecko(ttl=0)
+        for days in range(1, 6):
+            client.market_chart("bitcoin", "usd", days)
+
+        self.assertEqual(len(self.fake.requests), 5)
+        self.assertEqual(len(set(self.fake.ports)), 1)
+
+    def test_fresh_entries_are_served_from_the_cache(self):
+        client = self.coingecko(ttl=60)
+        first = client.market_chart("bitcoin", "usd", 30)
+        second = client.market_chart("bitcoin", "usd", 30)
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.fake.requests), 1)
+
+    def test_stale_entries_are_served_while_one_refresh_runs(self):
+        client = self.coingecko(ttl=0.05)
+        client.market_chart("bitcoin", "usd", 30)
+        time.sleep(0.1)
+
+        for _ in range(5):
+            self.assertIn("prices", client.market_chart("bitcoin", "usd", 30))
+        deadline = time.monotonic() + 2
+        while len(self.fake.requests) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.05)
+
+        self.assertEqual(len(self.fake.requests), 2)
+
+    def test_concurrent_misses_share_one_request(self):
+        client = self.coingecko(ttl=60)
+        self.fake.delay = 0.2
+        start = threading.Barrier(8)
+        results = []
+
+        def fetch():
+            start.wait()
+            results.append(client.market_chart("bitcoin", "usd", 30))
+
+        threads = [threading.Thread(target=fetch) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(results), 8)
+        self.assertTrue(all(result == results[0] for result in results))
+        self.assertEqual(len(self.fake.requests), 1)
+
+
+class ThrottlingTests(FakeServerTestCase):
+    def test_token_bucket_paces_requests_after_the_burst(self):
+        client = self.coingecko(ttl=0, rate_limit=20, burst=1)
+        for days in range(1, 6):
+            client.market_chart("bitcoin", "usd", days)
+
+        times = [at for _, _, at in self.fake.requests]
+        # Four refills at 20 tokens per second
+        self.assertGreaterEqual(times[-1] - times[0], 0.18)
+
+    def test_bucket_gives_up_after_its_timeout(self):
+        bucket = TokenBucket(rate=1, capacity=1)
+        self.assertTrue(bucket.acquire(timeout=0))
+        self.assertFalse(bucket.acquire(timeout=0.1))
+
+    def test_429_is_retried_after_retry_after(self):
+        self.fake.script = [(429, {"Retry-After": "1"})]
+        client = self.coingecko(ttl=0)
+        started = time.monotonic()
+        data = client.market_chart("bitcoin", "usd", 1)
+
+        self.assertIn("prices", data)
+        self.assertEqual(len(self.fake.requests), 2)
+        self.assertGreaterEqual(time.monotonic() - started, 0.95)
+        # The wait is shared: the bucket was drained for every thread
+        self.assertGreaterEqual(self.fake.requests[1][2] - self.fake.requests[0][2], 0.95)
+
+    def test_retry_after_beyond_the_backoff_cap_fails_fast(self):
+        self.fake.script = [(429, {"Retry-After": "120"})]
+        client = self.coingecko(ttl=0, backoff_max=5)
+
+        with self.assertRaises(requests.HTTPError):
+            client.market_chart("bitcoin", "usd", 1)
+        self.assertEqual(len(self.fake.requests), 1)
+
+    def test_5xx_is_retried_with_backoff(self):
+        self.fake.script = [(503, {}), (502, {})]
+        client = self.coingecko(ttl=0, max_retries=3)
+
+        self.assertIn("prices", client.market_chart("bitcoin", "usd", 1))
+        self.assertEqual(len(self.fake.requests), 3)
+
+
+class CircuitBreakerTests(FakeServerTestCase):
+    def failing(self, count):
+        self.fake.script = [(503, {})] * count
+
+    def test_retries_of_one_request_count_as_one_failure(self):
+        self.failing(3)
+        client = self.coingecko(ttl=0, max_retries=2, breaker_threshold=2)
+
+        with self.assertRaises(requests.HTTPError):
+            client.market_chart("bitcoin", "usd", 1)
+        self.assertEqual(len(self.fake.requests), 3)
+        self.assertEqual(client.breaker.state, "closed")
+
+    def test_open_half_open_closed(self):
+        self.failing(2)
+        client = self.coingecko(ttl=0, max_retries=0, breaker_threshold=2, breaker_reset=0.2)
+        for days in (1, 2):
+            with self.assertRaises(requests.HTTPError):
+                client.market_chart("bitcoin", "usd", days)
+        self.assertEqual(client.breaker.state, "open")
+
+        with self.assertRaises(CircuitOpenError):
+            client.market_chart("bitcoin", "usd", 3)
+        self.assertEqual(len(self.fake.requests), 2)
+
+        time.sleep(0.25)
+        self.assertEqual(client.breaker.state, "half-open")
+        self.assertIn("prices", client.market_chart("bitcoin", "usd", 4))
+        self.assertEqual(client.breaker.state, "closed")
+
+    def test_failed_trial_reopens(self):
+        self.failing(3)
+        client = self.coingecko(ttl=0, max_retries=0, breaker_threshold=2, breaker_reset=0.2)
+        for days in (1, 2):
+            with self.assertRaises(requests.HTTPError):
+                client.market_chart("bitcoin", "usd", days)
+        time.sleep(0.25)
+
+        with self.assertRaises(requests.HTTPError):
+            client.market_chart("bitcoin", "usd", 3)
+        self.assertEqual(client.breaker.state, "open")
+
+    def test_rate_limit_timeout_does_not_strand_the_trial(self):
+        self.failing(2)
+        client = self.coingecko(ttl=0, max_retries=0, breaker_threshold=2, breaker_reset=0.2, read_timeout=0.05)
+        for days in (1, 2):
+            with self.assertRaises(requests.HTTPError):
+                client.market_chart("bitcoin", "usd", days)
+        time.sleep(0.25)
+
+        client.bucket.drain(1)
+        with self.assertRaises(RateLimitTimeout):
+            client.market_chart("bitcoin", "usd", 3)
+        self.assertEqual(client.breaker.state, "half-open")
+
+        client.bucket = TokenBucket(1000, 1000)
+        self.assertIn("prices", client.market_chart("bitcoin", "usd", 4))
+        self.assertEqual(client.breaker.state, "closed")
+
+    def test_stale_entries_are_served_while_open(self):
+        client = self.coingecko(ttl=0.05, max_retries=0, breaker_threshold=1, breaker_reset=60)
+        cached = client.market_chart("bitcoin", "usd", 30)
+        self.failing(1)
+        with self.assertRaises(requests.HTTPError):
+            client.market_chart("bitcoin", "usd", 1)
+        time.sleep(0.1)
+
+        self.assertEqual(client.market_chart("bitcoin", "usd", 30), cached)
+        with self.assertRaises(CircuitOpenError):
+            client.market_chart("bitcoin", "usd", 2)
+
+
+class StreamingIndicatorTests(SimpleTestCase):
+    """The streaming indicators against the vectorized series, on seeded random walks."""
+
+    SEEDS = range(20)
+
+    def series(self, seed):
+        rng = np.random.default_rng(seed)
+        size = int(rng.integers(1, 400))
+        close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.02, size)))
+        if seed % 5 == 0:
+            close[size // 3 : size // 2] = close[size // 3]  # flat stretch: zero gains and losses
+        spread = np.abs(rng.normal(0.0, 0.01, size)) * close
+        return rng, close + spread, close - spread, close
+
+    def assertStreamMatches(self, expected, make, feed, rng):
+        """Feed every input, saving and restoring the state at a random point."""
+        indicator = make()
+        restore_at = int(rng.integers(0, len(expected) + 1))
+        for position, want in enumerate(expected):
+            if position == restore_at:
+                indicator = load_state(json.loads(json.dumps(indicator.to_state())))
+            got = feed(indicator, position)
+            if math.isnan(want):
+                self.assertIsNone(got, f"position {position}")
+            else:
+                self.assertIsNotNone(got, f"position {position}")
+                self.assertTrue(
+                    math.isclose(got, want, rel_tol=1e-9, abs_tol=1e-9),
+                    f"position {position}: {got} != {want}",
+                )
+
+    def test_rolling_sma(self):
+        for seed in self.SEEDS:
+            rng, _, _, close = self.series(seed)
+            for period in (1, 7, 14, 50):
+                with self.subTest(seed=seed, period=period):
+                    self.assertStreamMatches(
+                        indicators.sma(close, period),
+                        lambda: RollingSMA(period),
+                        lambda ind, i: ind.update(close[i]),
+                        rng,
+                    )
+
+    def test_ema(self):
+        for seed in self.SEEDS:
+            rng, _, _, close = self.series(seed)
+            for period in (1, 12, 26):
+                with self.subTest(seed=seed, period=period):
+                    self.assertStreamMatches(
+                        indicators.ema(close, period),
+                        lambda: EMA(period),
+                        lambda ind, i: ind.update(close[i]),
+                        rng,
+                    )
+
+    def test_wilder_average(self):
+        for seed in self.SEEDS:
+            rng, _, _, close = self.series(seed)
+            with self.subTest(seed=seed):
+                self.assertStreamMatches(
+                    indicators.wilder(close, 14),
+                    lambda: WilderAverage(14),
+                    lambda ind, i: ind.update(close[i]),
+                    rng,
+                )
+
+    def test_wilder_rsi(self):
+        for seed in self.SEEDS:
+            rng, _, _, close = self.series(seed)
+            for period in (2, 14):
+                with self.subTest(seed=seed, period=period):
+                    self.assertStreamMatches(
+                        indicators.rsi(close, period),
+                        lambda: WilderRSI(period),
+                        lambda ind, i: ind.update(close[i]),
+                        rng,
+                    )
+
+    def test_wilder_atr(self):
+        for seed in self.SEEDS:
+            rng, high, low, close = self.series(seed)
+            for period in (1, 14):
+                with self.subTest(seed=seed, period=period):
+                    self.assertStreamMatches(
+                        indicators.atr(high, low, close, period),
+                        lambda: WilderATR(period),
+                        lambda ind, i: ind.update(high[i], low[i], close[i]),
+                        rng,
+                    )
+
+
+class AtrStopTests(SimpleTestCase):
+    @staticmethod
+    def reference(positions, close, atr_values, multiple):
+        result = positions.copy()
+        previous, highest, stopped = 0.0, -math.inf, False
+        for i in range(len(close)):
+            if positions[i] > previous:
+                highest, stopped = -math.inf, False
+            if positions[i] > 0 and close[i] < highest:
+                stopped = True
+            if stopped:
+                result[i] = 0.0
+            level = close[i] - multiple * atr_values[i]
+            if math.isfinite(level):
+                highest = max(highest, level)
+            previous = positions[i]
+        return result
+
+    def test_matches_loop_with_nan_warm_up(self):
+        rng = np.random.default_rng(7)
+        for case in range(500):
+            size = int(rng.integers(5, 80))
+            close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.05, size)))
+            atr_values = np.abs(rng.normal(2.0, 1.0, size))
+            if case % 2 == 0:
+                atr_values[: rng.integers(1, size)] = np.nan
+            positions = (rng.random(size) < 0.6).astype(np.float64)
+            multiple = float(rng.uniform(0.5, 3.0))
+            with self.subTest(case=case):
+                np.testing.assert_array_equal(
+                    apply_atr_stop(positions, close, atr_values, multiple),
+                    self.reference(positions, close, atr_values, multiple),
+                )
+
+
+class ChartQueryTests(SimpleTestCase):
+    def test_range(self):
+        self.assertEqual(parse_range(None), 30)
+        self.assertEqual(parse_range("1y"), 365)
+        self.assertIsNone(parse_range("all"))
+        self.assertEqual(parse_range("45d"), 45)
+
+    def test_invalid_ranges_raise_fixed_messages(self):
+        for value in ("abc", "0d", "-5", "3000000d", "99999999999999d", "1e9"):
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError) as raised:
+                    parse_range(value)
+                self.assertNotIn("literal", str(raised.exception))
+
+    def test_etag_follows_history_and_width(self):
+        newest = (1_700_000_000_000, 1.0, 2.0, 0.5, 1.5)
+        with mock.patch.object(chart_data, "series_state", return_value=(newest, None, 0)):
+            etag = chart_data.series_etag("bitcoin", "usd", "1d", 30, 640)
+            self.assertNotEqual(chart_data.series_etag("bitcoin", "usd", "1d", 30, 320), etag)
+        # A backfill rewrote older candles or overlays; the newest is unchanged
+        with mock.patch.object(chart_data, "series_state", return_value=(newest, None, 1)):
+            self.assertNotEqual(chart_data.series_etag("bitcoin", "usd", "1d", 30, 640), etag)
+
+    def test_width(self):
+        self.assertIsNone(parse_width(""))
+        self.assertEqual(parse_width("640"), 640)
+        self.assertEqual(parse_width("100000"), 2000)
+        for value in ("abc", "0", "-3"):
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    parse_width(value)
+
+
+@override_settings(METRICS_ALLOWED_IPS=["127.0.0.1"], METRICS_TOKEN="secret")
+class MetricsAccessTests(SimpleTestCase):
+    def get(self, remote_addr="127.0.0.1", **headers):
+        request = RequestFactory().get("/metrics", REMOTE_ADDR=remote_addr, **headers)
+        request.user = AnonymousUser()
+        return views.metrics_view(request).status_code
+
+    def test_local_scraper_is_allowed(self):
+        self.assertEqual(self.get(), 200)
+        self.assertEqual(self.get("10.0.0.5"), 403)
+
+    def test_forwarded_requests_do_not_count_as_local(self):
+        self.assertEqual(self.get(HTTP_X_FORWARDED_FOR="203.0.113.7"), 403)
+        self.assertEqual(self.get(HTTP_FORWARDED="for=203.0.113.7"), 403)
+
+    def test_token(self):
+        self.assertEqual(self.get("10.0.0.5", HTTP_AUTHORIZATION="Bearer secret"), 200)
+        self.assertEqual(self.get(HTTP_X_FORWARDED_FOR="203.0.113.7", HTTP_AUTHORIZATION="Bearer secret"), 200)
+        self.assertEqual(self.get("10.0.0.5", HTTP_AUTHORIZATION="Bearer wrong"), 403)
+        self.assertEqual(self.get("10.0.0.5", HTTP_AUTHORIZATION="secret"), 403)
+        self.assertEqual(self.get("10.0.0.5", HTTP_AUTHORIZATION="Basic secret"), 403)
+
+    @override_settings(METRICS_TOKEN="")
+    def test_empty_token_is_disabled(self):
+        self.assertEqual(self.get("10.0.0.5", HTTP_AUTHORIZATION="Bearer "), 403)
+
+
+class StreamDisconnectTests(SimpleTestCase):
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/api/stream/bitcoin/",
+        "query_string": b"",
+        "headers": [],
+        "server": ("testserver", 80),
+        "client": ("127.0.0.1", 50000),
+    }
+
+    @mock.patch.object(Topic, "poll", return_value=None)
+    def test_disconnect_unsubscribes(self, poll):
+        broadcaster = Broadcaster(poll_interval=0.01)
+        subscription = broadcaster.subscribe("bitcoin", "usd", "1d")
+        topic = broadcaster.topics[("bitcoin", "usd", "1d")]
+        response = StreamingHttpResponse(
+            async_event_stream(subscription, heartbeat=0.01), content_type="text/event-stream"
+        )
+
+        async def get_response_async(request):
+            return response
+
+        handler = DisconnectAwareASGIHandler()
+        handler.get_response_async = get_response_async
+
+        async def run():
+            gone = asyncio.Event()
+            bodies = []
+            requests_sent = []
+
+            async def receive():
+                if not requests_sent:
+                    requests_sent.append(True)
+                    return {"type": "http.request", "body": b"", "more_body": False}
+                await gone.wait()
+                return {"type": "http.disconnect"}
+
+            async def send(message):
+                if message["type"] == "http.response.body":
+                    bodies.append(message["body"])
+                    # The retry line and a keepalive: the stream is running
+                    if len(bodies) == 2:
+                        gone.set()
+
+            await asyncio.wait_for(handler(self.scope, receive, send), 5)
+            return bodies
+
+        bodies = asyncio.run(run())
+        self.assertEqual(bodies[0], b"retry: 5000\n\n")
+        self.assertNotIn(subscription, topic.subscribers)
+        self.assertNotIn(topic.key, broadcaster.topics)
+        topic._thread.join(1)
+        self.assertFalse(topic._thread.is_alive())
@@ -10,4 +10,7 @@ urlpatterns = [
     path('users/<int:user_id>/edit/', views.user_edit, name='user_edit'),
     path('audit-logs/', views.audit_logs, name='audit_logs'),
     path('settings/', views.settings_view, name='settings'),
+    path('api/candles/<slug:coin>/', views.api_candles, name='api_candles'),
+    path('api/stream/<slug:coin>/', views.api_stream, name='api_stream'),
+    path('metrics', views.metrics_view, name='metrics'),
 ]
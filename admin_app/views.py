@@ -1,23 +1,112 @@
+import hmac
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
-from django.core.paginator import Paginator
-from django.db.models import Q
+from django.contrib.auth.views import redirect_to_login
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import condition, require_http_methods
 
 from .models import AuditLog, SystemSettings, User_Profile
-from .service.dashboard import service_dashboard
+from .service import metrics
+from .service.audit import write_audit
+from .service.broadcast import async_event_stream, event_stream, get_broadcaster
+from .service.chart_data import (
+    downsampled_series,
+    parse_interval,
+    parse_range,
+    parse_width,
+    series_etag,
+)
+from .service.counters import USERS, read_counters
+from .service.dashboard import service_dashboard_async
+from .service.pagination import keyset_paginate
+from .service.search import search_audit_logs, search_users
+from .service.system_settings import save_settings
+
+# Keyset pagination orderings: (field, descending), last field unique
+AUDIT_LOG_PAGE_KEYS = [("timestamp", True), ("id", True)]
+USER_PAGE_KEYS = [("id", False)]
+
+
+async def dashboard(request):
+    """Dashboard admin dengan crypto analysis"""
+    # login_required only wraps sync views in Django 4.2; resolving the lazy
+    # request.user touches the session and the database.
+    if not await sync_to_async(lambda: request.user.is_authenticated)():
+        return redirect_to_login(request.get_full_path())
+
+    await sync_to_async(log_activity)(
+        request.user, "view", "Dashboard", "Viewing dashboard", request
+    )
 
+    context = await service_dashboard_async()
+    return await sync_to_async(render)(request, "admin_app/dashboard-chart.html", context)
 
+
+def _candles_etag(request, coin):
+    try:
+        interval = parse_interval(request.GET.get("interval"))
+        days = parse_range(request.GET.get("range"))
+        width = parse_width(request.GET.get("width")) or settings.CHART_MAX_POINTS
+    except ValueError:
+        return None
+    currency = request.GET.get("currency", "usd").lower()
+    return series_etag(coin, currency, interval, days, width)
+
+
+# The ETag is strong for identity responses. GZip turns it into a weak one
+# (W/"..."): its output carries random padding against BREACH, so the bytes
+# differ between responses. If-None-Match compares weakly, so 304s still work.
 @login_required
-def dashboard(request):
-    """Dashboard admin dengan crypto analysis"""
-    log_activity(request.user, "view", "Dashboard", "Viewing dashboard", request)
+@gzip_page
+@require_http_methods(["GET", "HEAD"])
+@condition(etag_func=_candles_etag)
+def api_candles(request, coin):
+    """Data candle dalam format kolom (t/o/h/l/c) beserta overlay indikator"""
+    try:
+        interval = parse_interval(request.GET.get("interval"))
+        days = parse_range(request.GET.get("range"))
+        width = parse_width(request.GET.get("width"))
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+    currency = request.GET.get("currency", "usd").lower()
 
-    context = service_dashboard()
-    return render(request, "admin_app/dashboard-chart.html", context)
+    # Downsampled to the chart width, so long ranges stay small
+    series = downsampled_series(coin, currency, interval, days, width or settings.CHART_MAX_POINTS)
+    response = JsonResponse(series)
+    # Revalidate on every use; unchanged series answer 304 from the ETag.
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+@login_required
+@require_http_methods(["GET"])
+def api_stream(request, coin):
+    """Server-Sent Events berisi candle dan indikator terbaru"""
+    try:
+        interval = parse_interval(request.GET.get("interval"))
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+    currency = request.GET.get("currency", "usd").lower()
+
+    subscription = get_broadcaster().subscribe(coin, currency, interval)
+    # Under ASGI a sync iterator would be drained by list() in a thread and
+    # never reach the client
+    stream = async_event_stream if isinstance(request, ASGIRequest) else event_stream
+    response = StreamingHttpResponse(
+        stream(subscription), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
 
 
 def get_client_ip(request):
@@ -30,9 +119,11 @@ def get_client_ip(request):
     return ip
 
 
-def log_activity(user, action, model_name, description, request=None, object_id=None):
-    """Log aktivitas user"""
-    AuditLog.objects.create(
+def log_activity(
+    user, action, model_name, description, request=None, object_id=None, sync=False
+):
+    """Log aktivitas user (di-buffer, kecuali sync=True)"""
+    entry = AuditLog(
         user=user,
         action=action,
         model_name=model_name,
@@ -41,6 +132,7 @@ def log_activity(user, action, model_name, description, request=None, object_id=
         ip_address=get_client_ip(request) if request else None,
         user_agent=request.META.get("HTTP_USER_AGENT", "")[:500] if request else "",
     )
+    write_audit(entry, sync=sync)
 
 
 @require_http_methods(["GET", "POST"])
@@ -56,7 +148,9 @@ def login_view(request):
         user = authenticate(request, username=username, password=password)
         if user is not None:
             login(request, user)
-            log_activity(user, "login", "Auth", f"User {username} login", request)
+            log_activity(
+                user, "login", "Auth", f"User {username} login", request, sync=True
+            )
             messages.success(
                 request, f"Selamat datang {user.get_full_name() or user.username}!"
             )
@@ -74,7 +168,7 @@ def logout_view(request):
     user = request.user
     username = user.username
     logout(request)
-    log_activity(user, "logout", "Auth", f"User {username} logout", request)
+    log_activity(user, "logout", "Auth", f"User {username} logout", request, sync=True)
     messages.success(request, "Anda telah logout!")
     return redirect("login")
 
@@ -88,21 +182,21 @@ def user_list(request):
     users = User.objects.all().select_related("profile")
 
     if search_query:
-        users = users.filter(
-            Q(username__icontains=search_query)
-            | Q(first_name__icontains=search_query)
-            | Q(last_name__icontains=search_query)
-            | Q(email__icontains=search_query)
-        )
-
-    paginator = Paginator(users, 10)
-    page_number = request.GET.get("page", 1)
-    page_obj = paginator.get_page(page_number)
+        users = search_users(users, search_query)
+
+    page_obj = keyset_paginate(
+        users,
+        USER_PAGE_KEYS,
+        10,
+        after=request.GET.get("after"),
+        before=request.GET.get("before"),
+    )
 
     context = {
         "page_obj": page_obj,
         "search_query": search_query,
-        "total_users": User.objects.count(),
+        "filter_querystring": urlencode({"q": search_query} if search_query else {}),
+        "total_users": read_counters([USERS])[USERS],
     }
 
     return render(request, "admin_app/user_list.html", context)
@@ -185,28 +279,46 @@ def audit_logs(request):
     filter_user = request.GET.get("user", "")
     search_query = request.GET.get("q", "")
 
-    logs = AuditLog.objects.select_related("user").all()
+    # Users live in the default database: no joins, users are loaded separately.
+    logs = AuditLog.objects.prefetch_related("user")
 
     if filter_action:
         logs = logs.filter(action=filter_action)
 
     if filter_user:
-        logs = logs.filter(user__username__icontains=filter_user)
-
-    if search_query:
-        logs = logs.filter(
-            Q(description__icontains=search_query)
-            | Q(model_name__icontains=search_query)
+        # The ids go into the audit database's query as parameters (no
+        # cross-database subquery), so stay well below SQLite's limit.
+        limit = settings.AUDIT_USER_FILTER_LIMIT
+        user_ids = list(
+            User.objects.filter(username__icontains=filter_user)
+            .order_by("username")
+            .values_list("id", flat=True)[: limit + 1]
         )
+        if len(user_ids) > limit:
+            messages.warning(
+                request,
+                f"Filter user cocok dengan lebih dari {limit} user; hanya {limit} user pertama yang dipakai.",
+            )
+        logs = logs.filter(user_id__in=user_ids[:limit])
 
-    paginator = Paginator(logs, 20)
-    page_number = request.GET.get("page", 1)
-    page_obj = paginator.get_page(page_number)
+    if search_query:
+        logs = search_audit_logs(logs, search_query)
+
+    page_obj = keyset_paginate(
+        logs,
+        AUDIT_LOG_PAGE_KEYS,
+        20,
+        after=request.GET.get("after"),
+        before=request.GET.get("before"),
+    )
 
     action_choices = [choice[0] for choice in AuditLog.ACTION_CHOICES]
 
+    filters = {"q": search_query, "action": filter_action, "user": filter_user}
+
     context = {
         "page_obj": page_obj,
+        "filter_querystring": urlencode({k: v for k, v in filters.items() if v}),
         "filter_action": filter_action,
         "filter_user": filter_user,
         "search_query": search_query,
@@ -228,12 +340,13 @@ def settings_view(request):
     )
 
     if request.method == "POST":
-        for key, value in request.POST.items():
-            if key.startswith("setting_"):
-                setting_key = key.replace("setting_", "")
-                setting, created = SystemSettings.objects.get_or_create(key=setting_key)
-                setting.value = value
-                setting.save()
+        save_settings(
+            {
+                key.replace("setting_", "", 1): value
+                for key, value in request.POST.items()
+                if key.startswith("setting_")
+            }
+        )
 
         log_activity(
             request.user, "update", "SystemSettings", "Updated system settings", request
@@ -247,3 +360,24 @@ def settings_view(request):
     }
 
     return render(request, "admin_app/settings.html", context)
+
+
+def _metrics_allowed(request):
+    if request.user.is_staff:
+        return True
+    token = settings.METRICS_TOKEN
+    scheme, _, supplied = request.META.get("HTTP_AUTHORIZATION", "").partition(" ")
+    if token and scheme == "Bearer" and hmac.compare_digest(supplied.encode(), token.encode()):
+        return True
+    # Behind a reverse proxy every client arrives from the proxy's address,
+    # so the IP allowlist only counts for requests that were not forwarded.
+    forwarded = "HTTP_X_FORWARDED_FOR" in request.META or "HTTP_FORWARDED" in request.META
+    return not forwarded and request.META.get("REMOTE_ADDR") in settings.METRICS_ALLOWED_IPS
+
+
+@require_http_methods(["GET"])
+def metrics_view(request):
+    """Metrik performa dalam format teks Prometheus"""
+    if not _metrics_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,16 @@
+"""
+ASGI config for admin_project project.
+"""
+
+import os
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'admin_project.settings')
+
+django.setup(set_prefix=False)
+
+from admin_app.handlers import DisconnectAwareASGIHandler  # noqa: E402
+
+# Same as get_asgi_application(), but streams end when the client leaves
+application = DisconnectAwareASGIHandler()
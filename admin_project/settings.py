@@ -31,6 +31,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'admin_app.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -59,15 +60,53 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'admin_project.wsgi.application'
+ASGI_APPLICATION = 'admin_project.asgi.application'
 
 
 # Database
 
-DATABASES = {
-    'default': {
+# Audit logs and market data live in their own SQLite files so their writes
+# do not queue behind the main file's lock; see admin_app.routers.
+
+def sqlite_database(name):
+    return {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': BASE_DIR / name,
+        'CONN_MAX_AGE': 60,  # seconds a connection is reused across requests
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {'timeout': 20},  # seconds to wait for a write lock
     }
+
+
+DATABASES = {
+    'default': sqlite_database('db.sqlite3'),
+    'audit': sqlite_database('audit.sqlite3'),
+    'prices': sqlite_database('prices.sqlite3'),
+}
+
+DATABASE_ROUTERS = ['admin_app.routers.AppDatabaseRouter']
+
+# admin_app model name -> database alias; unlisted models use 'default'
+DATABASE_APPS_MAPPING = {
+    'auditlog': 'audit',
+    'pricesample': 'prices',
+    'candle': 'prices',
+    'indicatorsnapshot': 'prices',
+    'indicatorvalue': 'prices',
+    'indicatorstate': 'prices',
+    'backfillcheckpoint': 'prices',
+    'correlationsnapshot': 'prices',
+    'backtestresult': 'prices',
+}
+
+# Applied to every new SQLite connection. WAL (readers no longer block the
+# writer) is persistent and set by migration 0013, not here, so merely opening
+# a database does not rewrite its file.
+SQLITE_PRAGMAS = {
+    'synchronous': 'NORMAL',  # safe with WAL, fsync only at checkpoints
+    'busy_timeout': 20000,  # milliseconds
+    'temp_store': 'MEMORY',
+    'cache_size': -16000,  # negative means KiB, so 16 MB per connection
 }
 
 
@@ -115,3 +154,80 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Login URL
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'dashboard'
+
+# CoinGecko price source
+COINGECKO_BASE_URL = 'https://api.coingecko.com/api/v3'
+COINGECKO_CACHE_TTL = 60  # seconds before a cached response is refreshed
+COINGECKO_CONNECT_TIMEOUT = 3.05
+COINGECKO_READ_TIMEOUT = 10
+COINGECKO_RATE_LIMIT = 0.5  # requests per second on average, shared by all threads
+COINGECKO_BURST = 5  # requests allowed back to back
+COINGECKO_MAX_RETRIES = 3  # retries on 429, 5xx and connection errors
+COINGECKO_BACKOFF_BASE = 1.0  # seconds; doubles per retry, with full jitter
+COINGECKO_BACKOFF_MAX = 30.0  # longest wait before a retry, Retry-After included
+COINGECKO_BREAKER_THRESHOLD = 5  # consecutive failed requests (after their retries) before upstream calls stop
+COINGECKO_BREAKER_RESET = 60.0  # seconds before a trial call is let through
+
+# Background price ingestion (manage.py ingest_prices)
+INGEST_COINS = ['bitcoin']  # default watchlist when the `watchlist` setting is empty
+INGEST_CURRENCY = 'usd'
+INGEST_POLL_INTERVAL = 60  # seconds between ticks
+CANDLE_INTERVALS = ['1d']  # any of 1m, 5m, 15m, 1h, 4h, 1d, 1w
+CANDLE_TIME_ZONE = TIME_ZONE  # zone used to align daily/weekly candles; 'UTC' for exchange-style candles
+WATCHLIST_MAX_WORKERS = 8  # concurrent upstream requests per tick
+WATCHLIST_FETCH_TIMEOUT = 15  # seconds from the start of a coin's request before it is reported as failed
+BACKFILL_CHUNK_DAYS = 90  # days per range request (manage.py backfill_prices)
+BACKFILL_WORKERS = 4  # concurrent range requests
+BACKFILL_RATE_LIMIT = 0.25  # requests per second, on top of the live ingestion budget
+ARCHIVE_ROOT = BASE_DIR / 'archive'  # memory-mapped candle archive (manage.py archive_prices)
+
+# Watchlist correlation and volatility matrix, refreshed by every ingest_prices tick
+CORRELATION_INTERVAL = '1d'  # candle interval of the returns; must be in CANDLE_INTERVALS
+CORRELATION_WINDOW = 30  # log returns per window
+CORRELATION_MIN_PERIODS = 10  # pairs with fewer common returns are left empty
+CORRELATION_DISPLAY_COINS = 15  # coins shown in the dashboard heatmap
+CORRELATION_CACHE_TIMEOUT = 300  # seconds; entries are also keyed by the snapshot time
+
+# Live chart updates (/api/stream/<coin>/): one shared poll per series per process
+STREAM_POLL_INTERVAL = 2.0  # seconds between reads of the candle table
+STREAM_HEARTBEAT = 15  # seconds between keepalive comments on idle streams
+STREAM_QUEUE_SIZE = 100  # events buffered per client before it is told to resync
+
+# /api/candles/ windows, and downsampling of responses requested with a `width`
+CHART_MAX_RANGE_DAYS = 3650  # longest numeric `range`; longer windows use range=all
+CHART_MAX_POINTS = 2000  # most candles in one response, whatever the width
+CHART_MIN_POINTS = 100  # the coarsest merge level has at most this many candles
+CHART_CACHE_TIMEOUT = 300  # seconds; merge levels are keyed by the last closed candle, responses by the latest one
+
+# Threads running the dashboard's independent reads concurrently (async view)
+DASHBOARD_READ_WORKERS = 4
+
+# Performance metrics (admin_app.middleware.PerformanceMiddleware, /metrics)
+METRICS_SERVER_TIMING = DEBUG  # add a Server-Timing header with the per-request breakdown
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']  # clients allowed to scrape /metrics besides staff users, only when not proxied
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')  # scrapers may send 'Authorization: Bearer <token>'; empty disables
+
+# SystemSettings are cached per process; the shared version stamp is checked at most this often
+SYSTEM_SETTINGS_CHECK_INTERVAL = 1.0  # seconds
+
+# Audit log writer: entries are queued and written with bulk_create
+AUDIT_BUFFERED = True  # False writes every entry synchronously
+AUDIT_BUFFER_SIZE = 100  # flush once this many entries are waiting
+AUDIT_FLUSH_INTERVAL = 2.0  # seconds between time-based flushes
+AUDIT_USER_FILTER_LIMIT = 500  # most users matched by the audit log `user` filter
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'admin_app': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}